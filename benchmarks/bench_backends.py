@@ -0,0 +1,105 @@
+"""Benchmark the pandas and Arrow (and Polars, if installed) transform backends.
+
+Runs the adjustment of a synthetic stocks table, and the USD conversion of a
+synthetic indices table, through each backend exactly as ``load_dataset``
+does after the parquet scan.  Checks that every backend returns the same
+frame as pandas.
+
+    python benchmarks/bench_backends.py --symbols 2000 --days 5000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import pwb_toolbox.datasets as pwb_ds
+from pwb_toolbox.datasets.backends import get_backend
+
+
+def make_table(symbols, n_days, adjusted=True, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2000-01-03", periods=n_days).date
+    n = len(symbols) * n_days
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(symbols), n_days)), axis=1)).ravel()
+    columns = {
+        "symbol": np.repeat(symbols, n_days),
+        "date": np.tile(dates, len(symbols)),
+        "open": close * 1.001,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(1, 10**6, n).astype(float),
+    }
+    if adjusted:
+        columns["adj_close"] = close * rng.uniform(0.5, 1.0, n)
+    return pa.table(columns)
+
+
+def run(backend, table, path, deps):
+    """Raw table -> transformed pandas frame, like ``_execute_plan``."""
+    engine = get_backend(backend)
+    if engine is None:
+        df = pwb_ds._table_to_frame(table)
+        return pwb_ds._transform_dataset(path, df, True, False, True, True, deps)
+    data = pwb_ds._transform_table(engine, path, engine.prepare(table), True, False, True, True, deps)
+    return pwb_ds._table_to_frame(engine.to_arrow(data))
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=5000)
+    args = parser.parse_args()
+
+    backends = ["pandas", "arrow"]
+    try:
+        get_backend("polars")
+        backends.append("polars")
+    except ImportError:
+        pass
+
+    stocks = make_table([f"S{i:04d}" for i in range(args.symbols)], args.days)
+    indices = make_table(["DAX", "NKY", "SPX", "HSI", "SMI"], args.days, adjusted=False, seed=1)
+    forex = make_table(["EURUSD", "USDJPY", "USDHKD", "USDCHF"], args.days, adjusted=False, seed=2)
+    forex_frame = pwb_ds._transform_dataset(
+        "Forex-Daily-Price", pwb_ds._table_to_frame(forex), True, False, True, True, {}
+    )
+
+    print(f"{stocks.num_rows:,} stock rows, {indices.num_rows:,} index rows")
+    for path, table in (("Stocks-Daily-Price", stocks), ("Indices-Daily-Price", indices)):
+        expected = None
+        for backend in backends:
+            if backend == "pandas":
+                deps = {"Forex-Daily-Price": forex_frame}
+            else:
+                engine = get_backend(backend)
+                deps = {
+                    "Forex-Daily-Price": pwb_ds._transform_table(
+                        engine, "Forex-Daily-Price", engine.prepare(forex), True, False, True, True, {}
+                    )
+                }
+            df, elapsed, peak = measure(lambda: run(backend, table, path, deps))
+            if expected is None:
+                expected = df
+            else:
+                pd.testing.assert_frame_equal(df, expected)
+            print(f"{path:22s} {backend:7s} {elapsed:7.2f}s  peak Python heap {peak / 2**20:8.1f} MiB")
+    print("all backends returned identical frames")
+
+
+if __name__ == "__main__":
+    main()
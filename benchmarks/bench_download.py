@@ -0,0 +1,145 @@
+"""Exercise ``datasets.download.download_files`` against a local HTTP server.
+
+Serves synthetic parquet files from a stand-in server that supports
+``Range``/``If-Range``, answers slowly, and drops the first transfer of every
+file half-way.  Checks that downloads resume, are verified, skip unchanged
+files and re-fetch changed or corrupted ones, and times sequential against
+parallel downloads.
+
+    python benchmarks/bench_download.py --files 16 --latency 0.2
+"""
+
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from pwb_toolbox.datasets.download import download_files, file_name
+
+
+class StandIn:
+    """In-memory file store served over HTTP, with request accounting."""
+
+    def __init__(self, latency: float, flaky: bool):
+        self.files = {}
+        self.latency = latency
+        self.flaky = flaky
+        self.dropped = set()
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def put(self, name: str, data: bytes) -> None:
+        self.files[name] = data
+
+    def etag(self, name: str) -> str:
+        return '"%s"' % hashlib.md5(self.files[name]).hexdigest()
+
+    def handler(self):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.split("?", 1)[0].lstrip("/")
+                data = store.files.get(name)
+                with store.lock:
+                    store.requests.append((name, self.headers.get("Range")))
+                time.sleep(store.latency)
+                if data is None:
+                    self.send_error(404)
+                    return
+                start, status = 0, 200
+                byte_range = self.headers.get("Range")
+                if byte_range and self.headers.get("If-Range", store.etag(name)) == store.etag(name):
+                    start, status = int(byte_range.split("=")[1].split("-")[0]), 206
+                body = data[start:]
+                self.send_response(status)
+                self.send_header("ETag", store.etag(name))
+                self.send_header("Content-Length", str(len(body)))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+                self.end_headers()
+                with store.lock:
+                    drop = store.flaky and name not in store.dropped
+                    store.dropped.add(name)
+                if drop:  # cut the connection half-way through
+                    self.wfile.write(body[: len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        return Handler
+
+
+def parquet_bytes(seed: int, rows: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"symbol": f"S{seed:03d}", "close": rng.random(rows), "volume": rng.random(rows)})
+    with tempfile.NamedTemporaryFile(suffix=".parquet") as f:
+        df.to_parquet(f.name)
+        return Path(f.name).read_bytes()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    store = StandIn(args.latency, flaky=True)
+    for i in range(args.files):
+        store.put(f"data/part-{i:03d}.parquet", parquet_bytes(i, args.rows))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), store.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [f"{base}/{name}?sig=abc" for name in store.files]
+    tags = lambda: {f"{base}/{n}": store.etag(n) for n in store.files}  # noqa: E731
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Interrupted transfers are resumed with a Range request
+        t0 = time.perf_counter()
+        paths = download_files(urls, Path(tmp) / "parallel", tags=tags(), max_workers=8, progress=False)
+        t_parallel = time.perf_counter() - t0
+        for path, name in zip(paths, store.files):
+            assert path.read_bytes() == store.files[name], name
+            assert path.name == file_name(f"{base}/{name}")
+        resumed = sum(1 for _, r in store.requests if r)
+        assert resumed == args.files, f"expected {args.files} resumed transfers, got {resumed}"
+
+        # Unchanged files are not fetched again
+        store.requests.clear()
+        download_files(urls, Path(tmp) / "parallel", tags=tags(), progress=False)
+        assert not store.requests, store.requests
+
+        # A changed file and a corrupted local copy are fetched again, alone
+        changed = next(iter(store.files))
+        store.put(changed, parquet_bytes(999, args.rows))
+        paths[-1].write_bytes(b"garbage")
+        store.requests.clear()
+        paths = download_files(urls, Path(tmp) / "parallel", tags=tags(), progress=False)
+        fetched = sorted(name for name, _ in store.requests)
+        assert fetched == sorted([changed, list(store.files)[-1]]), fetched
+        assert paths[0].read_bytes() == store.files[changed]
+
+        store.flaky = False
+        t0 = time.perf_counter()
+        download_files(urls, Path(tmp) / "sequential", max_workers=1, progress=False)
+        t_sequential = time.perf_counter() - t0
+
+    server.shutdown()
+    print(f"{args.files} files, {args.latency:.2f}s latency, first transfer of each file dropped half-way")
+    print(f"sequential (no drops): {t_sequential:6.2f}s")
+    print(f"8 connections:         {t_parallel:6.2f}s  (all {resumed} interrupted files resumed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark the Forex ``to_usd`` inversion used by ``load_dataset``.
+
+Compares the former ``iterrows`` loop with the vectorised transform on a
+synthetic Forex frame, and checks that both produce identical output.
+
+    python benchmarks/bench_forex_to_usd.py --pairs 40 --days 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import pwb_toolbox.datasets as pwb_ds
+
+
+CURRENCIES = [
+    "EUR", "JPY", "GBP", "CHF", "AUD", "CAD", "HKD", "BRL", "MXN", "SEK",
+    "NOK", "DKK", "SGD", "NZD", "ZAR", "INR", "CNY", "KRW", "TRY", "PLN",
+]
+
+
+def make_forex(n_pairs: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("1990-01-01", periods=n_days).date
+    frames = []
+    for i in range(n_pairs):
+        ccy = CURRENCIES[i % len(CURRENCIES)]
+        symbol = f"{ccy}USD" if i % 2 == 0 else f"USD{ccy}"
+        close = np.exp(np.cumsum(rng.normal(0, 0.005, n_days)))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "date": dates,
+                    "open": close * 1.001,
+                    "high": close * 1.004,
+                    "low": close * 0.996,
+                    "close": close,
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_to_usd(df: pd.DataFrame) -> pd.DataFrame:
+    """The row-by-row implementation previously used by ``load_dataset``."""
+    for index, row in df.iterrows():
+        if row["symbol"].endswith("USD"):
+            continue
+        df.at[index, "open"] = 1 / row["open"]
+        df.at[index, "high"] = 1 / row["high"]
+        df.at[index, "low"] = 1 / row["low"]
+        df.at[index, "close"] = 1 / row["close"]
+        df.at[index, "symbol"] = row["symbol"][3:] + "USD"
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=40)
+    parser.add_argument("--days", type=int, default=10_000)
+    args = parser.parse_args()
+
+    df = make_forex(args.pairs, args.days)
+    print(f"Forex frame: {len(df):,} rows")
+
+    t0 = time.perf_counter()
+    expected = legacy_to_usd(df.copy())
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = pwb_ds.__convert_forex_to_usd(df.copy())
+    t_vector = time.perf_counter() - t0
+
+    pd.testing.assert_frame_equal(result, expected)
+    print(f"iterrows:   {t_legacy:8.3f}s")
+    print(f"vectorised: {t_vector:8.3f}s  ({t_legacy / t_vector:,.0f}x faster, identical output)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark the long -> wide reshape done at the end of ``get_pricing``.
+
+Compares the former ``pivot_table`` (groupby-mean) reshape with the direct
+``PricePanel`` scatter on a synthetic long frame, checks that both produce
+identical output, and that the duplicate-row policies behave as documented.
+
+    python benchmarks/bench_get_pricing_reshape.py --symbols 500 --days 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from pwb_toolbox.datasets import PricePanel
+
+
+FIELDS = ["close", "high", "low", "open", "volume"]
+
+
+def make_long(n_symbols: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """Shuffled long frame indexed by date, one row per (date, symbol)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("1985-01-01", periods=n_days)
+    symbols = np.array([f"S{i:04d}" for i in range(n_symbols)])
+    n = n_symbols * n_days
+    close = np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_days)), axis=1)).ravel()
+    df = pd.DataFrame(
+        {
+            "date": np.tile(dates, n_symbols),
+            "symbol": np.repeat(symbols, n_days),
+            "open": close * 1.001,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.integers(1_000, 1_000_000, n).astype(float),
+        }
+    )
+    # IPO gaps: drop each symbol's first few years at random.
+    first = rng.integers(0, n_days // 2, n_symbols)
+    df = df[np.tile(np.arange(n_days), n_symbols) >= np.repeat(first, n_days)]
+    df = df.sample(frac=1.0, random_state=seed)
+    return df.set_index("date")
+
+
+def legacy_reshape(df: pd.DataFrame, fields) -> pd.DataFrame:
+    """The ``pivot_table`` reshape previously used by ``get_pricing``."""
+    prices = df.pivot_table(values=fields, index=df.index, columns="symbol")
+    return prices.swaplevel(axis=1).sort_index(axis=1)
+
+
+def check_duplicates() -> None:
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2020-01-01", "2020-01-01", "2020-01-02"]),
+            "symbol": ["A", "A", "A"],
+            "close": [1.0, 2.0, 3.0],
+        }
+    )
+    first = PricePanel.from_long(df, ["close"], duplicates="first").field("close")[:, 0]
+    last = PricePanel.from_long(df, ["close"], duplicates="last").field("close")[:, 0]
+    assert first.tolist() == [1.0, 3.0], first
+    assert last.tolist() == [2.0, 3.0], last
+    try:
+        PricePanel.from_long(df, ["close"], duplicates="raise")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicates='raise' did not raise")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=10_000)
+    args = parser.parse_args()
+
+    check_duplicates()
+    df = make_long(args.symbols, args.days)
+    print(f"Long frame: {len(df):,} rows, {args.symbols} symbols x {args.days} days")
+
+    t0 = time.perf_counter()
+    expected = legacy_reshape(df, FIELDS)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = PricePanel.from_long(df, FIELDS).to_frame()
+    t_panel = time.perf_counter() - t0
+
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+    print(f"pivot_table: {t_legacy:8.3f}s")
+    print(f"scatter:     {t_panel:8.3f}s  ({t_legacy / t_panel:,.1f}x faster, identical output)")
+
+
+if __name__ == "__main__":
+    main()
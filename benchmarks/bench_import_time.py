@@ -0,0 +1,73 @@
+"""Import-time budget for the ``pwb_toolbox`` subpackages.
+
+Imports each module in a fresh interpreter with ``python -X importtime``,
+reads the cumulative time of the module from the report, and lists the heavy
+third-party packages it pulled in.  Exits with status 1 when a module is over
+its time budget or imports a package it should only load on demand, so it can
+gate CI:
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --scale 2   # slower machine
+"""
+
+import argparse
+import subprocess
+import sys
+
+# module -> (budget in seconds, packages that must not be imported)
+BUDGETS = {
+    "pwb_toolbox": (0.05, ["pandas", "numpy"]),
+    "pwb_toolbox.backtesting": (0.05, ["backtrader", "deap", "scipy", "matplotlib", "datasets"]),
+    "pwb_toolbox.performance": (0.05, ["pandas", "matplotlib", "scipy"]),
+    "pwb_toolbox.performance.nav_metrics": (1.0, ["matplotlib", "scipy", "datasets"]),
+    "pwb_toolbox.execution": (0.05, ["ib_insync", "ccxt", "matplotlib", "scipy"]),
+    "pwb_toolbox.execution.ccxt_connector": (1.5, ["ib_insync", "matplotlib", "scipy"]),
+    "pwb_toolbox.datasets": (1.5, ["datasets", "huggingface_hub", "matplotlib", "scipy"]),
+}
+HEAVY = ["backtrader", "deap", "scipy", "matplotlib", "datasets", "huggingface_hub", "ib_insync", "ccxt", "pandas", "numpy"]
+
+
+def import_time(module: str) -> tuple[float, list[str]]:
+    """Cumulative import time of `module` (seconds) and the heavy packages it loaded."""
+    probe = f"import sys, {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=True
+    )
+    # Report lines: "import time: <self us> | <cumulative us> | <indent><name>"
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cum, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name == module:
+            cumulative = int(cum)
+    return cumulative / 1e6, proc.stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every time budget")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per module")
+    args = parser.parse_args()
+
+    failures = []
+    for module, (budget, forbidden) in BUDGETS.items():
+        runs = [import_time(module) for _ in range(args.repeat)]
+        seconds = min(t for t, _ in runs)
+        loaded = runs[0][1]
+        budget *= args.scale
+        bad = [name for name in forbidden if name in loaded]
+        status = "ok" if seconds <= budget and not bad else "FAIL"
+        print(f"{status:4s} {module:40s} {seconds:6.3f}s (budget {budget:.2f}s)  loads: {', '.join(loaded) or '-'}")
+        if seconds > budget:
+            failures.append(f"{module} took {seconds:.3f}s > {budget:.2f}s")
+        if bad:
+            failures.append(f"{module} imports {', '.join(bad)}")
+
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare the ``optimize`` drivers on one search problem.
+
+Searches the lookback and number of holdings of a monthly momentum
+portfolio (``ranked_equal_weights`` + ``run_vectorized``) on synthetic prices
+(``PWB_DATA_SOURCE=synthetic``, no download), maximising the Calmar ratio.
+For each driver, reports the best full-history Calmar, the number of
+backtests, and their cost in full-history equivalents (a backtest on a third
+of the history costs 1/3).
+
+    python benchmarks/bench_optimizers.py --symbols 200 --trials 81
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("PWB_DATA_SOURCE", "synthetic")
+
+import pwb_toolbox.backtesting as pwb_bt  # noqa: E402
+import pwb_toolbox.datasets as pwb_ds  # noqa: E402
+
+
+def momentum(params, prices):
+    close = prices.field_frame("close")
+    weights = pwb_bt.ranked_equal_weights(close.pct_change(params["lookback"]), params["holdings"], close=close)
+    return pwb_bt.run_vectorized(weights, prices, costs=0.0005, align=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--start", default="2005-01-01")
+    parser.add_argument("--trials", type=int, default=81)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drivers", nargs="+", default=list(pwb_bt.optimizers.DRIVERS))
+    args = parser.parse_args()
+
+    symbols = [f"SYN{i:04d}" for i in range(args.symbols)]
+    prices = pwb_bt.align_panel(pwb_ds.get_price_panel(symbols, fields=["open", "close"], start_date=args.start))
+    space = {"lookback": pwb_bt.Integer(20, 250), "holdings": pwb_bt.Integer(1, 30)}
+    print(f"{len(prices.dates)} dates x {len(prices.symbols)} symbols, {args.trials} trials per driver")
+
+    for driver in args.drivers:
+        t0 = time.perf_counter()
+        result = pwb_bt.optimize(
+            momentum, space, driver=driver, n_trials=args.trials, prices=prices, n_workers=args.workers, seed=args.seed
+        )
+        elapsed = time.perf_counter() - t0
+        print(
+            f"{driver:10s} calmar {result.score:6.3f}  {result.params}  "
+            f"backtests {len(result.trials):4d}  cost {result.cost:6.1f}  {elapsed:6.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
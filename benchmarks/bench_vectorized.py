@@ -0,0 +1,139 @@
+"""Compare ``run_vectorized`` with ``run_strategy`` (Backtrader) on the portfolio templates.
+
+Runs each template through Backtrader and through its weight builder +
+``run_vectorized`` on the same synthetic prices (``PWB_DATA_SOURCE=synthetic``,
+no download), and reports the run times and the relative NAV difference.
+With ``--tolerance``, exits with status 1 when a difference is above it.
+
+The templates run at their default 0.9 leverage (``DailyLeverage`` splits it
+over the symbols), with whole shares; ``--fractional`` shows the drift of
+fractional positions.  With ``execution="close"`` the vectorised NAV is
+compared after adding back the commission Backtrader charges a bar later.
+
+    python benchmarks/bench_vectorized.py --symbols 20
+    python benchmarks/bench_vectorized.py --symbols 20 --fractional --tolerance 0.05
+    python benchmarks/bench_vectorized.py --symbols 500 --skip-backtrader
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("PWB_DATA_SOURCE", "synthetic")
+
+import backtrader as bt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import pwb_toolbox.backtesting as pwb_bt  # noqa: E402
+import pwb_toolbox.datasets as pwb_ds  # noqa: E402
+
+
+class AboveSMA(bt.Indicator):
+    lines = ("signal",)
+    params = (("period", 50),)
+
+    def __init__(self):
+        self.lines.signal = self.data.close > bt.ind.SMA(self.data.close, period=self.p.period)
+
+
+class RateOfChange(bt.Indicator):
+    lines = ("roc",)
+    params = (("period", 60),)
+
+    def __init__(self):
+        self.lines.roc = bt.ind.RateOfChange(self.data.close, period=self.p.period)
+
+
+class SignOfChange(bt.Indicator):
+    lines = ("signal",)
+    params = (("period", 60),)
+
+    def __init__(self, universe=None):
+        roc = bt.ind.RateOfChange(self.data.close, period=self.p.period)
+        self.lines.signal = bt.If(roc > 0.05, 1, bt.If(roc < -0.05, -1, 0))
+
+
+def cases(close, leverage, n_symbols):
+    sma = close.rolling(50).mean()
+    above = (close > sma).where(sma.notna()).astype(float)
+    roc60, roc5 = close.pct_change(60), close.pct_change(5)
+    sign = np.sign(roc60.where(roc60.abs() > 0.05, 0.0)).where(roc60.notna())
+    per_symbol = leverage / n_symbols
+    # name, indicator, kwargs, strategy, strategy kwargs, weights, execution (and order)
+    return [
+        ("DailyEqualWeight", AboveSMA, {}, pwb_bt.DailyEqualWeightPortfolio, {},
+         lambda: pwb_bt.equal_weight_weights(above, leverage), "open"),
+        ("DailyLeverage", AboveSMA, {}, pwb_bt.DailyLeveragePortfolio, {"leverage": per_symbol},
+         lambda: pwb_bt.fixed_leverage_weights(above, per_symbol), "close"),
+        ("DynamicEqualWeight", AboveSMA, {}, pwb_bt.DynamicEqualWeightPortfolio, {},
+         lambda: pwb_bt.dynamic_equal_weights(above, leverage, close=close), "open"),
+        ("MonthlyRankedEqualWeight", RateOfChange, {}, pwb_bt.MonthlyRankedEqualWeightPortfolio,
+         {"num_selection": 5}, lambda: pwb_bt.ranked_equal_weights(roc60, 5, leverage, close=close),
+         ("open", "sells_first")),
+        ("MonthlyLongShortQuantile", SignOfChange, {}, pwb_bt.MonthlyLongShortQuantilePortfolio, {},
+         lambda: pwb_bt.long_short_quantile_weights(sign, leverage, close=close), "open"),
+        ("QuarterlyTopMomentum", RateOfChange, {}, pwb_bt.QuarterlyTopMomentumPortfolio, {},
+         lambda: pwb_bt.top_momentum_weights(roc60, leverage, close=close), "open"),
+        ("WeeklyLongShortDecile", RateOfChange, {"period": 5}, pwb_bt.WeeklyLongShortDecilePortfolio, {},
+         lambda: pwb_bt.long_short_decile_weights(roc5, leverage=leverage, close=close), "close"),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--start", default="2015-01-01")
+    parser.add_argument("--leverage", type=float, default=0.9, help="the templates' default")
+    parser.add_argument("--costs", type=float, default=0.0005)
+    parser.add_argument("--fractional", action="store_true", help="fractional instead of whole shares")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="max relative NAV difference")
+    parser.add_argument("--skip-backtrader", action="store_true")
+    args = parser.parse_args()
+
+    symbols = [f"SYN{i:04d}" for i in range(args.symbols)]
+    fields = ["open", "high", "low", "close"]
+    panel = pwb_bt.align_panel(pwb_ds.get_price_panel(symbols, fields=fields, start_date=args.start, extend=True))
+    close = panel.field_frame("close")
+    cash = 1_000_000.0
+    print(f"{len(panel.dates)} dates x {len(panel.symbols)} symbols")
+
+    failures = []
+    for name, indicator, indicator_kwargs, strategy, strategy_kwargs, weights, execution in cases(
+        close, args.leverage, len(panel.symbols)
+    ):
+        execution, order = execution if isinstance(execution, tuple) else (execution, "symbols")
+        t0 = time.perf_counter()
+        result = pwb_bt.run_vectorized(
+            weights(), panel, costs=args.costs, execution=execution, cash=cash, order=order,
+            whole_shares=not args.fractional,
+        )
+        vectorized = time.perf_counter() - t0
+        line = f"{name:26s} vectorized {vectorized * 1000:8.1f} ms"
+        if not args.skip_backtrader:
+            strategy_kwargs = {"leverage": args.leverage, **strategy_kwargs}
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                run = pwb_bt.run_strategy(
+                    indicator, indicator_kwargs, strategy, strategy_kwargs, symbols, args.start, cash,
+                    broker_kwargs={"commission": args.costs},
+                )
+            backtrader = time.perf_counter() - t0
+            nav = pd.DataFrame(run.log_data).assign(date=lambda df: pd.to_datetime(df["date"])).set_index("date")
+            logged = result.nav + result.costs if execution == "close" else result.nav
+            diff = (logged.reindex(nav.index) / nav["value"] - 1).abs()
+            line += f"  backtrader {backtrader:7.2f} s  NAV diff max {diff.max():.2e} median {diff.median():.2e}"
+            if not diff.max() <= args.tolerance:
+                failures.append(f"{name}: NAV differs by {diff.max():.2%}")
+        print(line)
+
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark the volatility screen used by ``get_least_volatile_symbols``.
+
+Compares the former per-symbol loop with the vectorised
+``volatility_statistic`` on a synthetic (symbol, field) close frame, and
+checks that both keep the same symbols.
+
+    python benchmarks/bench_volatility_screen.py --symbols 500 --days 8000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from pwb_toolbox.backtesting.universe import volatility_statistic
+
+
+def make_pivot(n_symbols: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("1990-01-01", periods=n_days)
+    returns = rng.normal(0, 0.02, (n_days, n_symbols))
+    # A few symbols with bad ticks that the screen must drop
+    bad = rng.choice(n_symbols, n_symbols // 20, replace=False)
+    returns[rng.integers(1, n_days, len(bad)), bad] = 4.0
+    close = 100 * np.cumprod(1 + returns, axis=0)
+    columns = pd.MultiIndex.from_product([[f"S{i:04d}" for i in range(n_symbols)], ["close"]])
+    return pd.DataFrame(close, index=dates, columns=columns)
+
+
+def legacy_screen(pivot: pd.DataFrame) -> list:
+    """The per-symbol loop previously used by ``get_least_volatile_symbols``."""
+    symbols = []
+    for sym in pivot.columns.levels[0]:
+        df = (
+            pivot[sym]
+            .copy()
+            .reset_index()
+            .rename(columns={"index": "date"})
+            .set_index("date")
+        )
+        if df.close.pct_change().abs().max() > 3:
+            continue
+        symbols.append(sym)
+    return symbols
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=8_000)
+    args = parser.parse_args()
+
+    pivot = make_pivot(args.symbols, args.days)
+    close = pivot.xs("close", axis=1, level=1)
+
+    t0 = time.perf_counter()
+    expected = legacy_screen(pivot)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    stat = volatility_statistic(close, "max_abs_return")
+    result = sorted(stat.index[~(stat > 3)])
+    t_vector = time.perf_counter() - t0
+
+    assert result == expected, "vectorised screen keeps different symbols"
+    for statistic in ("realized_vol", "downside_vol"):
+        stat = volatility_statistic(close, statistic, window=252)
+        assert stat.notna().all() and (stat > 0).all(), statistic
+    returns = close.pct_change().iloc[-252:]
+    np.testing.assert_allclose(
+        volatility_statistic(close, "realized_vol", window=252),
+        returns.std() * np.sqrt(252),
+    )
+
+    print(f"{args.symbols} symbols x {args.days} days, {len(expected)} kept")
+    print(f"per-symbol loop: {t_legacy * 1000:9.1f}ms")
+    print(f"vectorised:      {t_vector * 1000:9.1f}ms  ({t_legacy / t_vector:,.0f}x faster, same symbols)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,69 @@
-from .base_strategy import BaseStrategy
-from .commission import get_commissions
-from .backtest_engine import run_strategy, generate_sensitivity_results
-from .optimization_engine import optimize_strategy_ga
-from .indicators import SigmoidLongCompositeIndicator
-from .portfolio import run_portfolio, generate_reports
-from .strategies import (
-    DailyEqualWeightPortfolio,
-    DailyLeveragePortfolio,
-    EqualWeightEntryExitPortfolio,
-    DynamicEqualWeightPortfolio,
-    MonthlyLongShortPortfolio,
-    MonthlyLongShortQuantilePortfolio,
-    MonthlyRankedEqualWeightPortfolio,
-    QuarterlyTopMomentumPortfolio,
-    RollingSemesterLongShortPortfolio,
-    WeeklyLongShortDecilePortfolio,
-    WeightedAllocationPortfolio,
-)
-from .universe import get_most_liquid_symbols, get_least_volatile_symbols
+"""Backtesting engine, strategies and universe helpers.
+
+Names are imported on first use (PEP 562), so importing the package does not
+load backtrader, deap, scipy or the Hugging Face ``datasets`` library until a
+function or class that needs them is accessed.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "BaseStrategy": ".base_strategy",
+    "get_commissions": ".commission",
+    "get_backtest_panel": ".cache",
+    "get_backtest_commission": ".cache",
+    "clear_backtest_cache": ".cache",
+    "run_strategy": ".backtest_engine",
+    "generate_sensitivity_results": ".backtest_engine",
+    "optimize_strategy_ga": ".optimization_engine",
+    "optimize": ".optimizers",
+    "StrategySpec": ".optimizers",
+    "OptimizationResult": ".optimizers",
+    "Real": ".optimizers",
+    "Integer": ".optimizers",
+    "Choice": ".optimizers",
+    "SigmoidLongCompositeIndicator": ".indicators",
+    "run_portfolio": ".portfolio",
+    "generate_reports": ".portfolio",
+    "DailyEqualWeightPortfolio": ".strategies",
+    "DailyLeveragePortfolio": ".strategies",
+    "EqualWeightEntryExitPortfolio": ".strategies",
+    "DynamicEqualWeightPortfolio": ".strategies",
+    "MonthlyLongShortPortfolio": ".strategies",
+    "MonthlyLongShortQuantilePortfolio": ".strategies",
+    "MonthlyRankedEqualWeightPortfolio": ".strategies",
+    "QuarterlyTopMomentumPortfolio": ".strategies",
+    "RollingSemesterLongShortPortfolio": ".strategies",
+    "WeeklyLongShortDecilePortfolio": ".strategies",
+    "WeightedAllocationPortfolio": ".strategies",
+    "run_vectorized": ".vectorized",
+    "align_panel": ".vectorized",
+    "VectorizedResult": ".vectorized",
+    "equal_weight_weights": ".vectorized",
+    "fixed_leverage_weights": ".vectorized",
+    "dynamic_equal_weights": ".vectorized",
+    "ranked_equal_weights": ".vectorized",
+    "long_short_quantile_weights": ".vectorized",
+    "long_short_decile_weights": ".vectorized",
+    "top_momentum_weights": ".vectorized",
+    "get_most_liquid_symbols": ".universe",
+    "get_least_volatile_symbols": ".universe",
+}
+_SUBMODULES = {module[1:] for module in _EXPORTS.values()}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
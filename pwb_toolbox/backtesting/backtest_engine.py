@@ -1,10 +1,8 @@
 import copy
 import backtrader as bt
 import itertools
-import pandas as pd
-import numpy as np
-import pwb_toolbox.backtesting as pwb_bt
-import pwb_toolbox.datasets as pwb_ds
+
+from .cache import get_backtest_commission, get_backtest_panel
 
 
 def _apply_broker_kwargs(broker: bt.BrokerBase, kwargs: dict) -> None:
@@ -44,33 +42,33 @@ def run_strategy(
     cash,
     cerebro_kwargs=None,
     broker_kwargs=None,
+    prices=None,
 ):
-    """Run a tactical asset allocation strategy with Backtrader."""
+    """
+    Run a tactical asset allocation strategy with Backtrader.
+
+    The aligned prices and the commission estimate are cached per universe
+    and start date (see :mod:`pwb_toolbox.backtesting.cache`), so repeated
+    calls only run the strategy loop.  `prices` is a :class:`PricePanel`
+    laid out like ``get_backtest_panel(symbols, start_date)`` to use instead,
+    e.g. one attached from shared memory.
+    """
     # Load the data from https://paperswithbacktest.com/datasets
     cerebro_kwargs = cerebro_kwargs or {}
-    broker_kwargs = broker_kwargs or {}
+    broker_kwargs = dict(broker_kwargs or {})
     # Engine configuration
     cerebro = bt.Cerebro(**cerebro_kwargs)
-    # Universe
-    pivot_df = pwb_ds.get_pricing(
-        symbol_list=symbols,
-        fields=["open", "high", "low", "close"],
-        start_date=start_date,
-        extend=True,  # Extend the dataset with proxy data
-    )
-    # Create trading-day index (optional but keeps Cerebro happy)
-    trading_days = pd.bdate_range(pivot_df.index.min(), pivot_df.index.max())
-    pivot_df = pivot_df.reindex(trading_days)
-    pivot_df.ffill(inplace=True)  # forward-fill holidays
-    pivot_df.bfill(inplace=True)  # back-fill leading IPO gaps
+    # Universe: every business day, holidays forward-filled and leading IPO
+    # gaps back-filled
+    panel = prices if prices is not None else get_backtest_panel(symbols, start_date)
     cerebro = bt.Cerebro()
-    for symbol in pivot_df.columns.levels[0]:
-        data = bt.feeds.PandasData(dataname=pivot_df[symbol].copy())
+    for symbol in sorted(panel.symbols):
+        data = bt.feeds.PandasData(dataname=panel.symbol_frame(symbol))
         cerebro.adddata(data, name=symbol)
     # Strategy
     cerebro.addstrategy(
         strategy_cls,
-        total_days=len(trading_days),
+        total_days=len(panel.dates),
         indicator_cls=indicator_cls,
         indicator_kwargs=indicator_kwargs,
         **strategy_kwargs,
@@ -78,7 +76,7 @@ def run_strategy(
     # Broker
     cerebro.broker.set_cash(cash)
     if "commission" not in broker_kwargs:
-        commission = np.mean(list(pwb_bt.get_commissions(symbols).values()))
+        commission = get_backtest_commission(symbols)
         print(f"Estimated commission: {commission:.6f}")
         broker_kwargs["commission"] = commission
     _apply_broker_kwargs(cerebro.broker, broker_kwargs)
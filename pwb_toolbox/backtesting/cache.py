@@ -0,0 +1,154 @@
+"""In-process and on-disk cache of the inputs ``run_strategy`` prepares.
+
+Repeated backtests over the same universe (GA sweeps, sensitivity grids)
+used to download, pivot and align the prices, and re-estimate the
+commission, on every call.  Both are now built once per key and reused:
+
+* the aligned :class:`PricePanel` (every business day, gaps forward-filled,
+  leading IPO gaps back-filled), saved under
+  ``<cache root>/.backtesting/panel-<key>/`` and opened memory-mapped;
+* the mean ``get_commissions`` estimate, saved as
+  ``<cache root>/.backtesting/commission-<key>.json``.
+
+``<cache root>`` is the dataset cache directory (``PWB_CACHE_DIR``).  The key
+hashes the symbols, the start date, the data source (and the synthetic
+generator settings or ``PWB_LAKE_DIR``) and today's date, since the prices
+run up to today: entries are rebuilt once a day, and older ones are deleted
+when a new one is written.  Pass ``refresh=True`` to rebuild an entry now.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import uuid
+
+import numpy as np
+
+from .. import datasets as pwb_ds
+from ..datasets.panel import PricePanel
+
+
+CACHE_VERSION = 1
+FIELDS = ["open", "high", "low", "close"]
+MEMORY_ENTRIES = 8  # panels kept in process, least recently used evicted first
+
+_panels: OrderedDict[str, PricePanel] = OrderedDict()
+_commissions: dict[str, float] = {}
+
+
+def get_backtest_cache_dir() -> Path:
+    """Directory of the on-disk entries, inside the dataset cache root."""
+    return pwb_ds.get_cache_dir() / ".backtesting"
+
+
+def _key(kind, symbols, start_date) -> str:
+    source = pwb_ds._data_source()
+    if source == "synthetic":
+        origin = repr(pwb_ds.synthetic.SyntheticConfig.from_env())
+    else:
+        origin = str(pwb_ds.get_lake_dir() or "")
+    parts = [CACHE_VERSION, kind, sorted(set(symbols)), str(start_date), date.today().isoformat(), source, origin]
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()[:20]
+
+
+def _prune(root: Path, keep: str) -> None:
+    """Delete the entries written before today; their key can no longer match."""
+    today = date.today().isoformat()
+    for entry in root.iterdir():
+        if entry.name == keep or ".tmp-" in entry.name:
+            continue
+        try:
+            stamp = date.fromtimestamp(entry.stat().st_mtime).isoformat()
+            if stamp < today:
+                shutil.rmtree(entry) if entry.is_dir() else entry.unlink()
+        except OSError:
+            pass
+
+
+def _remember(key: str, panel: PricePanel) -> PricePanel:
+    _panels[key] = panel
+    _panels.move_to_end(key)
+    while len(_panels) > MEMORY_ENTRIES:
+        _panels.popitem(last=False)
+    return panel
+
+
+def get_backtest_panel(symbols, start_date, refresh: bool = False) -> PricePanel:
+    """
+    Open/high/low/close of `symbols` from `start_date`, aligned like ``run_strategy``.
+
+    Loads with ``get_pricing(..., extend=True)`` on a miss, then reindexes to
+    every business day with forward- and back-filled gaps.
+    """
+    from .vectorized import align_panel
+
+    key = _key("panel", symbols, start_date)
+    if not refresh and key in _panels:
+        _panels.move_to_end(key)
+        return _panels[key]
+
+    root = get_backtest_cache_dir()
+    path = root / f"panel-{key}"
+    if not refresh:
+        try:
+            return _remember(key, PricePanel.load(path))
+        except (OSError, ValueError):
+            pass
+
+    prices = pwb_ds.get_pricing(symbol_list=list(symbols), fields=FIELDS, start_date=start_date, extend=True)
+    panel = align_panel(PricePanel.from_frame(prices))
+    try:
+        # Write next to the entry and rename, so concurrent workers never
+        # open a half-written panel.
+        tmp = root / f"panel-{key}.tmp-{uuid.uuid4().hex}"
+        panel.save(tmp)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        _prune(root, path.name)
+    except OSError as exc:
+        print(f"Warning: could not write the backtest cache at {path} ({exc}).")
+        shutil.rmtree(tmp, ignore_errors=True)
+    return _remember(key, panel)
+
+
+def get_backtest_commission(symbols, refresh: bool = False) -> float:
+    """Mean of the ``get_commissions`` estimates for `symbols`, cached by key."""
+    from .commission import get_commissions
+
+    key = _key("commission", symbols, None)
+    if not refresh and key in _commissions:
+        return _commissions[key]
+
+    path = get_backtest_cache_dir() / f"commission-{key}.json"
+    if not refresh:
+        try:
+            _commissions[key] = float(json.loads(path.read_text())["commission"])
+            return _commissions[key]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    commission = float(np.mean(list(get_commissions(list(symbols)).values())))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp-{uuid.uuid4().hex}")
+        tmp.write_text(json.dumps({"commission": commission}))
+        os.replace(tmp, path)
+        _prune(path.parent, path.name)
+    except OSError as exc:
+        print(f"Warning: could not write the backtest cache at {path} ({exc}).")
+    _commissions[key] = commission
+    return commission
+
+
+def clear_backtest_cache(disk: bool = True) -> None:
+    """Drop the cached panels and commissions, in process and (with `disk`) on disk."""
+    _panels.clear()
+    _commissions.clear()
+    if disk:
+        shutil.rmtree(get_backtest_cache_dir(), ignore_errors=True)
@@ -1,10 +1,5 @@
-from datetime import datetime
-import datasets as ds
-from pwb_toolbox.datasets import _get_hf_token
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy.stats as stats
 
 from ..datasets import get_pricing
 
@@ -2,16 +2,29 @@ from functools import partial
 from multiprocessing import Pool
 import os
 import random
+import time
 
 from deap import base, creator, tools, algorithms
 import numpy as np
 import pandas as pd
 
 from .backtest_engine import run_strategy
+from .cache import get_backtest_commission, get_backtest_panel
 from ..datasets import get_pricing
+from ..datasets.panel import PricePanel
 from ..performance.metrics import calmar_ratio
 
 
+# Prices attached by `_init_worker` in each pool process
+_worker_prices = None
+
+
+def _init_worker(handle):
+    """Pool initializer: attach the shared price panel once per worker."""
+    global _worker_prices
+    _worker_prices = PricePanel.attach(handle)
+
+
 def _evaluate(
     individual,
     indicator_cls,
@@ -44,6 +57,7 @@ def _evaluate(
         cash=cash,
         cerebro_kwargs=cerebro_kwargs,
         broker_kwargs=broker_kwargs,
+        prices=_worker_prices,
     )
 
     # Get strategy NAV
@@ -56,6 +70,36 @@ def _evaluate(
     return (-calmar,)  # GA minimizes
 
 
+def _genome_key(individual, resolution):
+    """
+    The exact genome, or with a `resolution` the genome rounded to that grid,
+    so near-identical genomes share a fitness.
+    """
+    if resolution is None:
+        return tuple(float(gene) for gene in individual)
+    return tuple(np.round(np.asarray(individual, dtype=float) / resolution).astype(np.int64).tolist())
+
+
+def _evaluate_population(population, toolbox, cache, resolution):
+    """
+    Set the fitness of the individuals that have none.
+
+    Genomes found in `cache` (keyed by :func:`_genome_key`) are not run
+    again, and duplicates within the batch are run once.  Returns the
+    numbers of backtests run and of fitnesses taken from the cache.
+    """
+    invalid = [ind for ind in population if not ind.fitness.valid]
+    keys = [_genome_key(ind, resolution) for ind in invalid]
+    pending = {}
+    for ind, key in zip(invalid, keys):
+        if key not in cache and key not in pending:
+            pending[key] = ind
+    cache.update(zip(pending, toolbox.map(toolbox.evaluate, list(pending.values()))))
+    for ind, key in zip(invalid, keys):
+        ind.fitness.values = cache[key]
+    return len(pending), len(invalid) - len(pending)
+
+
 def optimize_strategy_ga(
     indicator_cls,
     strategy_cls,
@@ -73,7 +117,35 @@ def optimize_strategy_ga(
     cerebro_kwargs=None,
     broker_kwargs=None,
     seed=None,
+    prices=None,
+    genome_resolution=None,
+    patience=None,
+    min_improvement=0.0,
+    time_budget=None,
 ):
+    """
+    Search the bias and weights of `indicator_cls` that maximise the Calmar ratio.
+
+    Runs DEAP's simple GA (select, ``varAnd``, evaluate) with three shortcuts:
+
+    * fitnesses are cached by genome, so a genome is backtested once.  By
+      default the key is the exact genome.  With `genome_resolution`, genes
+      are rounded to that grid first: offspring within it of a cached
+      genome get that genome's fitness without being backtested, which
+      saves runs but can return a genome scored with a neighbour's Calmar;
+    * with `patience`, the search stops once the best Calmar has not
+      improved by more than `min_improvement` for `patience` generations
+      (the default ``None`` runs all `n_generations`);
+    * it also stops after the generation that exceeds `time_budget` seconds.
+
+    ``result["stopped"]`` tells why the search ended; the returned genome is
+    the best one seen in any generation.
+
+    The aligned prices (`prices`, else ``get_backtest_panel(symbols,
+    start_date)``) are copied once into shared memory; every pool worker
+    attaches to that block when it starts, so the evaluations read no data
+    and the prices are held once whatever the number of workers.
+    """
     if seed is not None:
         random.seed(seed)
         np.random.seed(seed)
@@ -103,6 +175,11 @@ def optimize_strategy_ga(
     )
     toolbox.register("population", tools.initRepeat, list, toolbox.individual)
 
+    # Commission estimated once, so every candidate is charged the same
+    broker_kwargs = dict(broker_kwargs or {})
+    if "commission" not in broker_kwargs:
+        broker_kwargs["commission"] = get_backtest_commission(symbols)
+
     # Evaluation wrapped with fixed args -------------------------------
     toolbox.register(
         "evaluate",
@@ -123,8 +200,7 @@ def optimize_strategy_ga(
     # Parallel evaluation -----------------------------
     total_cores = os.cpu_count()
     n_workers = max(1, total_cores // 2)
-    pool = Pool(processes=n_workers)
-    toolbox.register("map", pool.map)
+    panel = prices if prices is not None else get_backtest_panel(symbols, start_date)
 
     # Operators --------------------------------------------------------
     toolbox.register("mate", tools.cxBlend, alpha=0.4)
@@ -139,22 +215,51 @@ def optimize_strategy_ga(
     stats.register("avg", np.mean)
     stats.register("max", np.max)
 
-    pop, logbook = algorithms.eaSimple(
-        pop,
-        toolbox,
-        cxpb=cx_prob,
-        mutpb=mut_prob,
-        ngen=n_generations,
-        stats=stats,
-        verbose=True,
-    )
+    logbook = tools.Logbook()
+    logbook.header = ["gen", "nevals", "cached"] + stats.fields
+    hall_of_fame = tools.HallOfFame(1)
+    cache = {}
+    started = time.monotonic()
+    best, stale, stopped = None, 0, "generations"
+    evaluations = cached = 0
+    block = pool = None
+    try:
+        block, handle = panel.share()
+        pool = Pool(processes=n_workers, initializer=_init_worker, initargs=(handle,))
+        toolbox.register("map", pool.map)
+        for gen in range(n_generations + 1):
+            if gen:
+                offspring = toolbox.select(pop, len(pop))
+                pop[:] = algorithms.varAnd(offspring, toolbox, cx_prob, mut_prob)
+            nevals, hits = _evaluate_population(pop, toolbox, cache, genome_resolution)
+            evaluations += nevals
+            cached += hits
+            hall_of_fame.update(pop)
+            logbook.record(gen=gen, nevals=nevals, cached=hits, **stats.compile(pop))
+            print(logbook.stream)
 
-    # Close the pool to free resources
-    pool.close()
-    pool.join()
+            calmar = -hall_of_fame[0].fitness.values[0]
+            if best is None or np.isnan(best) or calmar > best + min_improvement:
+                best, stale = calmar, 0
+            else:
+                stale += 1
+            if patience is not None and stale >= patience:
+                stopped = "stagnation"
+                break
+            if time_budget is not None and time.monotonic() - started > time_budget:
+                stopped = "time_budget"
+                break
+    finally:
+        # Close the pool and release the shared prices
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if block is not None:
+            block.close()
+            block.unlink()
 
     # Best individual --------------------------------------------------
-    best_ind = tools.selBest(pop, k=1)[0]
+    best_ind = hall_of_fame[0]
     best_bias = best_ind[0]
     best_weights = best_ind[1:]
 
@@ -165,4 +270,7 @@ def optimize_strategy_ga(
         "weights": best_weights,
         "calmar": best_calmar,
         "logbook": logbook,  # so you can inspect convergence
+        "evaluations": evaluations,  # backtests actually run
+        "cached": cached,  # fitnesses reused from the genome cache
+        "stopped": stopped,  # "generations", "stagnation" or "time_budget"
     }
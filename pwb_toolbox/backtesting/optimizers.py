@@ -0,0 +1,528 @@
+"""Parameter search over a strategy with pluggable drivers.
+
+:func:`optimize` searches a parameter `space` for the values that maximise
+an `objective` of the NAV.  Every driver hands batches of candidates to the
+same evaluator, which runs them in a process pool attached to one shared
+price panel (see :meth:`PricePanel.share`) and never runs the same
+parameters at the same fidelity twice::
+
+    import pwb_toolbox.backtesting as pwb_bt
+
+    spec = pwb_bt.StrategySpec(
+        indicator_cls=MySignal,
+        strategy_cls=pwb_bt.MonthlyRankedEqualWeightPortfolio,
+        symbols=symbols,
+        start_date="2010-01-01",
+    )
+    space = {"period": (20, 250), "strategy.num_selection": (3, 10), "strategy.leverage": (0.5, 1.0)}
+    result = pwb_bt.optimize(spec, space, objective="calmar", driver="hyperband", n_trials=81)
+    result.params, result.score, result.trials
+
+Drivers
+-------
+``"random"`` / ``"sobol"``
+    `n_trials` uniform (or scrambled Sobol) points, all on the full history.
+``"halving"`` / ``"hyperband"``
+    Multi-fidelity: candidates are first run on the most recent
+    `min_fidelity` share of the history, and only the best ``1 / eta`` are
+    promoted to an ``eta`` times longer one, up to the full history.
+    Hyperband runs several such brackets, from aggressive to plain search.
+``"tpe"`` / ``"gp"``
+    Sequential model-based search: a tree-structured Parzen estimator, or a
+    Gaussian process (scikit-learn) with expected improvement, proposing
+    `batch_size` candidates at a time after a Sobol start.
+``"ga"``
+    Genetic algorithm (tournament selection, blend crossover, Gaussian
+    mutation) in the unit cube of the space.
+
+Parameters named ``"strategy.<name>"`` go to the strategy kwargs, all others
+(optionally ``"indicator.<name>"``) to the indicator kwargs.  A plain
+function ``fn(params, prices) -> NAV`` can replace the :class:`StrategySpec`,
+e.g. to search with :func:`run_vectorized`; `prices` is then required.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+import math
+from multiprocessing import Pool
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ..datasets.panel import PricePanel
+from ..performance import metrics
+
+
+OBJECTIVES = {
+    "calmar": metrics.calmar_ratio,
+    "sharpe": metrics.sharpe_ratio,
+    "sortino": metrics.sortino_ratio,
+    "cagr": metrics.cagr,
+    "total_return": metrics.total_return,
+}
+
+
+# --------------------------------------------------------------------------
+# Search space
+# --------------------------------------------------------------------------
+@dataclass(frozen=True)
+class Real:
+    """Float in ``[low, high]``, sampled uniformly (or log-uniformly with `log`)."""
+
+    low: float
+    high: float
+    log: bool = False
+
+    def decode(self, u: float) -> float:
+        if self.log:
+            return float(math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low))))
+        return float(self.low + u * (self.high - self.low))
+
+
+@dataclass(frozen=True)
+class Integer:
+    """Integer in ``[low, high]``, both included."""
+
+    low: int
+    high: int
+
+    def decode(self, u: float) -> int:
+        return int(min(self.high, self.low + math.floor(u * (self.high - self.low + 1))))
+
+
+@dataclass(frozen=True)
+class Choice:
+    """One of `options`."""
+
+    options: tuple
+
+    def decode(self, u: float):
+        return self.options[min(len(self.options) - 1, int(u * len(self.options)))]
+
+
+def _dimension(spec):
+    """A space entry: a dimension, a ``(low, high)`` tuple (ints -> Integer) or a list of options."""
+    if isinstance(spec, (Real, Integer, Choice)):
+        return spec
+    if isinstance(spec, list):
+        return Choice(tuple(spec))
+    if isinstance(spec, tuple) and len(spec) == 2:
+        low, high = spec
+        if isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)):
+            return Integer(int(low), int(high))
+        return Real(float(low), float(high))
+    raise TypeError(f"Expected Real, Integer, Choice, a (low, high) tuple or a list of options, got {spec!r}")
+
+
+class _Space:
+    """Maps points of the unit cube to parameter dicts."""
+
+    def __init__(self, space):
+        if not space:
+            raise ValueError("space must define at least one parameter")
+        self.names = list(space)
+        self.dims = [_dimension(spec) for spec in space.values()]
+
+    def __len__(self):
+        return len(self.dims)
+
+    def decode(self, u) -> dict:
+        return {name: dim.decode(float(x)) for name, dim, x in zip(self.names, self.dims, np.clip(u, 0.0, 1.0))}
+
+
+# --------------------------------------------------------------------------
+# Strategy and evaluator
+# --------------------------------------------------------------------------
+@dataclass
+class StrategySpec:
+    """The fixed part of a ``run_strategy`` call; the searched parameters are merged into the kwargs."""
+
+    indicator_cls: type
+    strategy_cls: type
+    symbols: list
+    start_date: str
+    cash: float = 100_000.0
+    indicator_kwargs: dict = field(default_factory=dict)
+    strategy_kwargs: dict = field(default_factory=dict)
+    cerebro_kwargs: dict | None = None
+    broker_kwargs: dict | None = None
+
+    def run(self, params: dict, prices: PricePanel | None = None) -> pd.Series:
+        """NAV of the strategy with `params` on `prices` (default: the cached panel)."""
+        from .backtest_engine import run_strategy
+
+        indicator_kwargs, strategy_kwargs = dict(self.indicator_kwargs), dict(self.strategy_kwargs)
+        for name, value in params.items():
+            if name.startswith("strategy."):
+                strategy_kwargs[name[len("strategy."):]] = value
+            else:
+                indicator_kwargs[name.removeprefix("indicator.")] = value
+        strategy = run_strategy(
+            self.indicator_cls,
+            indicator_kwargs,
+            self.strategy_cls,
+            strategy_kwargs,
+            self.symbols,
+            self.start_date,
+            self.cash,
+            cerebro_kwargs=self.cerebro_kwargs,
+            broker_kwargs=self.broker_kwargs,
+            prices=prices,
+        )
+        nav = pd.DataFrame(strategy.log_data)
+        return pd.Series(nav["value"].to_numpy(), index=pd.to_datetime(nav["date"]))
+
+
+# State of the evaluating process, set by `_init_worker`
+_worker = {}
+
+
+def _init_worker(prices, spec, objective):
+    """Pool initializer: attach the shared panel (or take it as is, in process)."""
+    _worker.update(
+        prices=PricePanel.attach(prices) if isinstance(prices, dict) else prices,
+        spec=spec,
+        objective=objective,
+    )
+
+
+def _slice(panel: PricePanel, fidelity: float) -> PricePanel:
+    """The most recent `fidelity` share of the dates, as a view."""
+    if fidelity >= 1.0:
+        return panel
+    start = len(panel.dates) - max(2, int(round(fidelity * len(panel.dates))))
+    return PricePanel(panel.values[max(0, start):], panel.dates[max(0, start):], panel.symbols, panel.fields)
+
+
+def _run_trial(task) -> float:
+    params, fidelity = task
+    prices = _slice(_worker["prices"], fidelity)
+    spec = _worker["spec"]
+    nav = spec.run(params, prices) if isinstance(spec, StrategySpec) else spec(params, prices)
+    nav = getattr(nav, "nav", nav)  # accept a VectorizedResult
+    return float(_worker["objective"](nav))
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class _Evaluator:
+    """Runs (params, fidelity) batches once each, in a pool sharing one panel."""
+
+    def __init__(self, spec, objective, prices, n_workers, time_budget):
+        self.trials = []
+        self._scores = {}
+        self._deadline = None if time_budget is None else time.monotonic() + time_budget
+        self._block = self._pool = None
+        if n_workers > 1:
+            try:
+                self._block, handle = prices.share()
+                self._pool = Pool(n_workers, initializer=_init_worker, initargs=(handle, spec, objective))
+            except BaseException:
+                self.close()
+                raise
+        else:
+            _init_worker(prices, spec, objective)
+
+    def __call__(self, candidates, fidelity=1.0):
+        """Scores of the parameter dicts `candidates` on the `fidelity` share of the history."""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise _OutOfTime
+        keys = [(tuple(sorted(params.items())), fidelity) for params in candidates]
+        pending = {}
+        for key, params in zip(keys, candidates):
+            if key not in self._scores and key not in pending:
+                pending[key] = params
+        tasks = [(params, fidelity) for params in pending.values()]
+        scores = self._pool.map(_run_trial, tasks) if self._pool is not None else list(map(_run_trial, tasks))
+        for (key, params), score in zip(pending.items(), scores):
+            self._scores[key] = score
+            self.trials.append({**params, "fidelity": fidelity, "score": score})
+        return [self._scores[key] for key in keys]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+        _worker.clear()
+
+
+def _rankable(scores):
+    """Scores with NaN/inf mapped to -inf, so they rank last."""
+    scores = np.asarray(scores, dtype=float)
+    return np.where(np.isfinite(scores), scores, -np.inf)
+
+
+# --------------------------------------------------------------------------
+# Drivers: each proposes points of the unit cube and scores them with `evaluate`
+# --------------------------------------------------------------------------
+def _sobol(n, d, rng):
+    from scipy.stats import qmc
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # "balance properties" warning when n is not a power of 2
+        return qmc.Sobol(d, scramble=True, seed=rng).random(n)
+
+
+def _random_driver(evaluate, space, n_trials, rng):
+    points = rng.random((n_trials, len(space)))
+    evaluate([space.decode(u) for u in points])
+
+
+def _sobol_driver(evaluate, space, n_trials, rng):
+    evaluate([space.decode(u) for u in _sobol(n_trials, len(space), rng)])
+
+
+def _successive_halving(evaluate, space, points, fidelity, eta):
+    """Run `points` at `fidelity`, promote the best 1/eta to eta times more history, until the full history."""
+    while True:
+        scores = _rankable(evaluate([space.decode(u) for u in points], fidelity))
+        if fidelity >= 1.0 or len(points) <= 1:
+            return
+        keep = max(1, len(points) // eta)
+        points = points[np.argsort(-scores, kind="stable")[:keep]]
+        fidelity = min(1.0, fidelity * eta)
+
+
+def _rungs(min_fidelity, eta):
+    """Number of promotions from `min_fidelity` to the full history."""
+    if not 0 < min_fidelity <= 1:
+        raise ValueError(f"min_fidelity must be in (0, 1], got {min_fidelity}")
+    return max(0, int(round(math.log(1.0 / min_fidelity, eta))))
+
+
+def _halving_driver(evaluate, space, n_trials, rng, eta=3, min_fidelity=1 / 9):
+    s = _rungs(min_fidelity, eta)
+    _successive_halving(evaluate, space, rng.random((n_trials, len(space))), float(eta) ** -s, eta)
+
+
+def _hyperband_driver(evaluate, space, n_trials, rng, eta=3, min_fidelity=1 / 9):
+    """Brackets from `n_trials` points at `min_fidelity` down to a few points on the full history."""
+    s_max = _rungs(min_fidelity, eta)
+    for s in range(s_max, -1, -1):
+        n = max(1, math.ceil(n_trials * (s_max + 1) / (s + 1) * float(eta) ** (s - s_max)))
+        _successive_halving(evaluate, space, rng.random((n, len(space))), float(eta) ** -s, eta)
+
+
+def _model_driver(propose, evaluate, space, n_trials, rng, n_startup, batch_size):
+    """
+    Sobol start, then batches from `propose(X, y)` until `n_trials` points are scored.
+
+    `propose` returns candidates best first; the first `batch_size` whose
+    parameters have not been tried yet are run (random points if it runs out).
+    """
+    n_startup = min(n_trials, n_startup if n_startup is not None else max(8, 2 * len(space)))
+    X = _sobol(n_startup, len(space), rng)
+    y = _rankable(evaluate([space.decode(u) for u in X]))
+    seen = {tuple(space.decode(u).items()) for u in X}
+    while len(X) < n_trials:
+        k = min(batch_size, n_trials - len(X))
+        batch = []
+        for u in np.vstack([propose(X, y), rng.random((16 * k, len(space)))]):
+            key = tuple(space.decode(u).items())
+            if key not in seen:
+                seen.add(key)
+                batch.append(u)
+                if len(batch) == k:
+                    break
+        if not batch:
+            return  # every candidate tried: the space is exhausted
+        batch = np.array(batch)
+        X = np.vstack([X, batch])
+        y = np.concatenate([y, _rankable(evaluate([space.decode(u) for u in batch]))])
+
+
+def _candidates(X, y, rng, n=2048):
+    """Random points plus Gaussian steps around the best ones, in the unit cube."""
+    best = X[np.argsort(-y, kind="stable")[:5]]
+    local = best[rng.integers(len(best), size=n // 4)] + rng.normal(0.0, 0.05, (n // 4, X.shape[1]))
+    return np.clip(np.vstack([rng.random((n, X.shape[1])), local]), 0.0, 1.0)
+
+
+def _tpe_driver(evaluate, space, n_trials, rng, n_startup=None, batch_size=None, gamma=0.25):
+    def density(points, at):
+        # Product of Gaussian kernels (Scott's bandwidth, floored) averaged over `points`
+        width = np.maximum(points.std(axis=0) * len(points) ** (-1.0 / (points.shape[1] + 4)), 0.05)
+        z = (at[:, None, :] - points[None, :, :]) / width
+        return np.log(np.exp(-0.5 * (z**2).sum(axis=2)).mean(axis=1) / np.prod(width) + 1e-300)
+
+    def propose(X, y):
+        finite = np.isfinite(y)
+        order = np.argsort(-np.where(finite, y, -np.inf), kind="stable")
+        n_good = max(1, math.ceil(gamma * finite.sum()))
+        good, bad = X[order[:n_good]], X[order[n_good:]]
+        if not len(bad):
+            return rng.random((0, X.shape[1]))
+        width = np.maximum(good.std(axis=0), 0.05)
+        draws = good[rng.integers(len(good), size=512)] + rng.normal(0.0, 1.0, (512, X.shape[1])) * width
+        draws = np.clip(draws, 0.0, 1.0)
+        ratio = density(good, draws) - density(bad, draws)
+        return draws[np.argsort(-ratio, kind="stable")]
+
+    _model_driver(propose, evaluate, space, n_trials, rng, n_startup, batch_size)
+
+
+def _gp_driver(evaluate, space, n_trials, rng, n_startup=None, batch_size=None, xi=0.01):
+    from scipy.stats import norm
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+    def propose(X, y):
+        finite = np.isfinite(y)
+        if finite.sum() < 2:
+            return rng.random((0, X.shape[1]))
+        kernel = ConstantKernel() * Matern(length_scale=np.full(X.shape[1], 0.2), nu=2.5) + WhiteKernel(1e-3)
+        gp = GaussianProcessRegressor(kernel, normalize_y=True, random_state=int(rng.integers(2**31)))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            gp.fit(X[finite], y[finite])
+        points = _candidates(X[finite], y[finite], rng)
+        mean, std = gp.predict(points, return_std=True)
+        gain = mean - y[finite].max() - xi * np.abs(y[finite].max())
+        z = gain / np.maximum(std, 1e-12)
+        improvement = gain * norm.cdf(z) + std * norm.pdf(z)
+        return points[np.argsort(-improvement, kind="stable")]
+
+    _model_driver(propose, evaluate, space, n_trials, rng, n_startup, batch_size)
+
+
+def _ga_driver(evaluate, space, n_trials, rng, pop_size=16, cx_prob=0.6, mut_prob=0.3, sigma=0.1):
+    d = len(space)
+    pop = rng.random((min(pop_size, n_trials), d))
+    fit = _rankable(evaluate([space.decode(u) for u in pop]))
+    used = len(pop)
+    while used < n_trials:
+        # Tournaments of 3, blend crossover of neighbours, Gaussian mutation
+        picks = rng.integers(len(pop), size=(len(pop), 3))
+        children = pop[picks[np.arange(len(pop)), np.argmax(fit[picks], axis=1)]].copy()
+        for i in range(0, len(children) - 1, 2):
+            if rng.random() < cx_prob:
+                a, b = children[i].copy(), children[i + 1].copy()
+                w = rng.uniform(-0.4, 1.4, d)
+                children[i], children[i + 1] = w * a + (1 - w) * b, w * b + (1 - w) * a
+        mutate = (rng.random(len(children)) < mut_prob)[:, None] & (rng.random(children.shape) < 0.2)
+        children = np.clip(children + mutate * rng.normal(0.0, sigma, children.shape), 0.0, 1.0)
+        children = children[: n_trials - used]
+        pop, fit = children, _rankable(evaluate([space.decode(u) for u in children]))
+        used += len(children)
+
+
+DRIVERS = {
+    "random": _random_driver,
+    "sobol": _sobol_driver,
+    "halving": _halving_driver,
+    "hyperband": _hyperband_driver,
+    "tpe": _tpe_driver,
+    "gp": _gp_driver,
+    "ga": _ga_driver,
+}
+
+
+# --------------------------------------------------------------------------
+# Entry point
+# --------------------------------------------------------------------------
+@dataclass
+class OptimizationResult:
+    """Best parameters of :func:`optimize` and every backtest it ran."""
+
+    params: dict
+    score: float
+    trials: pd.DataFrame  # one row per backtest: parameters, fidelity, score
+    stopped: str  # "completed" or "time_budget"
+
+    @property
+    def cost(self) -> float:
+        """Backtests run, in full-history equivalents."""
+        return float(self.trials["fidelity"].sum()) if len(self.trials) else 0.0
+
+
+def optimize(
+    strategy_spec,
+    space: dict,
+    objective="calmar",
+    driver: str = "random",
+    n_trials: int = 64,
+    prices: PricePanel | None = None,
+    n_workers: int | None = None,
+    seed: int | None = None,
+    time_budget: float | None = None,
+    **driver_options,
+) -> OptimizationResult:
+    """
+    Search `space` for the parameters of `strategy_spec` that maximise `objective`.
+
+    Parameters
+    ----------
+    strategy_spec : StrategySpec | callable
+        What to backtest.  A callable is called as ``fn(params, prices)`` and
+        returns the NAV (a Series, or anything with a ``nav`` attribute).
+    space : dict
+        Parameter name -> :class:`Real`, :class:`Integer`, :class:`Choice`,
+        ``(low, high)`` or list of options.
+    objective : str | callable
+        A name from ``OBJECTIVES`` or ``fn(nav) -> float``; higher is better.
+    driver : str
+        A name from ``DRIVERS``; `driver_options` are passed to it (``eta``
+        and ``min_fidelity`` for halving/hyperband, ``n_startup`` and
+        ``batch_size`` for tpe/gp, ``pop_size`` ... for ga).
+    n_trials : int
+        Candidates to try (for halving/hyperband, in the widest rung).
+    prices : PricePanel, optional
+        Aligned prices; default ``get_backtest_panel(symbols, start_date)``.
+    n_workers : int, optional
+        Processes of the pool (default half the cores); 1 runs in process.
+    time_budget : float, optional
+        Seconds after which no new batch is started.
+    """
+    if driver not in DRIVERS:
+        raise ValueError(f"driver must be one of {tuple(DRIVERS)}, got {driver!r}")
+    if isinstance(objective, str):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of {tuple(OBJECTIVES)} or a callable, got {objective!r}")
+        objective = OBJECTIVES[objective]
+    if isinstance(strategy_spec, StrategySpec):
+        from .cache import get_backtest_commission, get_backtest_panel
+
+        if prices is None:
+            prices = get_backtest_panel(strategy_spec.symbols, strategy_spec.start_date)
+        broker_kwargs = dict(strategy_spec.broker_kwargs or {})
+        if "commission" not in broker_kwargs:
+            # One estimate for every trial, instead of one per backtest
+            broker_kwargs["commission"] = get_backtest_commission(strategy_spec.symbols)
+        strategy_spec = replace(strategy_spec, broker_kwargs=broker_kwargs)
+    elif prices is None:
+        raise ValueError("prices is required when strategy_spec is a function")
+
+    space = _Space(space)
+    rng = np.random.default_rng(seed)
+    if n_workers is None:
+        n_workers = max(1, (os.cpu_count() or 2) // 2)
+    if driver in ("tpe", "gp"):
+        driver_options.setdefault("batch_size", n_workers)
+
+    evaluate = _Evaluator(strategy_spec, objective, prices, n_workers, time_budget)
+    stopped = "completed"
+    try:
+        DRIVERS[driver](evaluate, space, n_trials, rng, **driver_options)
+    except _OutOfTime:
+        stopped = "time_budget"
+    finally:
+        evaluate.close()
+
+    trials = pd.DataFrame(evaluate.trials, columns=space.names + ["fidelity", "score"])
+    if not len(trials):
+        return OptimizationResult({}, float("nan"), trials, stopped)
+    # Best on the longest history any trial reached (the full one unless stopped early)
+    top = trials[trials["fidelity"] == trials["fidelity"].max()]
+    best = top.iloc[int(np.argmax(_rankable(top["score"])))]
+    params = {name: evaluate.trials[best.name][name] for name in space.names}
+    return OptimizationResult(params, float(best["score"]), trials, stopped)
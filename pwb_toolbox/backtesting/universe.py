@@ -1,37 +1,87 @@
-from typing import List
+from typing import List, Optional
+import warnings
+
+import numpy as np
 import pandas as pd
 import pwb_toolbox.datasets as pwb_ds
 
 
-def get_most_liquid_symbols(n: int = 1_200) -> List[str]:
-    """Return the `n` most liquid stock symbols (volume × price on last bar)."""
-    df = pwb_ds.load_dataset("Stocks-Daily-Price", adjust=True, extend=True)
-    last_date = df["date"].max()
-    today = df[df["date"] == last_date].copy()
-    today["liquidity"] = today["volume"] * today["close"]
-    liquid = today.sort_values("liquidity", ascending=False)
-    return liquid["symbol"].tolist()[:n]
+def get_most_liquid_symbols(n: int = 1_200, as_of=None, window: int = 20) -> List[str]:
+    """Return the `n` most liquid stock symbols.
+
+    Symbols are ranked by their average dollar volume (unadjusted volume ×
+    unadjusted close, free of later splits and dividends) over the last
+    `window` bars, on the last trading day on or before `as_of` (default: the
+    latest one), using the precomputed liquidity index.  ``window=1`` ranks
+    on the last bar alone.
+    """
+    index = pwb_ds.get_liquidity_index(window=window)
+    return index.top(n, as_of=as_of)
+
+
+VOLATILITY_STATISTICS = ("max_abs_return", "realized_vol", "downside_vol")
+TRADING_DAYS = 252
+
 
+def volatility_statistic(
+    close: pd.DataFrame, statistic: str = "max_abs_return", window: Optional[int] = None
+) -> pd.Series:
+    """Per-symbol volatility statistic of a (dates × symbols) close matrix.
 
-def get_least_volatile_symbols(symbols=["sp500"], start="1990-01-01") -> List[str]:
+    ``"max_abs_return"`` is the largest absolute daily return,
+    ``"realized_vol"`` the annualised standard deviation of daily returns and
+    ``"downside_vol"`` the annualised root mean square of negative returns.
+    With ``window`` only the last ``window`` returns are used.
+    """
+    if statistic not in VOLATILITY_STATISTICS:
+        raise ValueError(f"statistic must be one of {VOLATILITY_STATISTICS}, got {statistic!r}")
+    values = close.to_numpy(dtype=np.float64)
+    returns = values[1:] / values[:-1] - 1.0
+    if window is not None:
+        returns = returns[-window:]
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        if statistic == "max_abs_return":
+            stat = np.nanmax(np.abs(returns), axis=0)
+        elif statistic == "realized_vol":
+            stat = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+        else:
+            downside = np.where(returns < 0, returns, np.where(np.isnan(returns), np.nan, 0.0))
+            stat = np.sqrt(np.nanmean(downside**2, axis=0)) * np.sqrt(TRADING_DAYS)
+    return pd.Series(stat, index=close.columns, name=statistic)
+
+
+def get_least_volatile_symbols(
+    symbols=["sp500"],
+    start="1990-01-01",
+    statistic: str = "max_abs_return",
+    threshold: Optional[float] = 3,
+    window: Optional[int] = None,
+    n: Optional[int] = None,
+) -> List[str]:
+    """Screen `symbols` on a volatility statistic of their daily closes.
+
+    Closes are aligned on business days (forward then backward filled) and
+    the statistic is computed for every symbol at once (see
+    :func:`volatility_statistic`).  Symbols whose statistic exceeds
+    `threshold` are dropped; the default drops any symbol with a daily move
+    above 300%.  With `n`, the `n` symbols with the lowest statistic are
+    returned, least volatile first; otherwise the kept symbols are returned
+    in alphabetical order.
+    """
     pivot = pwb_ds.get_pricing(
         symbol_list=symbols,
-        fields=["open", "high", "low", "close"],
+        fields=["close"],
         start_date=start,
         extend=True,
     )
-    td = pd.bdate_range(pivot.index.min(), pivot.index.max())
-    pivot = pivot.reindex(td).ffill().bfill()
-    symbols = []
-    for sym in pivot.columns.levels[0]:
-        df = (
-            pivot[sym]
-            .copy()
-            .reset_index()
-            .rename(columns={"index": "date"})
-            .set_index("date")
-        )
-        if df.close.pct_change().abs().max() > 3:  # same volatility filter
-            continue
-        symbols.append(sym)
-    return symbols
+    close = pivot.xs("close", axis=1, level=1)
+    td = pd.bdate_range(close.index.min(), close.index.max())
+    close = close.reindex(td).ffill().bfill()
+
+    stat = volatility_statistic(close, statistic, window)
+    if threshold is not None:
+        stat = stat[~(stat > threshold)]
+    if n is not None:
+        return stat.sort_values(kind="stable").index[:n].tolist()
+    return sorted(stat.index)
@@ -0,0 +1,511 @@
+"""Vectorised weights-to-NAV backtests.
+
+:func:`run_vectorized` simulates a portfolio from a date × symbol matrix of
+target weights with NumPy array operations, instead of running Backtrader
+with one feed per symbol.  The weight builders below turn per-bar signal
+frames into the target weights of the portfolio templates of
+:mod:`pwb_toolbox.backtesting.strategies`::
+
+    import pwb_toolbox.backtesting as pwb_bt
+    import pwb_toolbox.datasets as pwb_ds
+
+    panel = pwb_ds.get_price_panel(symbols, fields=["open", "close"], start_date="2015-01-01")
+
+    def weights(panel):
+        close = panel.field_frame("close")
+        return pwb_bt.equal_weight_weights(close > close.rolling(50).mean())
+
+    result = pwb_bt.run_vectorized(weights, panel, costs=0.0005)
+    result.nav
+
+Execution follows Backtrader: a weight decided at the close of a bar is
+sized with that close and the NAV at that close, and filled at the next
+open (``execution="open"``, the default) or at the same close
+(``execution="close"``, Backtrader's ``set_coc(True)``).  The orders of a
+bar are checked against the cash left in the order the strategy places
+them, and the ones Backtrader would reject for lack of cash are dropped
+(see :func:`_funded`).
+
+With ``whole_shares=True`` the NAV equals ``run_strategy``'s to floating
+point rounding (``tests/test_vectorized.py`` holds it to 1e-9).  The one
+difference is a reporting lag with ``execution="close"``: Backtrader logs
+the value of a bar before charging the commission of the orders filled at
+its close, so its NAV is ``result.nav + result.costs``.  Fractional shares
+(the default) drift from it by the whole-share rounding, within 4% at the
+templates' default 0.9 leverage.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from ..datasets.panel import PricePanel
+
+
+EXECUTIONS = ("open", "close")
+ORDERS = ("symbols", "sells_first")
+
+
+@dataclass
+class VectorizedResult:
+    """Output of :func:`run_vectorized`, indexed by date."""
+
+    nav: pd.Series  # portfolio value at each close
+    turnover: pd.Series  # traded notional / NAV before the trades
+    costs: pd.Series  # transaction costs paid
+    holdings: np.ndarray = field(repr=False)  # shares after each fill, row 0 = start
+    segment: np.ndarray = field(repr=False)  # row of `holdings` held at each close
+    close: np.ndarray = field(repr=False)  # (dates, symbols) marking prices
+    symbols: pd.Index = field(repr=False)
+
+    @property
+    def positions(self) -> pd.DataFrame:
+        """Shares held at each close."""
+        return pd.DataFrame(self.holdings[self.segment], index=self.nav.index, columns=self.symbols, copy=False)
+
+    @property
+    def weights(self) -> pd.DataFrame:
+        """Position value / NAV at each close."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            held = self.holdings[self.segment] * self.close / self.nav.to_numpy()[:, None]
+        return pd.DataFrame(held, index=self.nav.index, columns=self.symbols, copy=False)
+
+
+def align_panel(panel) -> PricePanel:
+    """
+    Prices on every business day between the first and last date, with gaps
+    forward-filled and leading IPO gaps back-filled, as in ``run_strategy``.
+
+    `panel` is a :class:`PricePanel`, a ``get_pricing`` frame with
+    (symbol, field) columns, or a dates × symbols frame of closes.
+    """
+    panel = _as_panel(panel)
+    if not len(panel.dates) or (_is_bday_range(panel.dates) and not np.isnan(panel.values).any()):
+        return panel
+    return panel.reindex_dates(pd.bdate_range(panel.dates.min(), panel.dates.max()), ffill=True, bfill=True)
+
+
+def _is_bday_range(dates) -> bool:
+    """Whether `dates` are consecutive business days (Friday -> Monday is the only gap)."""
+    days = dates.values.astype("datetime64[D]")
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    step = np.diff(days).astype(np.int64)
+    return bool((weekday < 5).all() and (step == np.where(weekday[:-1] == 4, 3, 1)).all())
+
+
+def _as_panel(panel) -> PricePanel:
+    if isinstance(panel, PricePanel):
+        return panel
+    if isinstance(panel, pd.DataFrame) and isinstance(panel.columns, pd.MultiIndex):
+        return PricePanel.from_frame(panel)
+    if isinstance(panel, pd.DataFrame):
+        values = panel.to_numpy(dtype=np.float64)[:, :, None]
+        return PricePanel(values, pd.to_datetime(panel.index), panel.columns, ["close"])
+    raise TypeError(f"Expected a PricePanel or a DataFrame, got {type(panel).__name__}")
+
+
+def _rebalance_rows(has_weights, dates, rebalance):
+    """Boolean mask of the dates on which the portfolio is rebalanced."""
+    if rebalance is None:
+        return has_weights
+    if isinstance(rebalance, str):
+        periods = dates.to_period(rebalance)
+        mask = np.ones(len(dates), dtype=bool)
+        mask[1:] = periods[1:] != periods[:-1]
+    else:
+        rebalance = np.asarray(rebalance)
+        if rebalance.dtype == bool:
+            if len(rebalance) != len(dates):
+                raise ValueError("A boolean rebalance mask needs one value per date")
+            mask = rebalance
+        else:
+            mask = dates.isin(pd.to_datetime(rebalance))
+    # Rebalance to the latest weights known on each date
+    return mask & (np.maximum.accumulate(np.where(has_weights, 1, 0)) > 0)
+
+
+def run_vectorized(
+    weights,
+    panel,
+    costs=0.0,
+    rebalance=None,
+    execution="open",
+    cash=1.0,
+    align=True,
+    reject_unfunded=True,
+    order="symbols",
+    whole_shares=False,
+) -> VectorizedResult:
+    """
+    Backtest target weights on a price panel with array operations.
+
+    Parameters
+    ----------
+    weights : pd.DataFrame | callable
+        Dates × symbols target weights (fractions of NAV, negative for
+        shorts), or a function of the aligned :class:`PricePanel` returning
+        them.  A row with only NaNs means "no rebalance"; in other rows a
+        missing symbol has weight 0.
+    panel : PricePanel | pd.DataFrame
+        Prices with a ``close`` field, and ``open`` for
+        ``execution="open"``: a :class:`PricePanel`, a ``get_pricing`` frame
+        or a frame of closes.
+    costs : float | dict | pd.Series
+        Proportional transaction cost (e.g. ``0.0005`` = 5 bp of the traded
+        notional), like the ``commission`` of ``run_strategy``; per symbol
+        with a dict or Series.
+    rebalance : None | str | array-like
+        ``None`` rebalances on every row of `weights`; a pandas frequency
+        (``"W"``, ``"M"``, ``"Q"``, ...) on the first date of each period; an
+        array of dates or a boolean mask on those dates.  Each rebalance uses
+        the latest weights known on that date.
+    execution : {"open", "close"}
+        Fill at the next open or at the close of the decision bar.
+    cash : float
+        Starting NAV.
+    align : bool
+        Reindex the prices with :func:`align_panel` first, as ``run_strategy``
+        does.
+    reject_unfunded : bool
+        Drop the orders Backtrader rejects for lack of cash (see
+        :func:`_funded`).  ``False`` fills every order.
+    order : {"symbols", "sells_first"}
+        Order in which the orders of a rebalance are placed, which decides
+        the ones rejected: column order, as the templates looping over their
+        feeds, or sells first, as ``MonthlyRankedEqualWeightPortfolio``.
+    whole_shares : bool
+        Round each order towards zero to whole shares, as
+        ``order_target_percent`` does; meaningful with a realistic `cash`.
+    """
+    if execution not in EXECUTIONS:
+        raise ValueError(f"execution must be one of {EXECUTIONS}, got {execution!r}")
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}, got {order!r}")
+    panel = align_panel(panel) if align else _as_panel(panel)
+    if callable(weights):
+        weights = weights(panel)
+    dates, symbols = panel.dates, panel.symbols
+    n_dates, n_symbols = len(dates), len(symbols)
+
+    if not isinstance(weights.index, pd.DatetimeIndex):
+        weights = weights.set_axis(pd.to_datetime(weights.index), axis=0)
+    weights = weights.reindex(index=dates, columns=symbols)
+    target = weights.to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(_rebalance_rows(~np.isnan(target).all(axis=1), dates, rebalance))
+    # Latest row with weights on each rebalance date
+    source = np.maximum.accumulate(np.where(~np.isnan(target).all(axis=1), np.arange(n_dates), 0))
+    target = target[source[rows]]
+    target[np.isnan(target)] = 0.0
+
+    close = np.asarray(panel.field("close"), dtype=np.float64)
+    if not np.isfinite(close).all():
+        close = np.where(np.isfinite(close), close, 0.0)  # unpriced symbols cannot be held
+    if execution == "open":
+        if "open" not in panel.fields:
+            raise ValueError('execution="open" needs an "open" field in the panel')
+        fill_rows = rows + 1
+        keep = fill_rows < n_dates
+        rows, fill_rows, target = rows[keep], fill_rows[keep], target[keep]
+        prices = np.asarray(panel.field("open"), dtype=np.float64)[fill_rows]
+        prices = np.where(np.isfinite(prices), prices, close[fill_rows])
+    else:
+        fill_rows = rows
+        prices = close[rows]
+
+    if isinstance(costs, (dict, pd.Series)):
+        rate = pd.Series(costs, dtype=np.float64).reindex(symbols).fillna(0.0).to_numpy()
+    else:
+        rate = np.full(n_symbols, float(costs))
+
+    # Sequential part: one step per rebalance, vectorised over symbols.
+    # Everything that does not depend on the NAV is gathered up front.
+    marks = close[rows]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_nav = np.where(marks > 0, target / marks, 0.0)  # shares per unit of NAV
+    fees = prices * rate
+    holdings = np.zeros((len(rows) + 1, n_symbols))
+    balances = np.empty(len(rows) + 1)
+    traded = np.zeros(len(rows))
+    paid = np.zeros(len(rows))
+    shares, balance = holdings[0], float(cash)
+    balances[0] = balance
+    for k in range(len(rows)):
+        value = balance + shares.dot(marks[k])
+        before = balance + shares.dot(prices[k])
+        change = value * per_nav[k] - shares
+        if whole_shares:
+            change = np.trunc(change)
+        if reject_unfunded:
+            change = _funded(change, shares, balance, marks[k], prices[k], rate, order == "sells_first")
+        size = np.abs(change)
+        paid[k] = fee = size.dot(fees[k])
+        traded[k] = size.dot(prices[k]) / before if before else 0.0
+        balance = balance - change.dot(prices[k]) - fee
+        shares = holdings[k + 1] = shares + change
+        balances[k + 1] = balance
+
+    # Holdings are constant between fills: mark them to market in one pass,
+    # or stretch by stretch when there are few fills.
+    segment = np.searchsorted(fill_rows, np.arange(n_dates), side="right")
+    if len(rows) > n_dates // 16:
+        nav = balances[segment] + np.einsum("tn,tn->t", holdings[segment], close)
+    else:
+        bounds = np.concatenate([[0], fill_rows, [n_dates]])
+        nav = np.empty(n_dates)
+        for k in range(len(bounds) - 1):
+            lo, hi = bounds[k], bounds[k + 1]
+            nav[lo:hi] = balances[k] + close[lo:hi] @ holdings[k]
+
+    turnover = np.zeros(n_dates)
+    turnover[fill_rows] = traded
+    cost = np.zeros(n_dates)
+    cost[fill_rows] = paid
+    return VectorizedResult(
+        nav=pd.Series(nav, index=dates, name="nav"),
+        turnover=pd.Series(turnover, index=dates, name="turnover"),
+        costs=pd.Series(cost, index=dates, name="costs"),
+        holdings=holdings,
+        segment=segment,
+        close=close,
+        symbols=symbols,
+    )
+
+
+def _funded(change, shares, balance, marks, prices, rate, sells_first=False):
+    """
+    `change` (shares per symbol) without the orders Backtrader rejects.
+
+    Backtrader checks the orders of a bar twice, in the order they were
+    placed.  When they are submitted, each one is pseudo-executed at the
+    decision close against the cash left by the previous ones, and rejected
+    if that cash turns negative; a rejected order's cost is not given back,
+    so every later order is rejected too until sells bring the cash back
+    above zero.  When they fill, the part of each order that opens or adds
+    to a position is dropped if the cash at the fill price cannot pay for
+    it, and the part that reduces a position always fills.
+    """
+    placed = np.flatnonzero(change)
+    if sells_first:
+        placed = placed[np.argsort(change[placed] > 0, kind="stable")]
+    cost = change[placed] * marks[placed]
+    accepted = placed[balance - np.cumsum(cost + np.abs(cost) * rate[placed]) >= 0]
+
+    reducing = np.where(change * shares < 0, np.sign(change) * np.minimum(np.abs(change), np.abs(shares)), 0.0)
+    adding = change - reducing
+    funded = np.zeros_like(change)
+    funded[accepted] = change[accepted]
+    # Cash after each accepted order, were they all filled
+    cost = funded[accepted] * prices[accepted]
+    cash = balance - np.cumsum(cost + np.abs(cost) * rate[accepted])
+    if (cash[adding[accepted] != 0] >= 0).all():
+        return funded
+    cash = balance
+    for j in accepted:
+        cost = reducing[j] * prices[j]
+        cash -= cost + abs(cost) * rate[j]
+        cost = adding[j] * prices[j]
+        left = cash - cost - abs(cost) * rate[j]
+        if adding[j] and left < 0:
+            funded[j] = reducing[j]
+        else:
+            cash = left
+    return funded
+
+
+# --------------------------------------------------------------------------
+# Weight builders: signal frames -> target weights of the strategy templates
+# --------------------------------------------------------------------------
+def tradable(close: pd.DataFrame) -> pd.DataFrame:
+    """``BaseStrategy.is_tradable`` on a frame of closes: the close moved over two bars."""
+    moved = close.ne(close.shift(2))
+    moved.iloc[:2] = False
+    return moved
+
+
+def _ready_row(signal: pd.DataFrame) -> int:
+    """First row on which every symbol has a signal, i.e. Backtrader's first ``next()``."""
+    ready = signal.notna().all(axis=1).to_numpy()
+    return int(ready.argmax()) if ready.any() else len(ready)
+
+
+def _period_starts(signal: pd.DataFrame, freq: str) -> np.ndarray:
+    """Rows of the first bar of each period, from the first ready row on."""
+    start = _ready_row(signal)
+    periods = pd.DatetimeIndex(signal.index).to_period(freq)
+    mask = np.zeros(len(signal), dtype=bool)
+    if start < len(signal):
+        mask[start] = True
+        mask[start + 1 :] = periods[start + 1 :] != periods[start:-1]
+    return mask
+
+
+def _tradable_mask(signal, close, rows):
+    """`tradable` on the given rows only, aligned with `signal`."""
+    if close is None:
+        return np.ones((len(rows), signal.shape[1]), dtype=bool)
+    values = close.reindex(index=signal.index, columns=signal.columns).to_numpy(dtype=np.float64)
+    moved = values[rows] != values[np.maximum(rows - 2, 0)]
+    moved[rows < 2] = False
+    return moved
+
+
+def _frame(values, signal, rows):
+    """Weights frame holding `values` on `rows` and NaN (no rebalance) elsewhere."""
+    out = np.full(signal.shape, np.nan)
+    out[rows] = values
+    return pd.DataFrame(out, index=signal.index, columns=signal.columns)
+
+
+def _ranks(score, valid):
+    """Rank of each cell in its row, highest score first; ties keep the column order."""
+    key = np.where(valid, -score, np.inf)
+    order = np.argsort(key, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(score.shape[1])[None, :], axis=1)
+    return ranks
+
+
+def _equal(selected, leverage):
+    """`leverage` split equally over the selected cells of each row."""
+    n = selected.sum(axis=1, keepdims=True)
+    return np.where(selected, leverage / np.maximum(n, 1), 0.0)
+
+
+def equal_weight_weights(signal: pd.DataFrame, leverage: float = 0.9) -> pd.DataFrame:
+    """``DailyEqualWeightPortfolio``: `leverage` split over the signal == 1 symbols, every day."""
+    rows = np.arange(_ready_row(signal), len(signal))
+    return _frame(_equal(signal.to_numpy()[rows] == 1, leverage), signal, rows)
+
+
+def fixed_leverage_weights(signal: pd.DataFrame, leverage: float = 0.9) -> pd.DataFrame:
+    """``DailyLeveragePortfolio``: `leverage` in each signal == 1 symbol (run with ``execution="close"``)."""
+    rows = np.arange(_ready_row(signal), len(signal))
+    return _frame(np.where(signal.to_numpy()[rows] == 1, leverage, 0.0), signal, rows)
+
+
+def dynamic_equal_weights(
+    signal: pd.DataFrame, leverage: float = 0.9, close=None, trigger_on_any_change: bool = False
+) -> pd.DataFrame:
+    """``DynamicEqualWeightPortfolio``: equal weights, rebalanced when the long set (or any signal) changes."""
+    rows = np.arange(_ready_row(signal), len(signal))
+    raw = signal.to_numpy()[rows]
+    longs = (raw == 1) & _tradable_mask(signal, close, rows)
+    if trigger_on_any_change:
+        codes = np.trunc(raw)
+        changed = np.ones(len(rows), dtype=bool)
+        changed[1:] = (codes[1:] != codes[:-1]).any(axis=1)
+    else:
+        previous = np.vstack([np.zeros((1, longs.shape[1]), dtype=bool), longs[:-1]])
+        changed = (longs != previous).any(axis=1)
+    return _frame(_equal(longs[changed], leverage), signal, rows[changed])
+
+
+def ranked_equal_weights(
+    score: pd.DataFrame,
+    num_selection: int | None = None,
+    leverage: float = 0.9,
+    filter_nonpositive: bool = False,
+    close=None,
+    freq: str = "M",
+) -> pd.DataFrame:
+    """
+    ``MonthlyRankedEqualWeightPortfolio`` with ``reweight_existing=True``.
+
+    On the first bar of each `freq` period, holds the tradable symbols whose
+    `score` == 1 (no `num_selection`) or the `num_selection` highest scores,
+    in equal weights.
+    """
+    rows = np.flatnonzero(_period_starts(score, freq))
+    values = score.to_numpy(dtype=np.float64)[rows]
+    ok = _tradable_mask(score, close, rows)
+    if not num_selection:
+        keep = ok & (values == 1)
+    else:
+        values[np.isnan(values)] = -np.inf
+        if filter_nonpositive:
+            values[values <= 0] = -np.inf
+        keep = ok & (_ranks(values, ok) < num_selection)
+    return _frame(_equal(keep, leverage), score, rows)
+
+
+def long_short_quantile_weights(
+    signal: pd.DataFrame, leverage: float = 0.9, close=None, freq: str = "M"
+) -> pd.DataFrame:
+    """
+    ``MonthlyLongShortQuantilePortfolio``: +/- `leverage` / n on signals of +1/-1.
+
+    The template rebalances from a ``SESSION_START`` timer on the first bar
+    of each month.  The timer runs before the indicators see that bar, so
+    the weights of a month start come from the signals of the bar before it.
+    """
+    periods = pd.DatetimeIndex(signal.index).to_period(freq)
+    first = np.zeros(len(signal), dtype=bool)
+    first[1:] = periods[1:] != periods[:-1]
+    rows = np.flatnonzero(first & (np.arange(len(signal)) > _ready_row(signal)))
+    raw = signal.to_numpy()[rows - 1]
+    ok = _tradable_mask(signal, close, rows)
+    n = (((raw == 1) | (raw == -1)) & ok).sum(axis=1, keepdims=True)
+    weight = leverage / np.maximum(n, 1)
+    values = np.where(raw == 1, weight, np.where(raw == -1, -weight, 0.0))
+    values[n[:, 0] == 0] = 0.0
+    return _frame(values, signal, rows)
+
+
+def long_short_decile_weights(
+    signal: pd.DataFrame,
+    decile_fraction: float = 0.10,
+    leverage: float = 0.9,
+    close=None,
+    rebalance_weekday: int = 0,
+    min_assets: int = 10,
+) -> pd.DataFrame:
+    """
+    ``WeeklyLongShortDecilePortfolio`` (run with ``execution="close"``).
+
+    Every `rebalance_weekday`, shorts the top `decile_fraction` of the
+    signals and buys the bottom one, `leverage` split equally over both
+    legs; flat when fewer than `min_assets` symbols are tradable.
+    """
+    weekday = pd.DatetimeIndex(signal.index).weekday == rebalance_weekday
+    rows = np.flatnonzero(weekday & (np.arange(len(signal)) >= _ready_row(signal)))
+    values = signal.to_numpy(dtype=np.float64)[rows]
+    ok = _tradable_mask(signal, close, rows) & ~np.isnan(values)
+    n = ok.sum(axis=1)
+    size = np.maximum(1, (n * decile_fraction).astype(int))[:, None]
+    ranks = _ranks(values, ok)
+    longs = ok & (ranks >= n[:, None] - size)
+    shorts = ok & (ranks < size) & ~longs
+    weight = leverage / np.maximum(longs.sum(axis=1) + shorts.sum(axis=1), 1)[:, None]
+    out = np.where(longs, weight, np.where(shorts, -weight, 0.0))
+    out[n < min_assets] = 0.0
+    return _frame(out, signal, rows)
+
+
+def top_momentum_weights(score: pd.DataFrame, leverage: float = 0.9, close=None) -> pd.DataFrame:
+    """
+    ``QuarterlyTopMomentumPortfolio``: `leverage` in the single highest
+    tradable score on the first bar of March, June, September and December;
+    cash on a tie.  Only trades when the winner changes.
+    """
+    starts = _period_starts(score, "M") & (pd.DatetimeIndex(score.index).month % 3 == 0)
+    rows = np.flatnonzero(starts)
+    values = score.to_numpy(dtype=np.float64)[rows]
+    candidates = np.where(_tradable_mask(score, close, rows) & ~np.isnan(values), values, -np.inf)
+    changes, out = [], []
+    current = None
+    for k, row in enumerate(candidates):
+        best = row.max() if len(row) else -np.inf
+        winners = np.flatnonzero(row == best) if best > -np.inf else []
+        winner = int(winners[0]) if len(winners) == 1 else None
+        if winner == current:
+            continue
+        current = winner
+        weights = np.zeros(len(row))
+        if winner is not None:
+            weights[winner] = leverage
+        changes.append(rows[k])
+        out.append(weights)
+    return _frame(np.array(out).reshape(len(out), score.shape[1]), score, np.array(changes, dtype=int))
@@ -1,13 +1,37 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from datetime import date
+import hashlib
+import json
+import logging
 import os
+from pathlib import Path
 import re
+import shutil
+import threading
+import time
+import uuid
 
-import datasets as ds
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
 import requests
-from tqdm import tqdm
+
+from .backends import BACKENDS, get_backend
+from .cache import DatasetCache, clear_cache, get_cache_dir, merge_tables, symbol_chunks
+from .download import MAX_DOWNLOAD_WORKERS, download_files, shared_session
+from .lake import Lake, get_lake_dir, open_lake
+from .liquidity import LiquidityIndex
+from .panel import PricePanel
+from . import synthetic
+
+
+logger = logging.getLogger(__name__)
 
 
 def _get_hf_token() -> str:
@@ -21,22 +45,276 @@ def _get_pwb_api_key() -> str | None:
     return os.getenv("PWB_API_KEY")
 
 
-def _load_dataset_from_pwb(dataset_name: str, split: str, pwb_api_key: str):
+def _pwb_listing(dataset_name: str, split: str, pwb_api_key: str) -> tuple[list[str], dict[str, str]]:
+    """Return the PWB file URLs of a dataset and the tags the listing carries.
+
+    Entries of the listing are either plain URLs or objects with a ``url``
+    and its ``etag`` (or ``size``); the tags of the latter are returned keyed
+    by the URL without its query string.
+    """
     base_url = "https://paperswithbacktest.com/api/v1/datasets"
     resp = requests.get(f"{base_url}/{dataset_name}", params={"pwb_api_key": pwb_api_key, "split": split}, timeout=30)
     resp.raise_for_status()
-    files = resp.json().get("files", [])
+    files, tags = [], {}
+    for entry in resp.json().get("files", []):
+        if isinstance(entry, dict):
+            url = entry["url"]
+            tag = entry.get("etag") or entry.get("ETag") or entry.get("size")
+            if tag:
+                tags[_strip_query(url)] = str(tag)
+        else:
+            url = entry
+        files.append(url)
     if not files:
         raise ValueError(f"No files available for dataset '{dataset_name}' and split '{split}'")
+    return files, tags
+
+
+def _list_pwb_files(dataset_name: str, split: str, pwb_api_key: str) -> list[str]:
+    return _pwb_listing(dataset_name, split, pwb_api_key)[0]
+
+
+def _strip_query(url: str) -> str:
+    """Drop the (possibly signed, hence changing) query string of a URL."""
+    return url.split("?", 1)[0]
+
+
+def _head_tag(session: requests.Session, url: str) -> str | None:
+    try:
+        resp = session.head(url, allow_redirects=True, timeout=30)
+        resp.raise_for_status()
+    except requests.RequestException:
+        return None  # HEAD is often refused (403) on presigned GET URLs
+    return resp.headers.get("ETag") or resp.headers.get("Last-Modified") or resp.headers.get("Content-Length") or None
+
+
+def _pwb_file_tags(files: list[str], known: dict[str, str] | None = None) -> dict[str, str | None]:
+    """Map every PWB file (without its query string) to its ETag.
+
+    Tags already given by the listing (`known`) are kept; the others are
+    fetched with concurrent HEAD requests on the shared download session.
+    A file whose tag cannot be obtained maps to ``None``.
+    """
+    known = known or {}
+    tags = {_strip_query(url): known.get(_strip_query(url)) for url in files}
+    missing = [url for url in files if tags[_strip_query(url)] is None]
+    if missing:
+        session = shared_session()
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(missing))) as pool:
+            for url, tag in zip(missing, pool.map(partial(_head_tag, session), missing)):
+                tags[_strip_query(url)] = tag
+    return tags
+
+
+def _tags_fingerprint(tags: dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(tags):
+        digest.update(f"{name}\0{tags[name] or ''}\n".encode())
+    return digest.hexdigest()
+
+
+def _pwb_fingerprint(files: list[str]) -> str:
+    """Hash the PWB file list together with the ETag of every file."""
+    return _tags_fingerprint(_pwb_file_tags(files))
+
+
+def _hf_fingerprint(path: str, hf_token: str) -> str:
+    """Return the commit sha of the Hugging Face dataset repository."""
+    from huggingface_hub import HfApi
+
+    info = HfApi().dataset_info(f"paperswithbacktest/{path}", token=hf_token)
+    return f"hf:{info.sha}"
+
+
+def _hf_file_tags(path: str, split: str, hf_token: str) -> tuple[str, dict[str, str]]:
+    """Return the repository sha and the blob id of each parquet file of `split`."""
+    from huggingface_hub import HfApi
+
+    info = HfApi().dataset_info(f"paperswithbacktest/{path}", token=hf_token, files_metadata=True)
+    split_file = re.compile(rf"(^|/){re.escape(split)}([-_./]|$)")
+    tags = {
+        sibling.rfilename: sibling.lfs.sha256 if sibling.lfs else sibling.blob_id
+        for sibling in info.siblings or []
+        if sibling.rfilename.endswith(".parquet") and split_file.search(sibling.rfilename)
+    }
+    return info.sha, tags
+
+
+def _download_dir(dataset_name: str, split: str) -> Path:
+    return get_cache_dir() / ".downloads" / dataset_name / split
+
+
+def _load_dataset_from_pwb(
+    dataset_name: str,
+    split: str,
+    pwb_api_key: str,
+    files: list[str] | None = None,
+    tags: dict[str, str] | None = None,
+) -> pa.Table:
+    """Download the PWB parquet files of a dataset and return their rows.
+
+    Files are fetched by :func:`download.download_files`: concurrently,
+    resumed after interruptions and verified.  They stay in the download
+    directory until the cache has been written (see `_fetch_cached_files`),
+    so a failed run only fetches what is still missing.  The directory is
+    then deleted, so the next full download starts from scratch.
+    """
+    if files is None:
+        files = _list_pwb_files(dataset_name, split, pwb_api_key)
 
     print(f"Downloading {len(files)} parquet files from PWB...")
-    return ds.load_dataset(
-        "parquet", 
-        data_files={split: files}, 
-        split=split, 
-        download_mode="force_redownload", 
-        verification_mode="no_checks",
+    paths = download_files(
+        files, _download_dir(dataset_name, split), tags=tags, session=shared_session(), progress=False
+    )
+    return pa.concat_tables([pq.read_table(path) for path in paths], promote_options="default")
+
+
+def _load_files_from_hf(path: str, filenames: list[str], revision: str, hf_token: str) -> pa.Table:
+    from huggingface_hub import hf_hub_download
+
+    print(f"Downloading {len(filenames)} parquet files from Hugging Face...")
+    tables = [
+        pq.read_table(
+            hf_hub_download(
+                f"paperswithbacktest/{path}",
+                filename,
+                repo_type="dataset",
+                revision=revision,
+                token=hf_token,
+            )
+        )
+        for filename in filenames
+    ]
+    return pa.concat_tables(tables, promote_options="default")
+
+
+_download_locks = defaultdict(threading.Lock)
+_download_locks_guard = threading.Lock()
+
+
+def _get_cached_files(
+    path: str, split: str, use_hf: bool = False, refresh: bool = False, incremental: bool = False
+) -> list[Path]:
+    """Return the local parquet files of `path`, downloading them if stale.
+
+    The remote file list (PWB) or repository revision (HF) is fingerprinted
+    and compared with the cached entry.  If the remote cannot be reached, the
+    last cached copy is used instead.  Threads asking for the same dataset
+    wait for a single download.
+
+    With `incremental`, a stale entry is updated by downloading only the
+    remote files whose tag changed since the last download.
+    """
+    with _download_locks_guard:
+        lock = _download_locks[(path, split)]
+    with lock:
+        return _fetch_cached_files(path, split, use_hf=use_hf, refresh=refresh, incremental=incremental)
+
+
+def _changed_files(meta: dict | None, source: str, tags: dict[str, str] | None) -> list[str] | None:
+    """Remote files to download to bring a cached entry up to date.
+
+    Returns ``None`` when the entry cannot be updated in place: no previous
+    manifest, another source, files removed remotely, or rows that cannot be
+    keyed by symbol and date.
+    """
+    if meta is None or not tags or meta.get("source") != source or not meta.get("files"):
+        return None
+    if not {"symbol", "date"} <= set(meta.get("columns", [])):
+        return None
+    if not set(meta["files"]) <= set(tags):
+        return None
+    return [name for name in sorted(tags) if meta["files"].get(name) != tags[name]]
+
+
+def _same_files(meta: dict | None, tags: dict[str, str | None]) -> bool:
+    """Whether a cached entry holds the remote files, as far as their tags tell.
+
+    The cached and remote file names must be the same, and every known
+    remote tag must equal the cached one; unknown (``None``) tags match.
+    """
+    stored = (meta or {}).get("files")
+    if not stored or set(stored) != set(tags):
+        return False
+    return all(tag is None or stored[name] == tag for name, tag in tags.items())
+
+
+def _fetch_cached_files(
+    path: str, split: str, use_hf: bool = False, refresh: bool = False, incremental: bool = False
+) -> list[Path]:
+    cache = DatasetCache()
+    pwb_api_key = _get_pwb_api_key()
+    use_pwb = bool(pwb_api_key) and not use_hf
+    hf_token = None if use_pwb else os.getenv("HF_ACCESS_TOKEN")
+    if not use_pwb and not hf_token:
+        raise ValueError("Set PWB_API_KEY or HF_ACCESS_TOKEN to load datasets.")
+    source = "pwb" if use_pwb else "hf"
+
+    files = tags = revision = None
+    try:
+        if use_pwb:
+            files, tags = _pwb_listing(path, split, pwb_api_key)
+            tags = _pwb_file_tags(files, tags)
+            fingerprint = _tags_fingerprint(tags)
+        elif incremental:
+            revision, tags = _hf_file_tags(path, split, hf_token)
+            fingerprint = f"hf:{revision}"
+        else:
+            fingerprint = _hf_fingerprint(path, hf_token)
+    except ValueError:
+        raise
+    except Exception as exc:
+        cached = cache.get(path, split)
+        if cached is None:
+            raise
+        print(f"Warning: could not reach the remote for '{path}' ({exc}); using cached copy.")
+        return cached
+
+    if not refresh:
+        cached = cache.get(path, split, fingerprint)
+        if cached is not None:
+            return cached
+        if tags is not None and None in tags.values() and _same_files(cache.read_meta(path, split), tags):
+            # Some tags are unknown, so those files' staleness cannot be
+            # told: keep the cached copy while it holds the same files and
+            # the known tags match, rather than downloading every file again.
+            cached = cache.get(path, split)
+            if cached is not None:
+                return cached
+
+    if incremental and not refresh:
+        changed = _changed_files(cache.read_meta(path, split), source, tags)
+        if changed is not None:
+            print(f"Updating {len(changed)} of {len(tags)} parquet files of '{path}'...")
+            table = None
+            if changed and use_pwb:
+                urls = [url for url in files if _strip_query(url) in set(changed)]
+                table = _load_dataset_from_pwb(path, split=split, pwb_api_key=pwb_api_key, files=urls, tags=tags)
+            elif changed:
+                table = _load_files_from_hf(path, changed, revision, hf_token)
+            cached = cache.append(path, split, fingerprint, table, files=tags)
+            shutil.rmtree(_download_dir(path, split), ignore_errors=True)
+            return cached
+
+    if use_pwb:
+        table = _load_dataset_from_pwb(path, split=split, pwb_api_key=pwb_api_key, files=files, tags=tags)
+    else:
+        import datasets as ds  # slow to import: only when actually needed
+
+        dataset = ds.load_dataset(f"paperswithbacktest/{path}", token=hf_token)
+        dataset = dataset[split] if isinstance(dataset, ds.DatasetDict) else dataset
+        table = dataset.data.table
+    cached = cache.put(
+        path,
+        split,
+        fingerprint,
+        table,
+        source=source,
+        files=tags,
+        columns=table.column_names,
     )
+    shutil.rmtree(_download_dir(path, split), ignore_errors=True)
+    return cached
 
 
 DAILY_PRICE_DATASETS = [
@@ -557,49 +835,184 @@ SP500_SYMBOLS = [
 ]
 
 
-def load_dataset(
+DATA_SOURCES = ("remote", "synthetic")
+
+
+def _data_source(source=None) -> str:
+    """`source`, else ``PWB_DATA_SOURCE``, else ``"remote"``."""
+    source = source or os.getenv("PWB_DATA_SOURCE") or "remote"
+    if source not in DATA_SOURCES:
+        raise ValueError(f"source must be one of {DATA_SOURCES}, got {source!r}")
+    return source
+
+
+def _pushdown_filter(schema, symbols=None, start_date=None, end_date=None):
+    """Build a pyarrow filter expression for the requested symbols and dates.
+
+    Returns ``None`` when nothing can be pushed down.  The date bounds are only
+    pushed down when the cached ``date`` column is a proper date type.
+    """
+    expressions = []
+    if isinstance(symbols, list) and "symbol" in schema.names:
+        expressions.append(pc.field("symbol").isin(symbols))
+    if "date" in schema.names and pa.types.is_date32(schema.field("date").type):
+        if start_date is not None:
+            start = pa.scalar(pd.Timestamp(start_date).date(), pa.date32())
+            expressions.append(pc.field("date") >= start)
+        if end_date is not None:
+            end = pa.scalar(pd.Timestamp(end_date).date(), pa.date32())
+            expressions.append(pc.field("date") <= end)
+    if not expressions:
+        return None
+    row_filter = expressions[0]
+    for expression in expressions[1:]:
+        row_filter = row_filter & expression
+    return row_filter
+
+
+# Columns stored as float32 in compact mode; anything computed from them
+# (adjustment factors, FX rates, bond prices) is still done in float64.
+COMPACT_FLOAT_COLUMNS = ["open", "high", "low", "close", "adj_close"]
+
+
+def _integral_volume(values):
+    """Whether a float volume column can be stored as int64 without loss."""
+    values = np.asarray(values)
+    return not np.isnan(values).any() and bool((values == np.round(values)).all())
+
+
+def _compact_table(table):
+    """Arrow-side counterpart of `_compact_frame`, applied before `to_pandas`."""
+    for i, name in enumerate(table.column_names):
+        column = table.column(i)
+        if name == "symbol" and (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+            column = pc.dictionary_encode(column)
+        elif name in COMPACT_FLOAT_COLUMNS and pa.types.is_floating(column.type):
+            column = pc.cast(column, pa.float32())
+        elif name == "volume" and pa.types.is_floating(column.type):
+            if not _integral_volume(column.to_numpy()):
+                continue
+            column = pc.cast(column, pa.int64())
+        else:
+            continue
+        table = table.set_column(i, name, column)
+    return table
+
+
+def _compact_frame(df):
+    """
+    Downcast a daily-price frame in place: categorical ``symbol``,
+    ``datetime64[ns]`` ``date``, float32 prices and int64 ``volume`` when every
+    volume is a whole number (fractional volumes, e.g. crypto, stay float64).
+    """
+    if "symbol" in df.columns and not isinstance(df["symbol"].dtype, pd.CategoricalDtype):
+        df["symbol"] = df["symbol"].astype("category")
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
+    for col in COMPACT_FLOAT_COLUMNS:
+        if col in df.columns and df[col].dtype != np.float32:
+            df[col] = df[col].astype(np.float32)
+    if "volume" in df.columns and df["volume"].dtype.kind == "f" and _integral_volume(df["volume"]):
+        df["volume"] = df["volume"].astype(np.int64)
+    return df
+
+
+def _read_dataset(
     path,
     symbols=None,
-    adjust=True,
-    extend=False,
-    to_usd=True,
-    rate_to_price=True,
-    use_hf=False
+    start_date=None,
+    end_date=None,
+    use_hf=False,
+    refresh=False,
+    incremental=False,
+    compact=False,
+    source="remote",
 ):
-    split = "train"
-    pwb_api_key = _get_pwb_api_key()
+    """Read the cached rows of `path` for the requested symbols and dates."""
+    table = _read_table(path, symbols, start_date, end_date, use_hf, refresh, incremental, source)
+    return _table_to_frame(table, symbols, start_date, end_date, compact)
 
-    if pwb_api_key and not use_hf:
-        dataset = _load_dataset_from_pwb(path, split=split, pwb_api_key=pwb_api_key)
-    else:
-        hf_token = os.getenv("HF_ACCESS_TOKEN")
-        if not hf_token:
-            raise ValueError("Set PWB_API_KEY or HF_ACCESS_TOKEN to load datasets.")
-        dataset = ds.load_dataset(f"paperswithbacktest/{path}", token=hf_token)
 
-    df = (dataset[split] if isinstance(dataset, ds.DatasetDict) else dataset).to_pandas()
+def _read_table(
+    path, symbols=None, start_date=None, end_date=None, use_hf=False, refresh=False, incremental=False, source="remote"
+):
+    """Cached rows of `path` as a pyarrow Table, with the filters pushed down."""
+    if source == "synthetic":
+        return synthetic.generate(path, symbols, start_date, end_date)
+    split = "train"
+    files = _get_cached_files(path, split=split, use_hf=use_hf, refresh=refresh, incremental=incremental)
+    tables = []
+    for part in files:
+        dataset = pads.dataset(str(part), format="parquet")
+        row_filter = _pushdown_filter(dataset.schema, symbols, start_date, end_date)
+        tables.append(dataset.to_table(filter=row_filter))
+    # Incremental updates leave delta parts whose rows supersede older ones.
+    return merge_tables(tables) if len(tables) > 1 else tables[0]
+
+
+def _table_to_frame(table, symbols=None, start_date=None, end_date=None, compact=False):
+    """Convert cached rows to the DataFrame layout returned by `load_dataset`."""
+    native_dates = (
+        "date" in table.column_names
+        and pa.types.is_date32(table.schema.field("date").type)
+        and table["date"].null_count == 0
+    )
+    kept = None
+    if native_dates and (start_date is not None or end_date is not None):
+        # Filter in Arrow rather than comparing `datetime.date` objects
+        start = pd.Timestamp(start_date).date() if start_date is not None else date.min
+        end = pd.Timestamp(end_date).date() if end_date is not None else date.max
+        mask = pc.and_(
+            pc.greater_equal(table["date"], pa.scalar(start, pa.date32())),
+            pc.less_equal(table["date"], pa.scalar(end, pa.date32())),
+        )
+        kept = np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+        table = table.filter(mask)
 
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"]).dt.date
+    if compact:
+        df = _compact_table(table).to_pandas(date_as_object=False)
+    else:
+        df = table.to_pandas()
+    if kept is not None:
+        df.index = kept  # same row labels as a pandas boolean filter
+
+    if native_dates:
+        # Straight from the date32 column: the pandas metadata of the file
+        # may describe the dates as strings.
+        dates = table["date"].to_pandas(date_as_object=not compact).to_numpy()
+        df["date"] = dates.astype("datetime64[ns]") if compact else dates
+    elif "date" in df.columns:
+        if compact:
+            df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
+            bound = pd.Timestamp
+        else:
+            df["date"] = pd.to_datetime(df["date"]).dt.date
+            bound = lambda value: pd.Timestamp(value).date()  # noqa: E731
+        if start_date is not None:
+            df = df[df["date"] >= bound(start_date)]
+        if end_date is not None:
+            df = df[df["date"] <= bound(end_date)]
 
     if "datetime" in df.columns:
         df["datetime"] = pd.to_datetime(df["datetime"])
 
-    if isinstance(symbols, list) and "sp500" in symbols:
-        symbols.remove("sp500")
-        symbols += SP500_SYMBOLS
-
-    if "symbol" in df.columns and isinstance(symbols, list):
-        df = df[df["symbol"].isin(symbols)].copy()
-
     if "symbols" in df.columns and isinstance(symbols, list):
         df = df[
             df["symbols"].apply(lambda x: any(symbol in symbols for symbol in x))
         ].copy()
 
+    return df
+
+
+def _transform_dataset(path, df, adjust, extend, to_usd, rate_to_price, deps):
+    """Apply the adjustment, extension and conversion steps to raw rows.
+
+    `deps` maps the dependency datasets ("Forex-Daily-Price" for indices, the
+    proxy datasets for ETFs) to their already transformed frames.
+    """
     if path in DAILY_PRICE_DATASETS:
         if adjust and "adj_close" in df.columns:
-            adj_factor = df["adj_close"] / df["close"]
+            adj_factor = df["adj_close"].astype(np.float64) / df["close"]
             df["adj_open"] = df["open"] * adj_factor
             df["adj_high"] = df["high"] * adj_factor
             df["adj_low"] = df["low"] * adj_factor
@@ -618,21 +1031,16 @@ def load_dataset(
                 df.drop(columns=["adj_close"])
 
     if path in DAILY_PRICE_DATASETS and (extend and path == "ETFs-Daily-Price"):
-        df = __extend_etfs(df)
+        df = __extend_etfs(df, list(deps.values()))
 
     if path in DAILY_PRICE_DATASETS and to_usd:
         if path == "Forex-Daily-Price":
-            for index, row in df.iterrows():
-                if row["symbol"].endswith("USD"):
-                    continue
-                df.at[index, "open"] = 1 / row["open"]
-                df.at[index, "high"] = 1 / row["high"]
-                df.at[index, "low"] = 1 / row["low"]
-                df.at[index, "close"] = 1 / row["close"]
-                df.at[index, "symbol"] = row["symbol"][3:] + "USD"
+            df = __convert_forex_to_usd(df)
+        elif path == "Indices-Daily-Price" and "Forex-Daily-Price" in deps:
+            df = __convert_indices_to_usd(df, deps["Forex-Daily-Price"])
         elif path == "Indices-Daily-Price":
-            df_forex = load_dataset("Forex-Daily-Price", to_usd=True)
-            df = __convert_indices_to_usd(df, df_forex)
+            # Only USD (or unmapped) indices: no Forex read was planned
+            df = df.reset_index(drop=True)
 
     if path in DAILY_PRICE_DATASETS and rate_to_price and path == "Bonds-Daily-Price":
         df = __convert_bond_rates_to_prices(df)
@@ -640,142 +1048,730 @@ def load_dataset(
     return df
 
 
-def __convert_indices_to_usd(
-    df_indices: pd.DataFrame, df_forex: pd.DataFrame
-) -> pd.DataFrame:
-    mapping = {
-        "ADSMI": "AED",  # United Arab Emirates
-        "AEX": "EUR",  # Netherlands
-        "AS30": "AUD",  # Australia
-        "AS51": "AUD",  # Australia
-        "AS52": "AUD",  # Australia
-        "ASE": "EUR",  # Greece
-        "ATX": "EUR",  # Austria
-        "BEL20": "EUR",  # Belgium
-        "BELEX15": "RSD",  # Serbia
-        "BGSMDC": "BWP",  # Botswana
-        "BHSEEI": "BHD",  # Bahrain
-        "BKA": "BAM",  # Bosnia and Herzegovina
-        "BLOM": "LBP",  # Lebanon
-        "BSX": "BMD",  # Bermuda
-        "BUX": "HUF",  # Hungary
-        "BVLX": "BOB",  # Bolivia
-        "BVPSBVPS": "PAB",  # Panama
-        "BVQA": "USD",  # Ecuador
-        "CAC": "EUR",  # France
-        "CASE": "EGP",  # Egypt
-        "CCMP": "USD",  # United States
-        "COLCAP": "COP",  # Colombia
-        "CRSMBCT": "CRC",  # Costa Rica
-        "CSEALL": "LKR",  # Sri Lanka
-        "CYSMMAPA": "EUR",  # Cyprus
-        "DARSDSEI": "TZS",  # Tanzania
-        "DAX": "EUR",  # Germany
-        "DFMGI": "AED",  # United Arab Emirates
-        "DSEX": "BDT",  # Bangladesh
-        "DSM": "QAR",  # Qatar
-        "ECU": "USD",  # Ecuador
-        "FBMKLCI": "MYR",  # Malaysia
-        "FSSTI": "SGD",  # Singapore
-        "FTN098": "NAD",  # Namibia
-        "FTSEMIB": "EUR",  # Italy
-        "GGSECI": "GHS",  # Ghana
-        "HEX": "EUR",  # Finland
-        "HEX25": "EUR",  # Finland
-        "HSI": "HKD",  # Hong Kong
-        "IBEX": "EUR",  # Spain
-        "IBOV": "BRL",  # Brazil
-        "IBVC": "VES",  # Venezuela
-        "ICEXI": "ISK",  # Iceland
-        "IGPA": "CLP",  # Chile
-        "INDEXCF": "RUB",  # Russia
-        "INDU": "USD",  # United States
-        "INDZI": "IDR",  # Indonesia
-        "ISEQ": "EUR",  # Ireland
-        "JALSH": "ZAR",  # South Africa
-        "JCI": "IDR",  # Indonesia
-        "JMSMX": "JMD",  # Jamaica
-        "JOSMGNFF": "JOD",  # Jordan
-        "KFX": "DKK",  # Denmark
-        "KNSMIDX": "KES",  # Kenya
-        "KSE100": "PKR",  # Pakistan
-        "KZKAK": "KZT",  # Kazakhstan
-        "LSXC": "LAK",  # Laos
-        "LUXXX": "EUR",  # Luxembourg
-        "MALTEX": "EUR",  # Malta
-        "MBI": "MKD",  # North Macedonia
-        "MERVAL": "ARS",  # Argentina
-        "MEXBOL": "MXN",  # Mexico
-        "MONEX": "EUR",  # Montenegro
-        "MOSENEW": "MAD",  # Morocco
-        "MSETOP": "MKD",  # North Macedonia
-        "MSM30": "OMR",  # Oman
-        "NDX": "USD",  # United States
-        "NGSEINDX": "NGN",  # Nigeria
-        "NIFTY": "INR",  # India
-        "NKY": "JPY",  # Japan
-        "NSEASI": "KES",  # Kenya
-        "NZSE50FG": "NZD",  # New Zealand
-        "OMX": "SEK",  # Sweden
-        "OSEAX": "NOK",  # Norway
-        "PCOMP": "PHP",  # Philippines
-        "PFTS": "UAH",  # Ukraine
-        "PSI20": "EUR",  # Portugal
-        "PX": "CZK",  # Czech Republic
-        "RIGSE": "EUR",  # Latvia
-        "RTY": "USD",  # United States
-        "SASEIDX": "SAR",  # Saudi Arabia
-        "SASX10": "BAM",  # Bosnia and Herzegovina
-        "SBITOP": "EUR",  # Slovenia
-        "SEMDEX": "MUR",  # Mauritius
-        "SENSEX": "INR",  # India
-        "SET50": "THB",  # Thailand
-        "SHCOMP": "CNY",  # China
-        "SHSZ300": "CNY",  # China
-        "SKSM": "EUR",  # Slovakia
-        "SMI": "CHF",  # Switzerland
-        "SOFIX": "BGN",  # Bulgaria
-        "SPBLPGPT": "PEN",  # Peru
-        "SPTSX": "CAD",  # Canada
-        "SPX": "USD",  # United States
-        "SSE50": "CNY",  # China
-        "SX5E": "EUR",  # Europe
-        "TA125": "ILS",  # Israel
-    }
-    frames = []
+def _transform_table(engine, path, data, adjust, extend, to_usd, rate_to_price, deps):
+    """`_transform_dataset` on the Arrow/Polars data of `engine`."""
+    if path not in DAILY_PRICE_DATASETS:
+        return data
+    if adjust:
+        data = engine.adjust(data)
+    if extend and path == "ETFs-Daily-Price":
+        data = engine.extend_etfs(data, list(deps.values()), ETF_PROXIES)
+    if to_usd and path == "Forex-Daily-Price":
+        data = engine.forex_to_usd(data)
+    elif to_usd and path == "Indices-Daily-Price" and "Forex-Daily-Price" in deps:
+        data = engine.to_usd(data, INDEX_CURRENCIES, deps["Forex-Daily-Price"])
+    if rate_to_price and path == "Bonds-Daily-Price":
+        data = engine.bond_rates_to_prices(data)
+    return data
+
+
+def _union(a, b):
+    """Union of two symbol sets where ``None`` stands for the whole dataset."""
+    if a is None or b is None:
+        return None
+    return a | b
+
+
+@dataclass(frozen=True)
+class _Step:
+    """One transformed frame of a plan: a dataset and its effective flags."""
+
+    path: str
+    adjust: bool = True
+    extend: bool = False
+    to_usd: bool = True
+    rate_to_price: bool = True
+
+    @classmethod
+    def make(cls, path, adjust=True, extend=False, to_usd=True, rate_to_price=True):
+        # Drop the flags that have no effect on `path` so equivalent requests
+        # share the same step.
+        return cls(
+            path,
+            adjust=bool(adjust),
+            extend=bool(extend) and path == "ETFs-Daily-Price",
+            to_usd=bool(to_usd) and path in ("Forex-Daily-Price", "Indices-Daily-Price"),
+            rate_to_price=bool(rate_to_price) and path == "Bonds-Daily-Price",
+        )
 
-    # iterate over the symbols that actually exist in df_indices
-    for symbol in df_indices["symbol"].unique():
-        df_idx = df_indices[df_indices["symbol"] == symbol].copy()
+    def __str__(self):
+        flags = [name for name in ("adjust", "extend", "to_usd", "rate_to_price") if getattr(self, name)]
+        return f"{self.path}[{', '.join(flags)}]"
 
-        # 1) Figure out what currency the index is quoted in.
-        ccy = mapping.get(symbol)  # None if not mapped
-        if ccy is None or ccy == "USD":
-            # Unknown or already USD – just keep the original rows
-            frames.append(df_idx)
-            continue
 
-        # 2) Find the matching FX rate (home-ccy → USD)
-        pair = ccy + "USD"
-        df_fx = df_forex[df_forex["symbol"] == pair].copy()
+def _describe_symbols(symbols):
+    if symbols is None:
+        return "all symbols"
+    names = sorted(symbols)
+    shown = ", ".join(names[:8]) + (", ..." if len(names) > 8 else "")
+    return f"{len(names)} symbols ({shown})"
+
+
+@dataclass
+class LoadPlan:
+    """
+    Every dataset read and transformation needed to serve a request.
+
+    Built by :func:`build_load_plan`.  Each dataset is read once with the
+    union of the symbols any step needs, each step is computed once, and the
+    requested frames are sliced out of the steps at the end.
+
+    The dates are pushed down into the reads, except for the datasets an
+    ETF extension depends on (`full_reads`): the proxy history is scaled on
+    the ETF's first date, which may lie after the window, so those are read
+    in full and the window is applied once the ETFs are extended.
+    """
+
+    start_date: str | None = None
+    end_date: str | None = None
+    reads: dict = field(default_factory=dict)  # path -> symbols (None = all)
+    full_reads: set = field(default_factory=set)  # paths read without the date bounds
+    steps: dict = field(default_factory=dict)  # _Step -> symbols (None = all)
+    deps: dict = field(default_factory=dict)  # _Step -> [_Step]
+    outputs: list = field(default_factory=list)  # [(_Step, symbols)]
+
+    def add(self, step, symbols, full=False):
+        """Register `step` for `symbols`, together with its dependencies.
+
+        With `full` (implied by ``step.extend``), `step` and everything it
+        depends on are read over the whole history.
+        """
+        symbols = set(symbols) if symbols is not None else None
+        full = full or step.extend
+        if full:
+            self.full_reads.add(step.path)
+        self.reads[step.path] = _union(self.reads.get(step.path, set()), symbols)
+        self.steps[step] = _union(self.steps.get(step, set()), symbols)
+        deps = self.deps.setdefault(step, [])
+
+        dependencies = defaultdict(set)  # {_Step: proxy symbols}
+        if step.extend:
+            etfs = ETF_PROXIES if symbols is None else symbols & set(ETF_PROXIES)
+            for etf in etfs:
+                proxy_path, proxy = ETF_PROXIES[etf]
+                dependencies[_Step.make(proxy_path, to_usd=True)].add(proxy)
+        if step.to_usd and step.path == "Indices-Daily-Price":
+            forex = _Step.make("Forex-Daily-Price", to_usd=True)
+            if symbols is None:
+                dependencies[forex] = None
+            else:
+                for symbol in symbols:
+                    ccy = INDEX_CURRENCIES.get(symbol)
+                    if ccy and ccy != "USD":
+                        # Either quote direction may exist before the inversion
+                        dependencies[forex] |= {f"{ccy}USD", f"USD{ccy}"}
+
+        for dep, dep_symbols in dependencies.items():
+            if dep not in deps:
+                deps.append(dep)
+            self.add(dep, dep_symbols, full)
+
+    def bounds(self, path):
+        """Date bounds of the read of `path`."""
+        return (None, None) if path in self.full_reads else (self.start_date, self.end_date)
+
+    def ordered_steps(self):
+        """Steps in dependency order: Forex first, extended ETFs last."""
+        rank = {"Forex-Daily-Price": 0, "ETFs-Daily-Price": 2}
+        return sorted(self.steps, key=lambda step: (rank.get(step.path, 1), step.extend))
+
+    def __str__(self):
+        lines = [f"Load plan ({self.start_date or 'start'} -> {self.end_date or 'end'}):"]
+        for path, symbols in self.reads.items():
+            whole = " (whole history)" if path in self.full_reads and (self.start_date or self.end_date) else ""
+            lines.append(f"  read  {path}: {_describe_symbols(symbols)}{whole}")
+        for step in self.ordered_steps():
+            deps = self.deps.get(step)
+            after = f" <- {', '.join(dep.path for dep in deps)}" if deps else ""
+            lines.append(f"  build {step}{after}")
+        return "\n".join(lines)
+
+
+def build_load_plan(
+    requests,
+    adjust=True,
+    extend=False,
+    to_usd=True,
+    rate_to_price=True,
+    start_date=None,
+    end_date=None,
+):
+    """
+    Plan the reads and transformations needed to load several datasets.
+
+    Parameters
+    ----------
+    requests : dict[str, list[str] | None]
+        ``{dataset name: symbols}`` (``None`` loads the whole dataset), e.g.
+        the output of :func:`resolve_symbols`.
+    adjust, extend, to_usd, rate_to_price, start_date, end_date
+        Same meaning as in :func:`load_dataset`; the flags apply to the
+        requested datasets, dependencies use the defaults.
 
-        if df_idx.empty or df_fx.empty:
-            # No FX data – keep raw index levels instead of dropping them
-            frames.append(df_idx)
+    Returns
+    -------
+    LoadPlan
+        Printable description of what will be fetched and computed.
+    """
+    plan = LoadPlan(start_date=start_date, end_date=end_date)
+    for path, symbols in requests.items():
+        symbols = list(symbols) if isinstance(symbols, list) else None
+        step = _Step.make(path, adjust, extend, to_usd, rate_to_price)
+        plan.add(step, symbols)
+        plan.outputs.append((step, symbols))
+    return plan
+
+
+def _execute_plan(
+    plan,
+    use_hf=False,
+    refresh=False,
+    max_workers=None,
+    incremental=False,
+    compact=False,
+    backend="pandas",
+    source=None,
+):
+    """Run `plan` and return one frame per requested dataset, in order."""
+    logger.info("%s", plan)
+    engine = get_backend(backend)
+    source = _data_source(source)
+
+    # Reads are independent: fetch them concurrently.
+    workers = max(1, min(max_workers or MAX_LOAD_WORKERS, len(plan.reads)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            path: pool.submit(
+                _read_dataset if engine is None else _read_table,
+                path,
+                sorted(symbols) if symbols is not None else None,
+                *plan.bounds(path),
+                use_hf=use_hf,
+                refresh=refresh,
+                incremental=incremental,
+                source=source,
+                **({"compact": compact} if engine is None else {}),
+            )
+            for path, symbols in plan.reads.items()
+        }
+        raw = {path: future.result() for path, future in futures.items()}
+    if engine is not None:
+        # Same dtypes as the pandas pipeline sees, without leaving Arrow
+        raw = {
+            path: engine.prepare(_compact_table(table) if compact else table, *plan.bounds(path))
+            for path, table in raw.items()
+        }
+        subset, transform = engine.subset, partial(_transform_table, engine)
+    else:
+        subset, transform = lambda df, *args: _subset(df, *args).copy(), _transform_dataset
+
+    # Shared in-memory registry of transformed frames, one per step.
+    frames = {}
+    for step in plan.ordered_steps():
+        df = subset(raw[step.path], plan.steps[step], plan.reads[step.path])
+        deps = {}
+        for dep in plan.deps.get(step, []):
+            dep_df = frames[dep]
+            if dep.path not in deps:
+                deps[dep.path] = dep_df
+            elif engine is None:
+                deps[dep.path] = pd.concat([deps[dep.path], dep_df])
+            else:
+                deps[dep.path] = engine.concat([deps[dep.path], dep_df])
+        frames[step] = transform(
+            step.path,
+            df,
+            adjust=step.adjust,
+            extend=step.extend,
+            to_usd=step.to_usd,
+            rate_to_price=step.rate_to_price,
+            deps=deps,
+        )
+
+    if engine is None:
+        outputs = [
+            _subset(frames[step], _output_symbols(step, symbols), _output_symbols(step, plan.steps[step]))
+            for step, symbols in plan.outputs
+        ]
+    else:
+        # The only conversion to pandas
+        outputs = [
+            _table_to_frame(
+                engine.to_arrow(
+                    engine.subset(
+                        frames[step], _output_symbols(step, symbols), _output_symbols(step, plan.steps[step])
+                    )
+                ),
+                symbols,
+                compact=compact,
+            )
+            for step, symbols in plan.outputs
+        ]
+    outputs = [
+        _window(df, plan.start_date, plan.end_date) if step.path in plan.full_reads else df
+        for df, (step, _) in zip(outputs, plan.outputs)
+    ]
+    if compact:
+        # Transforms may have upcast columns or added symbols
+        outputs = [_compact_frame(df) for df in outputs]
+    return outputs
+
+
+def _window(df, start_date=None, end_date=None):
+    """Rows of `df` from `start_date` to `end_date` (inclusive)."""
+    if (start_date is None and end_date is None) or "date" not in df.columns:
+        return df
+    dates = pd.to_datetime(df["date"])
+    keep = np.ones(len(df), dtype=bool)
+    if start_date is not None:
+        keep &= (dates >= pd.Timestamp(start_date)).to_numpy()
+    if end_date is not None:
+        keep &= (dates <= pd.Timestamp(end_date)).to_numpy()
+    return df if keep.all() else df[keep].reset_index(drop=True)
+
+
+def _output_symbols(step, symbols):
+    """Names of `symbols` after the step, e.g. 'USDJPY' becomes 'JPYUSD'."""
+    if symbols is None or not (step.to_usd and step.path == "Forex-Daily-Price"):
+        return symbols
+    return {s if s.endswith("USD") else s[3:] + "USD" for s in symbols}
+
+
+def _subset(df, symbols, available):
+    """Rows of `df` for `symbols`, skipping the filter when nothing is dropped."""
+    if symbols is None or symbols == available or "symbol" not in df.columns:
+        return df
+    return df[df["symbol"].isin(symbols)].reset_index(drop=True)
+
+
+def load_dataset(
+    path,
+    symbols=None,
+    adjust=True,
+    extend=False,
+    to_usd=True,
+    rate_to_price=True,
+    use_hf=False,
+    refresh=False,
+    start_date=None,
+    end_date=None,
+    incremental=False,
+    compact=False,
+    backend="pandas",
+    source=None,
+):
+    """
+    Load a Papers With Backtest dataset as a DataFrame.
+
+    Parquet files are downloaded once and kept in a local cache (see
+    :mod:`pwb_toolbox.datasets.cache`); later calls read them from disk as
+    long as the remote files are unchanged.  Pass ``refresh=True`` to force a
+    fresh download, or ``incremental=True`` to update a stale copy by
+    downloading only the remote files that changed since the last download.
+    Without ``incremental=True`` a stale copy is downloaded again in full,
+    unchanged files included: the downloaded files are not kept once the
+    cache has been written.
+
+    ``symbols`` and the ``start_date``/``end_date`` range (inclusive) are
+    pushed down into the parquet scan, so row groups outside the request are
+    never read.  Datasets needed by ``extend`` or ``to_usd`` are planned up
+    front and read once (see :func:`build_load_plan`).
+
+    With ``compact=True`` the frame uses a categorical ``symbol``,
+    ``datetime64[ns]`` dates, float32 prices and int64 volumes, several
+    times less memory than the default float64/object/``datetime.date``
+    columns.  Adjustments and conversions are
+    still computed in float64.
+
+    ``backend="arrow"`` or ``"polars"`` runs the adjustment and conversion
+    steps on Arrow tables or a lazy Polars query instead of pandas frames and
+    converts to pandas once at the end (see
+    :mod:`pwb_toolbox.datasets.backends`); the numbers are identical.
+
+    ``source="synthetic"`` (or ``PWB_DATA_SOURCE=synthetic``) generates
+    reproducible prices with the same schema offline instead of downloading
+    them (see :mod:`pwb_toolbox.datasets.synthetic`); every step above
+    applies unchanged.
+    """
+    if isinstance(symbols, list) and "sp500" in symbols:
+        symbols.remove("sp500")
+        symbols += SP500_SYMBOLS
+
+    plan = build_load_plan(
+        {path: symbols},
+        adjust=adjust,
+        extend=extend,
+        to_usd=to_usd,
+        rate_to_price=rate_to_price,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return _execute_plan(
+        plan,
+        use_hf=use_hf,
+        refresh=refresh,
+        incremental=incremental,
+        compact=compact,
+        backend=backend,
+        source=source,
+    )[0]
+
+
+def _date_chunks(dataset, row_filter, chunk_rows):
+    """Tables of whole dates, each scanned with a date-range filter."""
+    dates = dataset.to_table(columns=["date"], filter=row_filter)["date"]
+    counts = pc.value_counts(dates)
+    order = pc.sort_indices(counts.field("values"))
+    values = counts.field("values").take(order).to_pylist()
+    sizes = np.cumsum(counts.field("counts").take(order).to_numpy())
+
+    start = 0
+    while start < len(values):
+        offset = sizes[start - 1] if start else 0
+        stop = max(int(np.searchsorted(sizes, offset + chunk_rows, side="right")), start + 1)
+        window = (pc.field("date") >= values[start]) & (pc.field("date") <= values[stop - 1])
+        chunk_filter = window if row_filter is None else row_filter & window
+        yield dataset.to_table(filter=chunk_filter).sort_by([("date", "ascending"), ("symbol", "ascending")])
+        start = stop
+
+
+def iter_dataset(
+    path,
+    symbols=None,
+    by="symbol",
+    chunk_rows=1_000_000,
+    adjust=True,
+    extend=False,
+    to_usd=True,
+    rate_to_price=True,
+    use_hf=False,
+    refresh=False,
+    start_date=None,
+    end_date=None,
+    incremental=False,
+    compact=False,
+    source=None,
+):
+    """
+    Stream a dataset as DataFrame chunks instead of loading it at once.
+
+    Takes the same arguments as :func:`load_dataset` and applies the same
+    adjustment, extension and conversion steps, chunk by chunk.  Datasets
+    needed by ``extend``/``to_usd`` (Forex, ETF proxies) are small and loaded
+    once up front.
+
+    Parameters
+    ----------
+    by : {"symbol", "date"}
+        ``"symbol"`` yields chunks holding every row of whole symbols, read in
+        a single pass over the cache.  ``"date"`` yields chunks holding every
+        row of whole dates, in date order; each chunk is a separate filtered
+        scan, so use large chunks.  ``extend`` needs ``by="symbol"``.
+    chunk_rows : int
+        Target number of rows per chunk.  A chunk only exceeds it when a
+        single symbol or date has more rows.
+
+    Yields
+    ------
+    pd.DataFrame
+        Frames in the same layout as :func:`load_dataset`.
+    """
+    if by not in ("symbol", "date"):
+        raise ValueError(f"by must be 'symbol' or 'date', got {by!r}")
+    if extend and by != "symbol":
+        raise ValueError("extend=True needs whole symbols: use by='symbol'")
+    if isinstance(symbols, list) and "sp500" in symbols:
+        symbols = [s for s in symbols if s != "sp500"] + SP500_SYMBOLS
+
+    plan = build_load_plan(
+        {path: symbols},
+        adjust=adjust,
+        extend=extend,
+        to_usd=to_usd,
+        rate_to_price=rate_to_price,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    step, _ = plan.outputs[0]
+    deps = {}
+    dep_steps = plan.deps.get(step, [])
+    # An extension scales the proxies on the ETF's first date, which may lie
+    # after the window: read the ETFs and their dependencies in full, and
+    # apply the window after the transform.
+    bounds = (None, None) if step.extend else (start_date, end_date)
+    if dep_steps:
+        dep_plan = LoadPlan(*bounds)
+        for dep in dep_steps:
+            dep_plan.add(dep, plan.steps[dep])
+            dep_plan.outputs.append((dep, plan.steps[dep]))
+        dep_frames = _execute_plan(
+            dep_plan, use_hf=use_hf, refresh=refresh, incremental=incremental, compact=compact, source=source
+        )
+        for dep, dep_df in zip(dep_steps, dep_frames):
+            deps[dep.path] = dep_df if dep.path not in deps else pd.concat([deps[dep.path], dep_df])
+
+    if _data_source(source) == "synthetic":
+        dataset = pads.dataset(synthetic.generate(path, symbols))
+    else:
+        split = "train"
+        files = _get_cached_files(path, split=split, use_hf=use_hf, refresh=refresh, incremental=incremental)
+        if len(files) > 1:
+            # Streaming needs a single sorted file: fold incremental parts first.
+            files = DatasetCache().compact(path, split)
+        dataset = pads.dataset(str(files[0]), format="parquet")
+    if by not in dataset.schema.names:
+        raise ValueError(f"'{path}' has no '{by}' column to stream by")
+    symbols = sorted(symbols) if isinstance(symbols, list) else None
+    row_filter = _pushdown_filter(dataset.schema, symbols, *bounds)
+
+    if by == "symbol":
+        chunks = symbol_chunks(
+            dataset.to_batches(filter=row_filter, batch_size=min(chunk_rows, 64 * 1024)), chunk_rows
+        )
+    else:
+        chunks = _date_chunks(dataset, row_filter, chunk_rows)
+
+    for table in chunks:
+        df = _table_to_frame(table, symbols, *bounds, compact)
+        if df.empty:
             continue
+        df = _transform_dataset(
+            step.path,
+            df.reset_index(drop=True),
+            adjust=step.adjust,
+            extend=step.extend,
+            to_usd=step.to_usd,
+            rate_to_price=step.rate_to_price,
+            deps=deps,
+        )
+        if step.extend:
+            df = _window(df, start_date, end_date)
+            if df.empty:
+                continue
+        yield _compact_frame(df) if compact else df
+
+
+def export_to_lake(
+    root,
+    datasets=None,
+    partitioning="symbol",
+    chunk_rows=1_000_000,
+    use_hf=False,
+    refresh=False,
+    incremental=False,
+):
+    """
+    Write daily-price datasets to a local Hive-partitioned lake.
+
+    Every dataset (default: all of ``DAILY_PRICE_DATASETS``) is streamed
+    with :func:`iter_dataset`, adjusted, quoted in USD and with bond yields
+    turned into prices, and written under
+    ``<root>/asset_class=<name>/symbol=<symbol>/`` (or ``year=<year>/`` with
+    ``partitioning="year"``).  An exported dataset replaces the previous
+    copy of that dataset only once it is complete.
+
+    Read it back with :func:`open_lake`, or point :func:`get_pricing` at it
+    with ``lake=root`` or ``PWB_LAKE_DIR``.  Returns the opened lake.
+    """
+    lake = Lake(root)
+    cache = DatasetCache()
+    for path in datasets or DAILY_PRICE_DATASETS:
+        logger.info("Exporting %s to %s", path, lake.root)
+        _get_cached_files(path, split="train", use_hf=use_hf, refresh=refresh, incremental=incremental)
+        fingerprint = (cache.read_meta(path, "train") or {}).get("fingerprint")
+        chunks = iter_dataset(path, by="symbol", chunk_rows=chunk_rows, use_hf=use_hf)
+        lake.write(path, chunks, partitioning=partitioning, fingerprint=fingerprint)
+    return open_lake(lake.root)
+
+
+def __convert_forex_to_usd(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quote every pair against USD, in-place: 'USDJPY' rows become 'JPYUSD'
+    with inverted open/high/low/close.  Pairs already ending in USD are kept.
+    """
+    mask = ~df["symbol"].str.endswith("USD")
+    if not mask.any():
+        return df
+    cols = ["open", "high", "low", "close"]
+    df.loc[mask, cols] = 1 / df.loc[mask, cols]
+    inverted = df.loc[mask, "symbol"].astype(str).str[3:] + "USD"
+    if isinstance(df["symbol"].dtype, pd.CategoricalDtype):
+        new = pd.Index(inverted.unique()).difference(df["symbol"].cat.categories)
+        df["symbol"] = df["symbol"].cat.add_categories(new)
+    df.loc[mask, "symbol"] = inverted
+    if isinstance(df["symbol"].dtype, pd.CategoricalDtype):
+        df["symbol"] = df["symbol"].cat.remove_unused_categories()
+    return df
+
 
-        # 3) Merge on date and convert OHLC
-        merged = pd.merge(df_idx, df_fx, on="date", suffixes=("", "_fx"))
-        for col in ("open", "high", "low", "close"):
-            merged[col] = merged[col] * merged[f"{col}_fx"]
+INDEX_CURRENCIES = {
+    "ADSMI": "AED",  # United Arab Emirates
+    "AEX": "EUR",  # Netherlands
+    "AS30": "AUD",  # Australia
+    "AS51": "AUD",  # Australia
+    "AS52": "AUD",  # Australia
+    "ASE": "EUR",  # Greece
+    "ATX": "EUR",  # Austria
+    "BEL20": "EUR",  # Belgium
+    "BELEX15": "RSD",  # Serbia
+    "BGSMDC": "BWP",  # Botswana
+    "BHSEEI": "BHD",  # Bahrain
+    "BKA": "BAM",  # Bosnia and Herzegovina
+    "BLOM": "LBP",  # Lebanon
+    "BSX": "BMD",  # Bermuda
+    "BUX": "HUF",  # Hungary
+    "BVLX": "BOB",  # Bolivia
+    "BVPSBVPS": "PAB",  # Panama
+    "BVQA": "USD",  # Ecuador
+    "CAC": "EUR",  # France
+    "CASE": "EGP",  # Egypt
+    "CCMP": "USD",  # United States
+    "COLCAP": "COP",  # Colombia
+    "CRSMBCT": "CRC",  # Costa Rica
+    "CSEALL": "LKR",  # Sri Lanka
+    "CYSMMAPA": "EUR",  # Cyprus
+    "DARSDSEI": "TZS",  # Tanzania
+    "DAX": "EUR",  # Germany
+    "DFMGI": "AED",  # United Arab Emirates
+    "DSEX": "BDT",  # Bangladesh
+    "DSM": "QAR",  # Qatar
+    "ECU": "USD",  # Ecuador
+    "FBMKLCI": "MYR",  # Malaysia
+    "FSSTI": "SGD",  # Singapore
+    "FTN098": "NAD",  # Namibia
+    "FTSEMIB": "EUR",  # Italy
+    "GGSECI": "GHS",  # Ghana
+    "HEX": "EUR",  # Finland
+    "HEX25": "EUR",  # Finland
+    "HSI": "HKD",  # Hong Kong
+    "IBEX": "EUR",  # Spain
+    "IBOV": "BRL",  # Brazil
+    "IBVC": "VES",  # Venezuela
+    "ICEXI": "ISK",  # Iceland
+    "IGPA": "CLP",  # Chile
+    "INDEXCF": "RUB",  # Russia
+    "INDU": "USD",  # United States
+    "INDZI": "IDR",  # Indonesia
+    "ISEQ": "EUR",  # Ireland
+    "JALSH": "ZAR",  # South Africa
+    "JCI": "IDR",  # Indonesia
+    "JMSMX": "JMD",  # Jamaica
+    "JOSMGNFF": "JOD",  # Jordan
+    "KFX": "DKK",  # Denmark
+    "KNSMIDX": "KES",  # Kenya
+    "KSE100": "PKR",  # Pakistan
+    "KZKAK": "KZT",  # Kazakhstan
+    "LSXC": "LAK",  # Laos
+    "LUXXX": "EUR",  # Luxembourg
+    "MALTEX": "EUR",  # Malta
+    "MBI": "MKD",  # North Macedonia
+    "MERVAL": "ARS",  # Argentina
+    "MEXBOL": "MXN",  # Mexico
+    "MONEX": "EUR",  # Montenegro
+    "MOSENEW": "MAD",  # Morocco
+    "MSETOP": "MKD",  # North Macedonia
+    "MSM30": "OMR",  # Oman
+    "NDX": "USD",  # United States
+    "NGSEINDX": "NGN",  # Nigeria
+    "NIFTY": "INR",  # India
+    "NKY": "JPY",  # Japan
+    "NSEASI": "KES",  # Kenya
+    "NZSE50FG": "NZD",  # New Zealand
+    "OMX": "SEK",  # Sweden
+    "OSEAX": "NOK",  # Norway
+    "PCOMP": "PHP",  # Philippines
+    "PFTS": "UAH",  # Ukraine
+    "PSI20": "EUR",  # Portugal
+    "PX": "CZK",  # Czech Republic
+    "RIGSE": "EUR",  # Latvia
+    "RTY": "USD",  # United States
+    "SASEIDX": "SAR",  # Saudi Arabia
+    "SASX10": "BAM",  # Bosnia and Herzegovina
+    "SBITOP": "EUR",  # Slovenia
+    "SEMDEX": "MUR",  # Mauritius
+    "SENSEX": "INR",  # India
+    "SET50": "THB",  # Thailand
+    "SHCOMP": "CNY",  # China
+    "SHSZ300": "CNY",  # China
+    "SKSM": "EUR",  # Slovakia
+    "SMI": "CHF",  # Switzerland
+    "SOFIX": "BGN",  # Bulgaria
+    "SPBLPGPT": "PEN",  # Peru
+    "SPTSX": "CAD",  # Canada
+    "SPX": "USD",  # United States
+    "SSE50": "CNY",  # China
+    "SX5E": "EUR",  # Europe
+    "TA125": "ILS",  # Israel
+}
+
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+
+def convert_to_usd(
+    df: pd.DataFrame,
+    currencies: dict,
+    df_forex: pd.DataFrame,
+    columns=None,
+) -> pd.DataFrame:
+    """
+    Convert prices quoted in local currencies to USD with a single join.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Long frame with ``symbol``, ``date`` and price columns.
+    currencies : dict
+        Maps each symbol to the ISO code of its quote currency, e.g.
+        ``{"DAX": "EUR"}``.
+    df_forex : pd.DataFrame
+        Forex-Daily-Price frame quoted against USD (``to_usd=True``), i.e.
+        with symbols such as ``"EURUSD"``.
+    columns : list[str] | None
+        Price columns to convert, each multiplied by the same column of the
+        FX rate.  Defaults to open/high/low/close.
+
+    Returns
+    -------
+    pd.DataFrame
+        Symbols that are unmapped, already in USD or without any FX series
+        are returned unchanged.  Converted symbols only keep the dates that
+        have an FX quote.
+    """
+    columns = list(columns or PRICE_COLUMNS)
+    fx_columns = [f"{col}_fx" for col in columns]
+
+    # (currency, date) -> FX rate lookup, e.g. ("EUR", 2020-01-02) -> EURUSD
+    fx = df_forex[df_forex["symbol"].str.endswith("USD")]
+    fx = pd.DataFrame(
+        {
+            "_ccy": fx["symbol"].astype(str).str[:-3],
+            "date": fx["date"],
+            **{fx_col: fx[col] for col, fx_col in zip(columns, fx_columns)},
+        }
+    ).drop_duplicates(["_ccy", "date"], keep="last")
+
+    ccy = df["symbol"].map(currencies)
+    convert = ccy.notna() & (ccy != "USD") & ccy.isin(fx["_ccy"].unique())
+    if not convert.any():
+        return df.reset_index(drop=True)
+
+    merged = df.assign(_ccy=ccy.where(convert)).merge(
+        fx, on=["_ccy", "date"], how="left", indicator="_fx_match"
+    )
+    convert = convert.to_numpy()
+    for col, fx_col in zip(columns, fx_columns):
+        merged.loc[convert, col] = merged.loc[convert, col] * merged.loc[convert, fx_col]
 
-        frames.append(merged[["symbol", "date", "open", "high", "low", "close"]])
+    # Converted symbols drop the dates without an FX quote
+    merged = merged[~convert | (merged["_fx_match"] == "both").to_numpy()]
+    return merged.drop(columns=["_ccy", "_fx_match", *fx_columns]).reset_index(drop=True)
 
-    if not frames:
-        return pd.DataFrame(columns=df_indices.columns)
 
-    # Combine everything back into one DataFrame
-    return pd.concat(frames, ignore_index=True)
+def __convert_indices_to_usd(
+    df_indices: pd.DataFrame, df_forex: pd.DataFrame
+) -> pd.DataFrame:
+    return convert_to_usd(df_indices, INDEX_CURRENCIES, df_forex)
 
 
 def __convert_bond_rates_to_prices(df: pd.DataFrame, face_value: float = 100.0) -> pd.DataFrame:
@@ -804,49 +1800,51 @@ def __convert_bond_rates_to_prices(df: pd.DataFrame, face_value: float = 100.0)
 
     # Vectorized rate->price for each OHLC column
     for col in ["open", "high", "low", "close"]:
-        r = df.loc[mask, col] / 100.0  # percent -> fraction
-        df.loc[mask, col] = face_value / (1.0 + r) ** y
+        r = df.loc[mask, col].astype(np.float64) / 100.0  # percent -> fraction
+        df.loc[mask, col] = (face_value / (1.0 + r) ** y).astype(df[col].dtype)
 
     return df
 
 
-def __extend_etfs(df_etfs):
-
-    mapping = {
-        "AGG": ["Bonds-Daily-Price", "US10Y"],
-        "EPP": ["Indices-Daily-Price", "HSI"],
-        "EWA": ["Indices-Daily-Price", "AS30"],  # Australia
-        "EWO": ["Indices-Daily-Price", "ATX"],  # Austria
-        "EWK": ["Indices-Daily-Price", "BEL20"],  # Belgium
-        "EWZ": ["Indices-Daily-Price", "IBOV"],  # Brazil
-        "EWC": ["Indices-Daily-Price", "SPTSX"],  # Canada
-        "FXI": ["Indices-Daily-Price", "SSE50"],  # China
-        "EWQ": ["Indices-Daily-Price", "CAC"],  # France
-        "EWG": ["Indices-Daily-Price", "DAX"],  # Germany
-        "EWH": ["Indices-Daily-Price", "HSI"],  # Hong Kong
-        "EWI": ["Indices-Daily-Price", "FTSEMIB"],  # Italy
-        "EWJ": ["Indices-Daily-Price", "NKY"],
-        "EWM": ["Indices-Daily-Price", "FBMKLCI"],  # Malaysia
-        "EWW": ["Indices-Daily-Price", "MEXBOL"],  # Mexico
-        "EWN": ["Indices-Daily-Price", "AEX"],  # Netherlands
-        "EWS": ["Indices-Daily-Price", "FSSTI"],  # Singapore
-        "EZA": ["Indices-Daily-Price", "TOP40"],  # South Africa
-        "EWP": ["Indices-Daily-Price", "IBEX"],  # Spain
-        "EWD": ["Indices-Daily-Price", "OMX"],  # Sweden
-        "EWL": ["Indices-Daily-Price", "SMI"],  # Switzerland
-        "EWT": ["Indices-Daily-Price", "TWSE"],  # Taiwan
-        "EWU": ["Indices-Daily-Price", "UKX"],  # United Kingdom
-        "GLD": ["Commodities-Daily-Price", "GC1"],
-        "GSG": ["Commodities-Daily-Price", "GC1"],
-        "IEF": ["Bonds-Daily-Price", "US10Y"],
-        "IEV": ["Indices-Daily-Price", "SX5E"],
-        "IWB": ["Indices-Daily-Price", "SPX"],
-        "QQQ": ["Indices-Daily-Price", "NDX"],
-        "SHY": ["Bonds-Daily-Price", "US1Y"],
-        "SPY": ["Indices-Daily-Price", "SPX"],
-        "THD": ["Indices-Daily-Price", "SET50"],  # Thailand
-        "USO": ["Commodities-Daily-Price", "CL1"],
-    }
+ETF_PROXIES = {
+    "AGG": ["Bonds-Daily-Price", "US10Y"],
+    "EPP": ["Indices-Daily-Price", "HSI"],
+    "EWA": ["Indices-Daily-Price", "AS30"],  # Australia
+    "EWO": ["Indices-Daily-Price", "ATX"],  # Austria
+    "EWK": ["Indices-Daily-Price", "BEL20"],  # Belgium
+    "EWZ": ["Indices-Daily-Price", "IBOV"],  # Brazil
+    "EWC": ["Indices-Daily-Price", "SPTSX"],  # Canada
+    "FXI": ["Indices-Daily-Price", "SSE50"],  # China
+    "EWQ": ["Indices-Daily-Price", "CAC"],  # France
+    "EWG": ["Indices-Daily-Price", "DAX"],  # Germany
+    "EWH": ["Indices-Daily-Price", "HSI"],  # Hong Kong
+    "EWI": ["Indices-Daily-Price", "FTSEMIB"],  # Italy
+    "EWJ": ["Indices-Daily-Price", "NKY"],
+    "EWM": ["Indices-Daily-Price", "FBMKLCI"],  # Malaysia
+    "EWW": ["Indices-Daily-Price", "MEXBOL"],  # Mexico
+    "EWN": ["Indices-Daily-Price", "AEX"],  # Netherlands
+    "EWS": ["Indices-Daily-Price", "FSSTI"],  # Singapore
+    "EZA": ["Indices-Daily-Price", "TOP40"],  # South Africa
+    "EWP": ["Indices-Daily-Price", "IBEX"],  # Spain
+    "EWD": ["Indices-Daily-Price", "OMX"],  # Sweden
+    "EWL": ["Indices-Daily-Price", "SMI"],  # Switzerland
+    "EWT": ["Indices-Daily-Price", "TWSE"],  # Taiwan
+    "EWU": ["Indices-Daily-Price", "UKX"],  # United Kingdom
+    "GLD": ["Commodities-Daily-Price", "GC1"],
+    "GSG": ["Commodities-Daily-Price", "GC1"],
+    "IEF": ["Bonds-Daily-Price", "US10Y"],
+    "IEV": ["Indices-Daily-Price", "SX5E"],
+    "IWB": ["Indices-Daily-Price", "SPX"],
+    "QQQ": ["Indices-Daily-Price", "NDX"],
+    "SHY": ["Bonds-Daily-Price", "US1Y"],
+    "SPY": ["Indices-Daily-Price", "SPX"],
+    "THD": ["Indices-Daily-Price", "SET50"],  # Thailand
+    "USO": ["Commodities-Daily-Price", "CL1"],
+}
+
+
+def __extend_etfs(df_etfs, proxy_frames):
+    mapping = ETF_PROXIES
     symbols = df_etfs.symbol.unique()
     mapping = {k: v for k, v in mapping.items() if k in symbols}
 
@@ -854,16 +1852,8 @@ def __extend_etfs(df_etfs):
     if not mapping:
         return df_etfs.copy()
 
-    # ------------------------------------------------------------------ step 2
-    grouped = defaultdict(list)  # {path: [proxy1, proxy2, ...]}
-    for _, (path, proxy) in mapping.items():
-        grouped[path].append(proxy)
-
-    # Load each dataset only if there's at least one proxy symbol
-    other_frames = []
-    for path, proxies in grouped.items():
-        if proxies:  # skip empty lists
-            other_frames.append(load_dataset(path, proxies, to_usd=True))
+    # Proxy data (bonds, indices, commodities) is loaded by the load plan
+    other_frames = [df for df in proxy_frames if not df.empty]
 
     # If no proxy data could be loaded, fall back to raw ETF data
     if not other_frames:
@@ -914,7 +1904,231 @@ def __extend_etfs(df_etfs):
     )
 
 
+# Direct routing for suffixed symbols (skip Universe lookup)
+SUFFIX_TO_REPO = {
+    "CRP": "paperswithbacktest/Cryptocurrencies-Daily-Price",
+    "STK": "paperswithbacktest/Stocks-Daily-Price",
+    "CMD": "paperswithbacktest/Commodities-Daily-Price",
+    "IDX": "paperswithbacktest/Indices-Daily-Price",
+    "ETF": "paperswithbacktest/ETFs-Daily-Price",
+    "FXR": "paperswithbacktest/Forex-Daily-Price",
+    "BND": "paperswithbacktest/Bonds-Daily-Price",
+}
+
+# Symbol -> dataset index built from Universe-Daily-Price, memoised in-process
+# and persisted next to the dataset cache.
+SYMBOL_INDEX_TTL = 24 * 3600  # seconds, overridable with PWB_SYMBOL_INDEX_TTL
+_symbol_index = None
+_symbol_index_loaded_at = 0.0
+_symbol_index_lock = threading.Lock()
+
+
+def _symbol_index_path() -> Path:
+    return get_cache_dir() / "Universe-Daily-Price" / "symbol_index.json"
+
+
+def _fetch_symbol_index() -> dict[str, str]:
+    import datasets as ds
+
+    universe = ds.load_dataset(
+        "paperswithbacktest/Universe-Daily-Price",
+        token=_get_hf_token(),
+    )
+    mapping = universe["train"].to_pandas()
+    mapping = mapping.set_index("symbol")["repo_id"].to_dict()
+    # Keep the dataset name only: "paperswithbacktest/Stocks-Daily-Price" -> "Stocks-Daily-Price"
+    return {
+        sym: repo_full.split("/")[1]
+        for sym, repo_full in mapping.items()
+        if isinstance(repo_full, str)
+    }
+
+
+def _get_symbol_index(refresh: bool = False) -> dict[str, str]:
+    """Return the symbol -> dataset index, from memory, disk or the Hub."""
+    global _symbol_index, _symbol_index_loaded_at
+
+    ttl = float(os.getenv("PWB_SYMBOL_INDEX_TTL", SYMBOL_INDEX_TTL))
+    with _symbol_index_lock:
+        now = time.time()
+        if not refresh and _symbol_index is not None and now - _symbol_index_loaded_at < ttl:
+            return _symbol_index
+
+        path = _symbol_index_path()
+        stored = None
+        try:
+            stored = json.loads(path.read_text())
+        except (OSError, ValueError):
+            pass
+
+        if not refresh and stored and now - stored.get("fetched_at", 0) < ttl:
+            index, fetched_at = stored["index"], stored["fetched_at"]
+        else:
+            try:
+                index, fetched_at = _fetch_symbol_index(), now
+            except ValueError:
+                raise
+            except Exception as exc:
+                if not stored:
+                    raise
+                print(f"Warning: could not refresh the symbol index ({exc}); using cached copy.")
+                index, fetched_at = stored["index"], stored["fetched_at"]
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".tmp-{os.getpid()}")
+                tmp.write_text(json.dumps({"fetched_at": fetched_at, "index": index}))
+                os.replace(tmp, path)
+
+        _symbol_index, _symbol_index_loaded_at = index, fetched_at
+        return index
+
+
+def _synthetic_symbol_index() -> dict[str, str]:
+    """Symbol -> dataset routing of the synthetic source."""
+    index = {s: path for path in DAILY_PRICE_DATASETS for s in synthetic.default_universe(path)}
+    for symbol in INDEX_CURRENCIES:
+        index.setdefault(symbol, "Indices-Daily-Price")
+    for symbol in ETF_PROXIES:
+        index.setdefault(symbol, "ETFs-Daily-Price")
+    return index
+
+
+def resolve_symbols(symbol_list, refresh=False, source=None) -> dict[str, list[str]]:
+    """
+    Route symbols to the dataset that holds them.
+
+    Parameters
+    ----------
+    symbol_list : str | list[str]
+        Tickers, optionally suffixed "SYM.CAT" with CAT in
+        {CRP, STK, CMD, IDX, ETF, FXR, BND} to skip the Universe lookup.
+    refresh : bool
+        Re-download the Universe-Daily-Price index even if the cached copy
+        is younger than ``PWB_SYMBOL_INDEX_TTL`` seconds (default one day).
+    source : {"remote", "synthetic"} | None
+        With ``"synthetic"`` (default ``PWB_DATA_SOURCE``) no index is
+        downloaded: the synthetic universes, index tickers and ETFs are routed
+        to their dataset, USD currency pairs to Forex and anything else to
+        Stocks.
+
+    Returns
+    -------
+    dict[str, list[str]]
+        ``{dataset name: [symbols]}``.  Unknown symbols are reported with a
+        warning and left out.
+    """
+    if isinstance(symbol_list, str):
+        symbol_list = [symbol_list]
+
+    synthetic_source = _data_source(source) == "synthetic"
+    mapping = _synthetic_symbol_index() if synthetic_source else None
+    grouped = defaultdict(list)
+
+    for sym in symbol_list:
+        # Case 1: suffixed like "BTC.CRP" → route directly, use base symbol for the dataset
+        if "." in sym:
+            base, cat = sym.rsplit(".", 1)
+            repo_full = SUFFIX_TO_REPO.get(cat.upper())
+            if repo_full:
+                repo_id = repo_full.split("/")[1]  # dataset name only
+                grouped[repo_id].append(base)  # dataset expects base ticker
+                continue
+            # unknown suffix → fall back to Universe mapping on the full symbol
+
+        # Case 2: normal symbol → use Universe mapping
+        if mapping is None:
+            mapping = _get_symbol_index(refresh=refresh)
+        repo_id = mapping.get(sym)
+        if repo_id is None and synthetic_source:
+            forex = len(sym) == 6 and "USD" in (sym[:3], sym[3:])
+            repo_id = "Forex-Daily-Price" if forex else "Stocks-Daily-Price"
+        if repo_id:
+            grouped[repo_id].append(sym)
+        else:
+            print(f"Warning: No dataset found for symbol '{sym}'")
+
+    return dict(grouped)
+
+
 ALLOWED_FIELDS = {"open", "high", "low", "close", "volume"}
+MAX_LOAD_WORKERS = 4
+
+
+def _read_lake(lake, grouped, start_date, end_date, extend=False, compact=False):
+    """One frame per dataset of `grouped`, read from `lake` instead of the cache.
+
+    The lake already holds adjusted, USD-quoted rows, so only the ETF
+    extension is left to do, from the proxies stored in the same lake.  As
+    the proxies are scaled on the ETF's first date, which may lie after the
+    window, extended ETFs and their proxies are read in full and windowed
+    afterwards.
+    """
+    frames = []
+    for path, symbols in grouped.items():
+        symbols = sorted(_output_symbols(_Step.make(path), set(symbols)))
+        extend_path = _Step.make(path, extend=extend).extend
+        bounds = (None, None) if extend_path else (start_date, end_date)
+        table = lake.scan(path, symbols, *bounds)
+        df = _table_to_frame(table, symbols, *bounds, compact)
+        if extend_path:
+            proxies = defaultdict(set)
+            for etf in set(symbols) & set(ETF_PROXIES):
+                proxy_path, proxy = ETF_PROXIES[etf]
+                proxies[proxy_path].add(proxy)
+            proxy_frames = [
+                _table_to_frame(lake.scan(proxy_path, sorted(proxy_symbols)), compact=compact)
+                for proxy_path, proxy_symbols in proxies.items()
+                if proxy_path in lake.datasets
+            ]
+            df = _window(__extend_etfs(df, proxy_frames), start_date, end_date)
+        frames.append(_compact_frame(df) if compact else df)
+    return frames
+
+
+def _load_pricing_frame(
+    symbol_list,
+    start_date,
+    end_date,
+    extend=False,
+    max_workers=None,
+    incremental=False,
+    compact=False,
+    lake=None,
+    backend="pandas",
+    source=None,
+):
+    """Long frame (date index, symbol + OHLCV columns) for `symbol_list`."""
+    source = _data_source(source)
+    if source == "synthetic" and lake is not None:
+        raise ValueError("lake= reads a local copy of the remote data; it cannot be combined with source='synthetic'")
+    lake = lake if lake is not None or source == "synthetic" else get_lake_dir()
+    if lake is not None:
+        lake = lake if isinstance(lake, Lake) else open_lake(lake)
+        frames = _read_lake(lake, lake.resolve(symbol_list), start_date, end_date, extend, compact)
+    else:
+        grouped = resolve_symbols(symbol_list, source=source)
+
+        # One plan for every repo: each dataset (including the Forex and proxy
+        # dependencies) is read once, concurrently, then transformed once.
+        plan = build_load_plan(
+            grouped,
+            extend=extend,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        frames = _execute_plan(
+            plan, max_workers=max_workers, incremental=incremental, compact=compact, backend=backend, source=source
+        )
+    frames = [df_part for df_part in frames if not df_part.empty]
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    df["date"] = pd.to_datetime(df["date"])
+    df.set_index("date", inplace=True)
+    df.sort_index(inplace=True)
+    df = df.loc[start_date:end_date]
+
+    return df
 
 
 def get_pricing(
@@ -924,6 +2138,13 @@ def get_pricing(
     end_date=date.today().isoformat(),
     extend=False,
     keep_single_level=False,  # backward-compat flag
+    max_workers=None,
+    duplicates="last",
+    incremental=False,
+    compact=False,
+    lake=None,
+    backend="pandas",
+    source=None,
 ):
     """
     Fetch OHLC pricing for the requested symbols.
@@ -944,6 +2165,28 @@ def get_pricing(
         If `True` and only one field is requested, flatten the columns so the
         output matches the old behaviour (columns = symbols).  If `False`
         you always get a two-level MultiIndex `(symbol, field)`.
+    max_workers : int | None
+        Number of datasets fetched concurrently (default `MAX_LOAD_WORKERS`).
+    duplicates : {"first", "last", "raise"}
+        What to do with several rows for the same (date, symbol): keep the
+        first or the last one, or raise a ValueError.
+    incremental : bool
+        Update stale cached datasets by downloading only the remote files
+        that changed (see `load_dataset`).
+    compact : bool
+        Load with compact dtypes (see `load_dataset`) and return float32
+        prices.
+    lake : str | Path | Lake | None
+        Read from a local lake written by `export_to_lake` instead of the
+        remote datasets (default: the ``PWB_LAKE_DIR`` environment variable).
+        No network access is made.
+    backend : {"pandas", "arrow", "polars"}
+        Engine running the adjustment and conversion steps (see
+        `load_dataset`).
+    source : {"remote", "synthetic"} | None
+        ``"synthetic"`` generates offline prices instead of downloading them
+        (see `load_dataset`; default: the ``PWB_DATA_SOURCE`` environment
+        variable, else ``"remote"``).
 
     Returns
     -------
@@ -965,64 +2208,15 @@ def get_pricing(
         raise ValueError(f"Invalid field(s): {bad}. Allowed: {sorted(ALLOWED_FIELDS)}")
 
     # --------------------------------------------------------------- download
-    # Direct routing for suffixed symbols (skip Universe lookup)
-    SUFFIX_TO_REPO = {
-        "CRP": "paperswithbacktest/Cryptocurrencies-Daily-Price",
-        "STK": "paperswithbacktest/Stocks-Daily-Price",
-        "CMD": "paperswithbacktest/Commodities-Daily-Price",
-        "IDX": "paperswithbacktest/Indices-Daily-Price",
-        "ETF": "paperswithbacktest/ETFs-Daily-Price",
-        "FXR": "paperswithbacktest/Forex-Daily-Price",
-        "BND": "paperswithbacktest/Bonds-Daily-Price",
-    }
-
-    universe = ds.load_dataset(
-        "paperswithbacktest/Universe-Daily-Price",
-        token=_get_hf_token(),
+    df = _load_pricing_frame(
+        symbol_list, start_date, end_date, extend, max_workers, incremental, compact, lake, backend, source
     )
-    mapping = universe["train"].to_pandas()
-    mapping = mapping.set_index("symbol")["repo_id"].to_dict()
-
-    grouped = defaultdict(list)
-    unmapped = []
-
-    for sym in symbol_list:
-        # Case 1: suffixed like "BTC.CRYPTO" → route directly, use base symbol for the dataset
-        if "." in sym:
-            base, cat = sym.rsplit(".", 1)
-            repo_full = SUFFIX_TO_REPO.get(cat.upper())
-            if repo_full:
-                repo_id = repo_full.split("/")[1]  # dataset name only
-                grouped[repo_id].append(base)  # dataset expects base ticker
-                continue
-            # unknown suffix → fall back to Universe mapping on the full symbol
-
-        # Case 2: normal symbol → use Universe mapping
-        repo_full = mapping.get(sym)
-        repo_id = repo_full.split("/")[1] if isinstance(repo_full, str) else None
-        if repo_id:
-            grouped[repo_id].append(sym)
-        else:
-            print(f"Warning: No dataset found for symbol '{sym}'")
-            unmapped.append(sym)
-
-    frames = []
-    for repo_id, syms in grouped.items():
-        ext_flag = extend if repo_id != "Indices-Daily-Price" else False
-        df_part = load_dataset(repo_id, syms, extend=ext_flag)
-        if not df_part.empty:
-            frames.append(df_part)
-
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-
-    df["date"] = pd.to_datetime(df["date"])
-    df.set_index("date", inplace=True)
-    df.sort_index(inplace=True)
-    df = df.loc[start_date:end_date]
 
     # ------------------------------------------------------------- reshape
-    prices = df.pivot_table(values=fields, index=df.index, columns="symbol")
-    prices = prices.swaplevel(axis=1).sort_index(axis=1)
+    # (date, symbol) is unique, so scatter the rows into a (symbol, field)
+    # grid directly instead of running pivot_table's groupby-mean.
+    dtype = np.float32 if compact else np.float64
+    prices = PricePanel.from_long(df, sorted(fields), dtype=dtype, duplicates=duplicates).to_frame()
 
     if keep_single_level:
         if isinstance(prices.columns, pd.MultiIndex):
@@ -1031,3 +2225,128 @@ def get_pricing(
             ]
 
     return prices
+
+
+def get_price_panel(
+    symbol_list,
+    fields=None,
+    start_date="1980-01-01",
+    end_date=None,
+    extend=False,
+    dtype=np.float64,
+    path=None,
+    max_workers=None,
+    incremental=False,
+    compact=False,
+    lake=None,
+    backend="pandas",
+    source=None,
+):
+    """
+    Fetch pricing as a dense :class:`PricePanel` (date × symbol × field).
+
+    Takes the same arguments as :func:`get_pricing`.  Rows are scattered
+    directly into one contiguous array instead of going through a pivot, so
+    per-symbol and per-field access are O(1) views.  With ``path`` the array
+    is written to a memory-mapped file in that directory.  ``compact``
+    only lowers the memory used while loading; the panel dtype is ``dtype``.
+    ``lake`` reads from a local lake (see :func:`export_to_lake`) and
+    ``backend`` picks the transform engine and ``source="synthetic"``
+    generates offline prices (see :func:`load_dataset`).
+    """
+    if fields is None:
+        fields = ["close"]
+    if isinstance(symbol_list, str):
+        symbol_list = [symbol_list]
+    if isinstance(symbol_list, list) and "sp500" in symbol_list:
+        symbol_list.remove("sp500")
+        symbol_list += SP500_SYMBOLS
+    end_date = end_date or date.today().isoformat()
+
+    fields = [f.lower() for f in fields]
+    bad = [f for f in fields if f not in ALLOWED_FIELDS]
+    if bad:
+        raise ValueError(f"Invalid field(s): {bad}. Allowed: {sorted(ALLOWED_FIELDS)}")
+
+    df = _load_pricing_frame(
+        symbol_list, start_date, end_date, extend, max_workers, incremental, compact, lake, backend, source
+    )
+    return PricePanel.from_long(df, fields, dtype=dtype, path=path)
+
+
+def _catalog_table(files):
+    """Per-symbol row count and date range of cached parquet files."""
+    tables = []
+    for part in files:
+        dataset = pads.dataset(str(part), format="parquet")
+        if "symbol" not in dataset.schema.names:
+            raise ValueError(f"{part.parent.parent.name} has no 'symbol' column")
+        columns = [c for c in ("symbol", "date") if c in dataset.schema.names]
+        tables.append(dataset.to_table(columns=columns))
+    table = merge_tables(tables) if len(tables) > 1 else tables[0]
+    aggregations = [("symbol", "count")]
+    if "date" in table.column_names:
+        aggregations = [("date", "min"), ("date", "max")] + aggregations
+    summary = table.group_by("symbol", use_threads=False).aggregate(aggregations)
+    names = {"date_min": "first_date", "date_max": "last_date", "symbol_count": "rows"}
+    summary = summary.rename_columns([names.get(name, name) for name in summary.column_names])
+    columns = [c for c in ("symbol", "first_date", "last_date", "rows") if c in summary.column_names]
+    return summary.select(columns).sort_by("symbol")
+
+
+def catalog(path, use_hf=False, refresh=False, incremental=False):
+    """
+    Summarise the symbols of a dataset without loading its prices.
+
+    Returns one row per symbol with its ``first_date``, ``last_date`` and
+    number of ``rows``.  The summary is computed from the ``symbol`` and
+    ``date`` columns of the cached files and kept in a small sidecar next to
+    the cache, reused until the dataset changes; later calls only read the
+    sidecar.  ``use_hf``, ``refresh`` and ``incremental`` behave as in
+    :func:`load_dataset`.
+    """
+    split = "train"
+    files = _get_cached_files(path, split=split, use_hf=use_hf, refresh=refresh, incremental=incremental)
+    cache = DatasetCache()
+    fingerprint = (cache.read_meta(path, split) or {}).get("fingerprint", "")
+    sidecar = cache.root / path / f"catalog-{split}.parquet"
+    try:
+        table = pq.read_table(sidecar)
+    except (OSError, pa.ArrowInvalid):
+        table = None
+    if table is None or (table.schema.metadata or {}).get(b"fingerprint") != fingerprint.encode():
+        table = _catalog_table(files)
+        table = table.replace_schema_metadata({"fingerprint": fingerprint})
+        tmp = sidecar.with_name(f".{sidecar.name}.tmp-{uuid.uuid4().hex}")
+        pq.write_table(table, tmp)
+        os.replace(tmp, sidecar)
+    return table.replace_schema_metadata(None).to_pandas()
+
+
+_liquidity_indexes = {}
+_liquidity_lock = threading.Lock()
+
+
+def get_liquidity_index(window=20, path="Stocks-Daily-Price", refresh=False, use_hf=False):
+    """
+    Return the rolling dollar-volume index of a daily-price dataset.
+
+    The index (see :mod:`pwb_toolbox.datasets.liquidity`) is stored next to
+    the dataset cache.  The first call in a process brings the cached dataset
+    up to date (incrementally) and indexes the new dates only; later calls
+    reuse it without touching the remote.  ``refresh=True`` rebuilds it.
+    """
+    key = (path, int(window))
+    with _liquidity_lock:
+        index = _liquidity_indexes.get(key)
+        if index is not None and not refresh:
+            return index
+        split = "train"
+        files = _get_cached_files(path, split=split, use_hf=use_hf, incremental=True)
+        cache = DatasetCache()
+        if len(files) > 1:
+            files = cache.compact(path, split)
+        index = LiquidityIndex(cache.root / path / f"liquidity-{int(window)}", window)
+        index.update(files[0], cache.read_meta(path, split)["fingerprint"], rebuild=refresh)
+        _liquidity_indexes[key] = index
+        return index
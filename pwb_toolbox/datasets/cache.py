@@ -0,0 +1,333 @@
+"""Persistent on-disk Parquet cache for the datasets served by ``load_dataset``.
+
+Every cached dataset lives in ``<root>/<dataset>/<split>/`` and contains the
+raw rows as Parquet files plus a ``meta.json`` describing the entry::
+
+    {
+        "cache_version": 2,
+        "dataset": "Stocks-Daily-Price",
+        "split": "train",
+        "fingerprint": "<hash of the remote file list / ETags>",
+        "created": 1700000000.0,
+        "last_access": 1700000000.0,
+        "size": 123456789
+    }
+
+Rows are stored sorted by ``symbol`` then ``date`` (with ``date`` cast to a
+``date32`` column) in small row groups, so that symbol and date filters can
+be pushed down into the Parquet scan and prune most row groups.
+
+An entry is valid as long as its ``fingerprint`` matches the one computed
+from the remote file listing.  When the total size of the cache exceeds the
+configured limit, the least recently used entries are evicted.
+
+Incremental refreshes add the rows of the remote files that changed as extra
+``part-NNNNN.parquet`` files.  Readers merge the parts in write order, the
+last row for a ``(symbol, date)`` winning, and an entry is compacted back into
+a single part once it has more than ``COMPACT_PARTS`` of them.  ``meta.json``
+then also carries a ``files`` manifest mapping every remote file to the tag
+(ETag or blob id) it had when it was last downloaded.
+
+Configuration
+-------------
+``PWB_CACHE_DIR``
+    Root directory of the cache (default ``~/.cache/pwb_toolbox/datasets``).
+``PWB_CACHE_MAX_SIZE``
+    Size limit, either in bytes or with a ``K``/``M``/``G``/``T`` suffix
+    (default ``20G``).
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+CACHE_VERSION = 2
+# Small row groups keep the per-group symbol/date statistics selective, so
+# filtered reads can skip most of the file.
+ROW_GROUP_SIZE = 64 * 1024
+# Number of delta parts an entry may accumulate before it is rewritten.
+COMPACT_PARTS = 8
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "pwb_toolbox" / "datasets"
+DEFAULT_MAX_SIZE = "20G"
+
+_META_FILE = "meta.json"
+_MANAGED_KEYS = {"cache_version", "dataset", "split", "fingerprint", "created", "last_access", "size"}
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def get_cache_dir() -> Path:
+    """Return the cache root, honouring ``PWB_CACHE_DIR``."""
+    return Path(os.getenv("PWB_CACHE_DIR") or DEFAULT_CACHE_DIR).expanduser()
+
+
+def _parse_size(value: str | int) -> int:
+    if isinstance(value, int):
+        return value
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", str(value).upper())
+    if not m:
+        raise ValueError(f"Invalid cache size: {value!r}")
+    return int(float(m.group(1)) * _SIZE_UNITS[m.group(2)])
+
+
+def get_cache_max_size() -> int:
+    """Return the cache size limit in bytes, honouring ``PWB_CACHE_MAX_SIZE``."""
+    return _parse_size(os.getenv("PWB_CACHE_MAX_SIZE") or DEFAULT_MAX_SIZE)
+
+
+def _prepare_table(table: pa.Table) -> pa.Table:
+    """Normalise ``date`` to ``date32`` and sort rows by symbol and date."""
+    names = table.column_names
+    if "date" in names and not pa.types.is_date32(table.schema.field("date").type):
+        try:
+            dates = pc.cast(table["date"], pa.date32(), safe=False)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+        else:
+            table = table.set_column(names.index("date"), "date", dates)
+    keys = [(key, "ascending") for key in ("symbol", "date") if key in names]
+    if keys:
+        table = table.sort_by(keys)
+    return table
+
+
+def merge_tables(tables: list[pa.Table]) -> pa.Table:
+    """Concatenate cache parts, keeping the last row of every ``(symbol, date)``."""
+    table = pa.concat_tables(tables, promote_options="default")
+    if len(tables) > 1 and {"symbol", "date"} <= set(table.column_names):
+        table = table.append_column("__row", pa.array(range(len(table)), pa.int64()))
+        last = table.group_by(["symbol", "date"], use_threads=False).aggregate([("__row", "max")])
+        table = table.take(last["__row_max"]).drop_columns(["__row"])
+    return _prepare_table(table)
+
+
+def symbol_chunks(batches, chunk_rows):
+    """Regroup symbol-sorted record batches into tables of whole symbols.
+
+    Each table holds about `chunk_rows` rows, more only when one symbol does.
+    """
+    table = None
+    for batch in itertools.chain(batches, [None]):
+        if batch is not None:
+            if not batch.num_rows:
+                continue
+            batch = pa.Table.from_batches([batch])
+            table = batch if table is None else pa.concat_tables([table, batch])
+            if table.num_rows < chunk_rows:
+                continue
+        while table is not None and table.num_rows:
+            symbol = table["symbol"]
+            # Row positions where a new symbol starts
+            starts = np.flatnonzero(
+                pc.not_equal(symbol.slice(1), symbol.slice(0, len(symbol) - 1)).to_numpy()
+            ) + 1
+            fits = starts[starts <= chunk_rows]
+            cut = fits[-1] if len(fits) else (starts[0] if len(starts) else 0)
+            if batch is None and (not cut or table.num_rows <= chunk_rows):
+                cut = table.num_rows  # end of data: the last symbol is complete
+            if not cut:
+                break
+            yield table.slice(0, cut)
+            table = table.slice(cut)
+            if batch is not None and table.num_rows < chunk_rows:
+                break
+
+
+def _part_name(index: int) -> str:
+    return f"part-{index:05d}.parquet"
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class DatasetCache:
+    """Versioned Parquet store keyed by dataset name, split and fingerprint."""
+
+    def __init__(self, root: str | Path | None = None, max_size: str | int | None = None):
+        self.root = Path(root).expanduser() if root is not None else get_cache_dir()
+        self.max_size = (
+            _parse_size(max_size) if max_size is not None else get_cache_max_size()
+        )
+
+    # ------------------------------------------------------------------ paths
+    def entry_dir(self, name: str, split: str) -> Path:
+        return self.root / name / split
+
+    def files(self, name: str, split: str) -> list[Path]:
+        """Parquet files of an entry, in write order."""
+        return sorted(self.entry_dir(name, split).glob("*.parquet"))
+
+    # ------------------------------------------------------------------- meta
+    def read_meta(self, name: str, split: str) -> dict | None:
+        path = self.entry_dir(name, split) / _META_FILE
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("cache_version") != CACHE_VERSION:
+            return None
+        return meta
+
+    def _write_meta(self, entry: Path, meta: dict) -> None:
+        tmp = entry / f".{_META_FILE}.{uuid.uuid4().hex}"
+        tmp.write_text(json.dumps(meta, indent=2))
+        os.replace(tmp, entry / _META_FILE)
+
+    def touch(self, name: str, split: str) -> None:
+        meta = self.read_meta(name, split)
+        if meta is not None:
+            meta["last_access"] = time.time()
+            self._write_meta(self.entry_dir(name, split), meta)
+
+    # ---------------------------------------------------------------- lookup
+    def get(self, name: str, split: str, fingerprint: str | None = None) -> list[Path] | None:
+        """Return the Parquet files of a valid entry, or ``None`` on a miss.
+
+        With ``fingerprint=None`` any readable entry is returned, which is
+        used as an offline fallback when the remote cannot be reached.
+        """
+        meta = self.read_meta(name, split)
+        if meta is None:
+            return None
+        if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+            return None
+        files = self.files(name, split)
+        if not files:
+            return None
+        self.touch(name, split)
+        return files
+
+    def put(self, name: str, split: str, fingerprint: str, table: pa.Table, **extra) -> list[Path]:
+        """Atomically replace the entry for ``name``/``split`` with ``table``."""
+        entry = self.entry_dir(name, split)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        staging = entry.parent / f".{split}.tmp-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            pq.write_table(
+                _prepare_table(table),
+                staging / _part_name(0),
+                row_group_size=ROW_GROUP_SIZE,
+            )
+            now = time.time()
+            meta = {
+                "cache_version": CACHE_VERSION,
+                "dataset": name,
+                "split": split,
+                "fingerprint": fingerprint,
+                "created": now,
+                "last_access": now,
+                "size": _dir_size(staging),
+                **extra,
+            }
+            self._write_meta(staging, meta)
+            self._swap(staging, entry)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict(keep=entry)
+        return self.files(name, split)
+
+    def append(self, name: str, split: str, fingerprint: str, table: pa.Table | None, **extra) -> list[Path]:
+        """Add ``table`` as a new part of an existing entry and update its meta.
+
+        Rows of the new part supersede older rows with the same symbol and
+        date (see :func:`merge_tables`).  An empty or ``None`` table only
+        updates the meta.  The entry is compacted once it holds more than
+        ``COMPACT_PARTS`` parts.
+        """
+        entry = self.entry_dir(name, split)
+        meta = self.read_meta(name, split)
+        if meta is None:
+            raise FileNotFoundError(f"No cache entry for {name}/{split}")
+        parts = self.files(name, split)
+        if table is not None and table.num_rows:
+            index = int(parts[-1].stem.rsplit("-", 1)[-1]) + 1 if parts else 0
+            tmp = entry / f".{_part_name(index)}.tmp-{uuid.uuid4().hex}"
+            try:
+                pq.write_table(_prepare_table(table), tmp, row_group_size=ROW_GROUP_SIZE)
+                os.replace(tmp, entry / _part_name(index))
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            parts = self.files(name, split)
+        meta.update(extra)
+        meta.update(fingerprint=fingerprint, last_access=time.time(), size=_dir_size(entry))
+        self._write_meta(entry, meta)
+        if len(parts) > COMPACT_PARTS:
+            return self.compact(name, split)
+        self.evict(keep=entry)
+        return self.files(name, split)
+
+    def compact(self, name: str, split: str) -> list[Path]:
+        """Rewrite a multi-part entry as a single deduplicated part."""
+        meta = self.read_meta(name, split)
+        parts = self.files(name, split)
+        if meta is None or len(parts) <= 1:
+            return parts
+        table = merge_tables([pq.read_table(part) for part in parts])
+        extra = {k: v for k, v in meta.items() if k not in _MANAGED_KEYS}
+        return self.put(name, split, meta["fingerprint"], table, **extra)
+
+    @staticmethod
+    def _swap(staging: Path, entry: Path) -> None:
+        trash = None
+        if entry.exists():
+            trash = entry.parent / f".{entry.name}.old-{uuid.uuid4().hex}"
+            os.replace(entry, trash)
+        os.replace(staging, entry)
+        if trash is not None:
+            shutil.rmtree(trash, ignore_errors=True)
+
+    # -------------------------------------------------------------- eviction
+    def entries(self) -> list[tuple[Path, dict]]:
+        found = []
+        if not self.root.exists():
+            return found
+        for meta_path in self.root.glob(f"*/*/{_META_FILE}"):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            found.append((meta_path.parent, meta))
+        return found
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        """Drop least recently used entries until the cache fits its limit."""
+        entries = sorted(self.entries(), key=lambda e: e[1].get("last_access", 0))
+        total = sum(meta.get("size", 0) for _, meta in entries)
+        removed = []
+        for entry, meta in entries:
+            if total <= self.max_size:
+                break
+            if keep is not None and entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            if not any(entry.parent.iterdir()):
+                entry.parent.rmdir()
+            total -= meta.get("size", 0)
+            removed.append(entry)
+        return removed
+
+    def clear(self, name: str | None = None) -> None:
+        """Remove one dataset (or the whole cache) from disk."""
+        target = self.root / name if name else self.root
+        shutil.rmtree(target, ignore_errors=True)
+
+
+def clear_cache(name: str | None = None) -> None:
+    """Remove ``name`` (or every dataset) from the local dataset cache."""
+    DatasetCache().clear(name)
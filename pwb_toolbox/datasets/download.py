@@ -0,0 +1,250 @@
+"""Resumable, verified, parallel download of dataset files.
+
+:func:`download_files` fetches a list of URLs into a directory with a bounded
+pool of worker threads sharing one HTTP connection pool.  Each file is first
+written to ``<name>.part``; an interrupted transfer is resumed from the bytes
+already on disk with an HTTP ``Range`` request (guarded by ``If-Range`` so a
+file that changed in the meantime is fetched again from scratch).
+
+Completed files are checked before being moved into place:
+
+* their size must match ``Content-Length`` / ``Content-Range``;
+* when the ``ETag`` is a plain MD5 (as served by S3 for single-part
+  uploads), the MD5 of the content must match it;
+* Parquet files must start and end with the ``PAR1`` magic bytes.
+
+A ``manifest.json`` in the directory records the tag, size and SHA-256 of
+every completed file, so a file whose tag is unchanged is not downloaded
+again as long as its bytes on disk still match the manifest.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+MAX_DOWNLOAD_WORKERS = 8
+CHUNK_SIZE = 64 * 1024
+RETRIES = 5
+BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+_MANIFEST_FILE = "manifest.json"
+_MD5_ETAG = re.compile(r'^(?:W/)?"?([0-9a-fA-F]{32})"?$')
+_PARQUET_MAGIC = b"PAR1"
+
+
+class DownloadError(IOError):
+    """A file could not be downloaded or failed verification."""
+
+
+def file_name(url: str) -> str:
+    """Local file name of `url`: a hash of its path plus its last segment.
+
+    The hash keeps files with the same name in different remote folders
+    apart; the query string (e.g. a signature) is ignored.
+    """
+    path = url.split("?", 1)[0]
+    digest = hashlib.sha1(path.encode()).hexdigest()[:10]
+    return f"{digest}-{path.rstrip('/').rsplit('/', 1)[-1]}"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_session(max_workers: int = MAX_DOWNLOAD_WORKERS) -> requests.Session:
+    """Session whose connection pool holds at most `max_workers` connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """Process-wide session, so tag lookups and downloads reuse connections."""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = make_session()
+        return _shared_session
+
+
+class _Manifest:
+    """Thread-safe ``manifest.json`` of the completed files of a directory."""
+
+    def __init__(self, root: Path):
+        self.path = root / _MANIFEST_FILE
+        self._lock = threading.Lock()
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, name: str) -> dict | None:
+        with self._lock:
+            return self.entries.get(name)
+
+    def set(self, name: str, entry: dict) -> None:
+        with self._lock:
+            self.entries[name] = entry
+            tmp = self.path.with_name(f".{_MANIFEST_FILE}.{uuid.uuid4().hex}")
+            tmp.write_text(json.dumps(self.entries, indent=2))
+            os.replace(tmp, self.path)
+
+
+def _verify(path: Path, size: int | None, etag: str | None) -> None:
+    actual = path.stat().st_size
+    if size is not None and actual != size:
+        raise DownloadError(f"{path.name}: expected {size} bytes, got {actual}")
+    match = _MD5_ETAG.match(etag or "")
+    if match and _md5(path) != match.group(1).lower():
+        raise DownloadError(f"{path.name}: MD5 does not match ETag {etag}")
+    if path.name.removesuffix(".part").endswith(".parquet"):
+        with open(path, "rb") as f:
+            head = f.read(4)
+            f.seek(max(actual - 4, 0))
+            tail = f.read(4)
+        if head != _PARQUET_MAGIC or tail != _PARQUET_MAGIC:
+            raise DownloadError(f"{path.name}: not a complete parquet file")
+
+
+def _expected_size(resp: requests.Response, offset: int) -> int | None:
+    if resp.status_code == 206:
+        total = resp.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    return int(length) if length is not None and length.isdigit() else None
+
+
+def _fetch(session, url: str, target: Path, timeout: float) -> dict:
+    """Download `url` to `target`, resuming from ``target.part`` if present."""
+    partial = target.with_name(target.name + ".part")
+    tag_file = target.with_name(target.name + ".part.etag")
+    offset = partial.stat().st_size if partial.exists() else 0
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if tag_file.exists():
+            headers["If-Range"] = tag_file.read_text()
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 416:  # nothing left to fetch, or stale partial
+            partial.unlink(missing_ok=True)
+            raise DownloadError(f"{target.name}: range not satisfiable, restarting")
+        resp.raise_for_status()
+        etag = resp.headers.get("ETag")
+        if resp.status_code != 206:
+            offset = 0  # server ignored the range or the file changed
+        size = _expected_size(resp, offset)
+        if etag:
+            tag_file.write_text(etag)
+        with open(partial, "ab" if offset else "wb") as f:
+            for block in resp.iter_content(CHUNK_SIZE):
+                f.write(block)
+
+    try:
+        _verify(partial, size, etag)
+    except DownloadError:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, target)
+    tag_file.unlink(missing_ok=True)
+    return {"url": url.split("?", 1)[0], "tag": etag, "size": target.stat().st_size, "sha256": _sha256(target)}
+
+
+def download_files(
+    urls: list[str],
+    dest: str | Path,
+    tags: dict[str, str] | None = None,
+    max_workers: int = MAX_DOWNLOAD_WORKERS,
+    session: requests.Session | None = None,
+    retries: int = RETRIES,
+    timeout: float = 60,
+    progress: bool = True,
+) -> list[Path]:
+    """
+    Download `urls` into `dest` concurrently and return the local paths.
+
+    Parameters
+    ----------
+    urls : list[str]
+        Files to fetch, stored under :func:`file_name`.
+    dest : str | Path
+        Target directory; also holds the partial files and the manifest.
+    tags : dict[str, str] | None
+        Current tag (ETag) of each URL without its query string.  A file
+        already in `dest` with the same tag and intact bytes is not fetched
+        again.  Without tags every file is fetched.
+    max_workers : int
+        Number of concurrent downloads and size of the connection pool.
+    retries : int
+        Attempts per file; each one resumes where the previous stopped.
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    manifest = _Manifest(dest)
+    tags = tags or {}
+    own_session = session is None
+    session = session or make_session(max_workers)
+
+    def fetch(url: str) -> Path:
+        name = file_name(url)
+        target = dest / name
+        tag = tags.get(url.split("?", 1)[0])
+        entry = manifest.get(name)
+        if (
+            tag is not None
+            and entry is not None
+            and entry.get("tag") == tag
+            and target.exists()
+            and target.stat().st_size == entry.get("size")
+            and _sha256(target) == entry.get("sha256")
+        ):
+            return target
+        delay = BACKOFF
+        for attempt in range(1, retries + 1):
+            try:
+                manifest.set(name, _fetch(session, url, target, timeout))
+                return target
+            except (requests.RequestException, DownloadError, OSError) as exc:
+                if attempt == retries:
+                    raise DownloadError(f"Failed to download {name} after {retries} attempts: {exc}") from exc
+                time.sleep(delay)
+                delay *= 2
+
+    try:
+        if progress:
+            print(f"Downloading {len(urls)} files with {max_workers} connections...")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls) or 1))) as pool:
+            return list(pool.map(fetch, urls))
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,217 @@
+"""Local, Hive-partitioned copy of the daily-price datasets.
+
+:func:`pwb_toolbox.datasets.export_to_lake` writes every dataset of
+``DAILY_PRICE_DATASETS`` under one root, already adjusted, converted to USD
+and with bond yields turned into prices::
+
+    <root>/_lake.json
+    <root>/asset_class=Stocks/symbol=AAPL/part-0-0.parquet
+    <root>/asset_class=ETFs/symbol=SPY/part-0-0.parquet
+    ...
+
+or, with ``partitioning="year"``, ``asset_class=Stocks/year=2020/...``.
+``_lake.json`` records the layout, the symbols of every dataset and the cache
+fingerprints the lake was exported from.
+
+:class:`Lake` reads it back with partition pruning and without any network
+access, so a lake on shared storage can serve many backtest processes:
+``get_pricing(..., lake=root)`` or ``PWB_LAKE_DIR=<root>``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import shutil
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+
+
+LAKE_VERSION = 1
+PARTITIONINGS = ("symbol", "year")
+
+_META_FILE = "_lake.json"
+_SUFFIX = "-Daily-Price"
+
+
+def asset_class(path: str) -> str:
+    """Partition value of a dataset, e.g. ``"Stocks"`` for Stocks-Daily-Price."""
+    return path[: -len(_SUFFIX)] if path.endswith(_SUFFIX) else path
+
+
+def get_lake_dir() -> Path | None:
+    """Return the lake root set with ``PWB_LAKE_DIR``, if any."""
+    root = os.getenv("PWB_LAKE_DIR")
+    return Path(root).expanduser() if root else None
+
+
+class Lake:
+    """Reader (and writer) of a lake directory."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root).expanduser()
+        self._meta = None
+        self._datasets = {}
+
+    # ------------------------------------------------------------------ meta
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            try:
+                meta = json.loads((self.root / _META_FILE).read_text())
+            except (OSError, ValueError):
+                meta = {}
+            if meta and meta.get("lake_version") != LAKE_VERSION:
+                raise ValueError(f"{self.root} was written by an incompatible version")
+            self._meta = meta or {"lake_version": LAKE_VERSION, "datasets": {}}
+        return self._meta
+
+    def _write_meta(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{_META_FILE}.{uuid.uuid4().hex}"
+        tmp.write_text(json.dumps(self.meta, indent=2))
+        os.replace(tmp, self.root / _META_FILE)
+
+    @property
+    def datasets(self) -> list[str]:
+        return list(self.meta["datasets"])
+
+    def symbols(self, path: str) -> list[str]:
+        return self.meta["datasets"][path]["symbols"]
+
+    def resolve(self, symbol_list) -> dict[str, list[str]]:
+        """Group `symbol_list` by dataset, like :func:`resolve_symbols`.
+
+        Currency pairs are stored quoted against USD, so ``"USDJPY"`` is
+        found as ``"JPYUSD"``.
+        """
+        index = {s: path for path in self.datasets for s in self.symbols(path)}
+        grouped = {}
+        for symbol in symbol_list:
+            path = index.get(symbol)
+            if path is None and len(symbol) == 6 and index.get(symbol[3:] + symbol[:3]) == "Forex-Daily-Price":
+                path = "Forex-Daily-Price"
+            if path is None:
+                print(f"Warning: symbol '{symbol}' is not in the lake {self.root}.")
+                continue
+            grouped.setdefault(path, []).append(symbol)
+        return grouped
+
+    # ----------------------------------------------------------------- write
+    def write(self, path: str, chunks, partitioning: str = "symbol", fingerprint: str | None = None) -> int:
+        """Replace dataset `path` with the DataFrame `chunks`; returns the row count."""
+        if partitioning not in PARTITIONINGS:
+            raise ValueError(f"partitioning must be one of {PARTITIONINGS}, got {partitioning!r}")
+        target = self.root / f"asset_class={asset_class(path)}"
+        staging = self.root / f".asset_class={asset_class(path)}.tmp-{uuid.uuid4().hex}"
+        keys = pa.schema([("symbol", pa.string())] if partitioning == "symbol" else [("year", pa.int32())])
+        rows, symbols = 0, set()
+        try:
+            for i, df in enumerate(chunks):
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if "date" in table.column_names:
+                    table = table.set_column(
+                        table.column_names.index("date"), "date", pc.cast(table["date"], pa.date32())
+                    )
+                if partitioning == "year":
+                    table = table.append_column("year", pc.cast(pc.year(table["date"]), pa.int32()))
+                pads.write_dataset(
+                    table,
+                    staging,
+                    format="parquet",
+                    partitioning=pads.partitioning(keys, flavor="hive"),
+                    basename_template=f"part-{i}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+                rows += table.num_rows
+                symbols.update(pc.unique(table["symbol"]).to_pylist())
+            if target.exists():
+                trash = self.root / f".{target.name}.old-{uuid.uuid4().hex}"
+                os.replace(target, trash)
+                shutil.rmtree(trash, ignore_errors=True)
+            if staging.exists():
+                os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.meta["datasets"][path] = {
+            "asset_class": asset_class(path),
+            "partitioning": partitioning,
+            "symbols": sorted(symbols),
+            "rows": rows,
+            "fingerprint": fingerprint,
+            "exported": time.time(),
+        }
+        self._write_meta()
+        self._datasets.pop(path, None)
+        return rows
+
+    # ------------------------------------------------------------------ read
+    def dataset(self, path: str) -> pads.Dataset:
+        """Arrow dataset of one asset class, with its Hive partition keys."""
+        if path not in self._datasets:
+            if path not in self.meta["datasets"]:
+                raise KeyError(f"'{path}' is not in the lake {self.root}")
+            self._datasets[path] = pads.dataset(
+                self.root / f"asset_class={asset_class(path)}", format="parquet", partitioning="hive"
+            )
+        return self._datasets[path]
+
+    def scan(self, path: str, symbols=None, start_date=None, end_date=None) -> pa.Table:
+        """Rows of `path`, sorted by symbol and date, with ``symbol`` first.
+
+        Only the partitions (symbol or year directories) matching the request
+        are opened.
+        """
+        dataset = self.dataset(path)
+        by_year = "year" in dataset.schema.names
+        expressions = []
+        if symbols is not None:
+            expressions.append(pc.field("symbol").isin(list(symbols)))
+        if start_date is not None:
+            start = pd.Timestamp(start_date)
+            expressions.append(pc.field("date") >= pa.scalar(start.date(), pa.date32()))
+            if by_year:
+                expressions.append(pc.field("year") >= start.year)
+        if end_date is not None:
+            end = pd.Timestamp(end_date)
+            expressions.append(pc.field("date") <= pa.scalar(end.date(), pa.date32()))
+            if by_year:
+                expressions.append(pc.field("year") <= end.year)
+        row_filter = None
+        for expression in expressions:
+            row_filter = expression if row_filter is None else row_filter & expression
+
+        table = dataset.to_table(filter=row_filter)
+        columns = ["symbol"] + [c for c in table.column_names if c not in ("symbol", "year")]
+        return table.select(columns).sort_by([("symbol", "ascending"), ("date", "ascending")])
+
+
+_open_lakes = {}
+
+
+def open_lake(root: str | Path | None = None) -> Lake:
+    """
+    Open the lake at `root` (default ``PWB_LAKE_DIR``).
+
+    Lakes are kept open for the life of the process, so partition discovery
+    happens once; an export to the same root is picked up on the next call.
+    """
+    root = root if root is not None else get_lake_dir()
+    if root is None:
+        raise ValueError("Pass a lake root or set PWB_LAKE_DIR.")
+    root = Path(root).expanduser().resolve()
+    try:
+        stamp = (root / _META_FILE).stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No lake at {root}; create one with export_to_lake().") from None
+    cached = _open_lakes.get(root)
+    if cached is None or cached[0] != stamp:
+        cached = _open_lakes[root] = (stamp, Lake(root))
+    return cached[1]
@@ -0,0 +1,245 @@
+"""Rolling dollar-volume index kept next to the dataset cache.
+
+For every symbol and date of a daily-price dataset the index stores the mean
+``volume * close`` over the symbol's last ``window`` bars.  Both are the
+unadjusted values: back-adjusted prices depend on splits and dividends that
+happen after the date, which would shrink older dollar volumes and bias
+point-in-time rankings.  It lives in
+``<cache root>/<dataset>/liquidity-<window>/``::
+
+    index.json          {"version": 3, "window": 20, "fingerprint": "...", "parts": 2, "dates": [...],
+                         "first": {"AAPL": ..., ...}}
+    part-00000.parquet  symbol, date, dollar_volume (sorted by date)
+    part-00001.parquet  ...
+
+Each part holds a block of symbols sorted by date, so a point-in-time lookup
+reads a single row group per part.  The index is built by streaming the
+cached dataset one block of symbols at a time.  When the cached dataset
+changes, only the dates after the last indexed one, and the whole history of
+new symbols, are computed and written as new parts.  The first date of every
+symbol is kept in ``first``: a symbol whose history was backfilled or that
+disappeared triggers a rebuild.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+import json
+import os
+from pathlib import Path
+import shutil
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+
+from .cache import symbol_chunks
+
+
+INDEX_VERSION = 3  # 1 ranked by adjusted close, 2 had no first dates
+_INDEX_FILE = "index.json"
+# Extra bars read before the last indexed date on an update, in multiples of
+# the window, so symbols with a few missing days still see a full window.
+_LOOKBACK_WINDOWS = 4
+_READ_BATCH = 64 * 1024
+_CHUNK_ROWS = 2_000_000
+
+
+def _rolling_mean(values, starts, window):
+    """Trailing mean over at most `window` rows that restarts at each group.
+
+    ``starts`` holds, for every row, the position of the first row of its
+    group.  NaN values are skipped.
+    """
+    valid = ~np.isnan(values)
+    total = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    count = np.concatenate([[0], np.cumsum(valid)])
+    stop = np.arange(1, len(values) + 1)
+    begin = np.maximum(stop - window, starts)
+    n = count[stop] - count[begin]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (total[stop] - total[begin]) / n, np.nan)
+
+
+def _dollar_volume(table, window):
+    """Rolling dollar volume of a symbol/date sorted table."""
+    symbols = table["symbol"]
+    if len(symbols) == 0:
+        return pa.table({"symbol": symbols, "date": table["date"], "dollar_volume": pa.array([], pa.float64())})
+    codes = pc.dictionary_encode(symbols).combine_chunks().indices.to_numpy()
+    new_group = np.concatenate([[True], codes[1:] != codes[:-1]])
+    starts = np.maximum.accumulate(np.where(new_group, np.arange(len(codes)), 0))
+    values = (
+        pc.multiply(pc.cast(table["volume"], pa.float64()), pc.cast(table["close"], pa.float64()))
+        .to_numpy(zero_copy_only=False)
+        .astype(np.float64)
+    )
+    return pa.table(
+        {
+            "symbol": symbols,
+            "date": table["date"],
+            "dollar_volume": _rolling_mean(values, starts, window),
+        }
+    )
+
+
+def _first_dates(dataset) -> dict[str, int]:
+    """First date (as an ordinal) of every symbol of `dataset`."""
+    first = {}
+    for batch in dataset.to_batches(columns=["symbol", "date"], batch_size=_READ_BATCH):
+        table = pa.Table.from_batches([batch]).group_by("symbol").aggregate([("date", "min")])
+        for symbol, day in zip(table["symbol"].to_pylist(), table["date_min"].to_pylist()):
+            day = day.toordinal()
+            if first.get(symbol, day) >= day:
+                first[symbol] = day
+    return first
+
+
+class LiquidityIndex:
+    """Rolling average dollar volume per symbol and date, stored on disk."""
+
+    def __init__(self, root: str | Path, window: int = 20):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = int(window)
+        self.root = Path(root)
+        self._meta = None
+
+    # ------------------------------------------------------------------ meta
+    @property
+    def meta(self) -> dict | None:
+        if self._meta is None:
+            try:
+                self._meta = json.loads((self.root / _INDEX_FILE).read_text())
+            except (OSError, ValueError):
+                return None
+        return self._meta
+
+    @property
+    def fingerprint(self) -> str | None:
+        return self.meta.get("fingerprint") if self.meta else None
+
+    @property
+    def dates(self) -> list[date]:
+        return [date.fromordinal(d) for d in self.meta["dates"]] if self.meta else []
+
+    def _write_meta(self, meta: dict) -> None:
+        tmp = self.root / f".{_INDEX_FILE}.{uuid.uuid4().hex}"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.root / _INDEX_FILE)
+        self._meta = meta
+
+    def parts(self) -> list[Path]:
+        return sorted(self.root.glob("part-*.parquet"))
+
+    # ---------------------------------------------------------------- update
+    def update(self, source: str | Path, fingerprint: str, rebuild: bool = False) -> None:
+        """Bring the index in line with `source`, a symbol/date sorted cache file.
+
+        Only the dates after the last indexed one and the new symbols are
+        computed, unless `rebuild` is set, the index was built with another
+        window or version, or a symbol's first date changed or it is gone.
+        """
+        reusable = (
+            not rebuild
+            and self.meta
+            and self.meta.get("window") == self.window
+            and self.meta.get("version") == INDEX_VERSION
+        )
+        if reusable and self.fingerprint == fingerprint:
+            return
+        dataset = pads.dataset(str(source), format="parquet")
+        first = _first_dates(dataset)
+        known, start, last, added = [], None, None, []
+        if reusable:
+            stored = self.meta["first"]
+            # A backfilled or removed symbol changes already indexed dates
+            reusable = all(first.get(symbol) == day for symbol, day in stored.items())
+            added = sorted(set(first) - set(stored))
+        if reusable:
+            known = self.meta["dates"]
+            # Drop parts left behind by an interrupted update
+            for part in self.parts()[self.meta.get("parts", 0):]:
+                part.unlink()
+            if known:
+                start = date.fromordinal(known[max(0, len(known) - _LOOKBACK_WINDOWS * self.window)])
+                last = date.fromordinal(known[-1])
+        else:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._meta = None
+
+        columns = [c for c in ("symbol", "date", "close", "volume") if c in dataset.schema.names]
+        row_filter = keep = None
+        if start is not None:
+            # The lookback of the known symbols and the whole history of the new ones
+            row_filter = pc.field("date") >= pa.scalar(start, pa.date32())
+            keep = pc.field("date") > pa.scalar(last, pa.date32())
+            if added:
+                row_filter |= pc.field("symbol").isin(added)
+                keep |= pc.field("symbol").isin(added)
+        batches = dataset.to_batches(columns=columns, filter=row_filter, batch_size=_READ_BATCH)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        number = len(self.parts())
+        new_dates = set()
+        for chunk in symbol_chunks(batches, _CHUNK_ROWS):
+            index = _dollar_volume(chunk, self.window)
+            if keep is not None:
+                index = index.filter(keep)
+            if not index.num_rows:
+                continue
+            # Each part is sorted by date so a lookup reads one row group per part.
+            index = index.sort_by([("date", "ascending"), ("symbol", "ascending")])
+            tmp = self.root / f".part-{number:05d}.parquet.tmp-{uuid.uuid4().hex}"
+            pq.write_table(index, tmp, row_group_size=_READ_BATCH)
+            os.replace(tmp, self.root / f"part-{number:05d}.parquet")
+            number += 1
+            new_dates.update(d.toordinal() for d in pc.unique(index["date"]).to_pylist())
+        self._write_meta(
+            {
+                "version": INDEX_VERSION,
+                "window": self.window,
+                "fingerprint": fingerprint,
+                "parts": number,
+                "dates": sorted(set(known) | new_dates),
+                "first": first,
+            }
+        )
+
+    # ----------------------------------------------------------------- query
+    def as_of(self, as_of=None) -> date | None:
+        """Last indexed date on or before `as_of` (default: the last one)."""
+        known = self.meta["dates"] if self.meta else []
+        if not known:
+            return None
+        if as_of is None:
+            return date.fromordinal(known[-1])
+        target = np.searchsorted(known, _to_date(as_of).toordinal(), side="right")
+        return date.fromordinal(known[target - 1]) if target else None
+
+    def snapshot(self, as_of=None) -> pa.Table:
+        """``symbol``/``dollar_volume`` rows of the last date on or before `as_of`."""
+        day = self.as_of(as_of)
+        if day is None or not self.parts():
+            return pa.table({"symbol": pa.array([], pa.string()), "dollar_volume": pa.array([], pa.float64())})
+        dataset = pads.dataset([str(p) for p in self.parts()], format="parquet")
+        return dataset.to_table(
+            columns=["symbol", "dollar_volume"],
+            filter=pc.field("date") == pa.scalar(day, pa.date32()),
+        )
+
+    def top(self, n: int, as_of=None) -> list[str]:
+        """The `n` symbols with the highest rolling dollar volume on `as_of`."""
+        table = self.snapshot(as_of)
+        table = table.filter(pc.invert(pc.is_nan(table["dollar_volume"])))
+        order = pc.sort_indices(table, [("dollar_volume", "descending"), ("symbol", "ascending")])
+        return table["symbol"].take(order[:n]).to_pylist()
+
+
+def _to_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
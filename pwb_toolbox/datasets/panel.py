@@ -0,0 +1,260 @@
+"""Dense price panel: one contiguous ``(date, symbol, field)`` array.
+
+:class:`PricePanel` stores prices in a single C-ordered ``float`` array of
+shape ``(n_dates, n_symbols, n_fields)`` together with the date, symbol and
+field labels.  Per-symbol and per-field access returns NumPy views, and
+:meth:`PricePanel.to_frame` exposes the same memory as the MultiIndex-column
+DataFrame returned by ``get_pricing``.
+
+Example
+-------
+    >>> import pwb_toolbox.datasets as pwb_ds
+    >>> panel = pwb_ds.get_price_panel(["AAPL", "MSFT"], fields=["open", "close"])
+    >>> panel.symbol("AAPL")        # (n_dates, 2) view
+    >>> panel.field("close")        # (n_dates, 2) view
+    >>> panel.save("prices.panel")
+    >>> panel = pwb_ds.PricePanel.load("prices.panel")  # memory-mapped
+    >>> block, handle = panel.share()  # for worker processes
+    >>> pwb_ds.PricePanel.attach(handle)  # in a worker: zero-copy view
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+DUPLICATE_POLICIES = ("first", "last", "raise")
+
+_VALUES_FILE = "values.npy"
+_INDEX_FILE = "index.json"
+
+
+class PricePanel:
+    """Prices as a dense ``(date, symbol, field)`` array with label indexes."""
+
+    def __init__(self, values, dates, symbols, fields):
+        values = values if isinstance(values, np.memmap) else np.asarray(values)
+        dates = pd.DatetimeIndex(dates, name="date")
+        symbols = pd.Index(symbols, name="symbol")
+        fields = pd.Index(fields)
+        expected = (len(dates), len(symbols), len(fields))
+        if values.shape != expected:
+            raise ValueError(f"values has shape {values.shape}, expected {expected}")
+        self.values = values
+        self.dates = dates
+        self.symbols = symbols
+        self.fields = fields
+
+    # ------------------------------------------------------------ builders
+    @classmethod
+    def from_long(cls, df, fields=None, dtype=np.float64, path=None, duplicates="raise"):
+        """
+        Build a panel from a long frame with ``date``/``symbol`` columns.
+
+        Rows are scattered straight into the array, without any pivot or
+        aggregation.  Cells without a row are NaN.  With ``path`` the array is
+        allocated as a memory-mapped file in that directory instead of in RAM.
+
+        ``duplicates`` decides what happens when several rows share a
+        ``(date, symbol)``: ``"raise"`` a ValueError, or keep the ``"first"``
+        or ``"last"`` one.
+        """
+        if duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f"duplicates must be one of {DUPLICATE_POLICIES}, got {duplicates!r}")
+        fields = list(fields or ["close"])
+        if "date" not in df.columns and df.index.name == "date":
+            df = df.reset_index()
+        date_codes, dates = pd.factorize(pd.to_datetime(df["date"]), sort=True)
+        symbol_codes, symbols = pd.factorize(df["symbol"], sort=True)
+        dates = pd.DatetimeIndex(dates, freq=None)
+
+        cells = date_codes.astype(np.int64) * len(symbols) + symbol_codes
+        if len(cells) and np.bincount(cells, minlength=len(dates) * len(symbols)).max() > 1:
+            if duplicates == "raise":
+                n_dup = int(pd.Index(cells).duplicated().sum())
+                raise ValueError(f"{n_dup} duplicate (date, symbol) rows")
+            keep = ~pd.Index(cells).duplicated(keep=duplicates)
+            df = df[keep]
+            date_codes, symbol_codes = date_codes[keep], symbol_codes[keep]
+
+        shape = (len(dates), len(symbols), len(fields))
+        if path is not None:
+            values = cls._allocate(path, shape, dtype, dates, symbols, fields)
+        else:
+            values = np.empty(shape, dtype=dtype)
+        values.fill(np.nan)
+        values[date_codes, symbol_codes, :] = df[fields].to_numpy(dtype=dtype)
+        return cls(values, dates, symbols, fields)
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float64):
+        """Build a panel from a ``get_pricing`` frame with (symbol, field) columns."""
+        if not isinstance(df.columns, pd.MultiIndex):
+            raise ValueError("Expected MultiIndex (symbol, field) columns")
+        symbols = df.columns.get_level_values(0).unique()
+        fields = df.columns.get_level_values(1).unique()
+        full = pd.MultiIndex.from_product([symbols, fields])
+        if not df.columns.equals(full):
+            df = df.reindex(columns=full)
+        values = df.to_numpy(dtype=dtype).reshape(len(df.index), len(symbols), len(fields))
+        return cls(values, df.index, symbols, fields)
+
+    # ---------------------------------------------------------------- access
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        start = self.dates[0].date() if len(self.dates) else None
+        end = self.dates[-1].date() if len(self.dates) else None
+        return (
+            f"PricePanel({len(self.dates)} dates [{start} -> {end}], "
+            f"{len(self.symbols)} symbols, fields={list(self.fields)}, dtype={self.values.dtype})"
+        )
+
+    def symbol(self, symbol):
+        """``(n_dates, n_fields)`` view for one symbol."""
+        return self.values[:, self.symbols.get_loc(symbol), :]
+
+    def field(self, field):
+        """``(n_dates, n_symbols)`` view for one field."""
+        return self.values[:, :, self.fields.get_loc(field)]
+
+    def symbol_frame(self, symbol):
+        """DataFrame (dates × fields) over the symbol's view."""
+        return pd.DataFrame(self.symbol(symbol), index=self.dates, columns=self.fields, copy=False)
+
+    def field_frame(self, field):
+        """DataFrame (dates × symbols) over the field's view."""
+        return pd.DataFrame(self.field(field), index=self.dates, columns=self.symbols, copy=False)
+
+    def to_frame(self):
+        """MultiIndex (symbol, field) column frame, as returned by ``get_pricing``."""
+        columns = pd.MultiIndex.from_product([self.symbols, self.fields], names=["symbol", None])
+        values = self.values.reshape(len(self.dates), -1)
+        return pd.DataFrame(values, index=self.dates, columns=columns, copy=False)
+
+    # --------------------------------------------------------------- slicing
+    def slice_dates(self, start=None, end=None):
+        """Panel restricted to ``start <= date <= end``, sharing memory."""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), "left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), "right")
+        return PricePanel(self.values[lo:hi], self.dates[lo:hi], self.symbols, self.fields)
+
+    def select(self, symbols=None, fields=None):
+        """Copy of the panel restricted to some symbols and/or fields."""
+        s_idx = slice(None) if symbols is None else self.symbols.get_indexer(symbols)
+        f_idx = slice(None) if fields is None else self.fields.get_indexer(fields)
+        for idx, labels in ((s_idx, symbols), (f_idx, fields)):
+            if not isinstance(idx, slice) and (idx < 0).any():
+                missing = [label for label, i in zip(labels, idx) if i < 0]
+                raise KeyError(f"Not in panel: {missing}")
+        values = self.values[:, s_idx][:, :, f_idx]
+        return PricePanel(
+            np.ascontiguousarray(values),
+            self.dates,
+            self.symbols if symbols is None else symbols,
+            self.fields if fields is None else fields,
+        )
+
+    def reindex_dates(self, dates, ffill=False, bfill=False):
+        """Panel on a new date index, optionally forward/back-filling gaps."""
+        dates = pd.DatetimeIndex(dates)
+        pos = self.dates.get_indexer(dates)
+        values = np.full((len(dates),) + self.values.shape[1:], np.nan, dtype=self.values.dtype)
+        found = pos >= 0
+        values[found] = self.values[pos[found]]
+        if ffill:
+            _fill(values, forward=True)
+        if bfill:
+            _fill(values, forward=False)
+        return PricePanel(values, dates, self.symbols, self.fields)
+
+    # ----------------------------------------------------------- persistence
+    @staticmethod
+    def _allocate(path, shape, dtype, dates, symbols, fields):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        index = {
+            "dates": pd.DatetimeIndex(dates).as_unit("ns").asi8.tolist(),
+            "symbols": [str(s) for s in symbols],
+            "fields": [str(f) for f in fields],
+        }
+        (path / _INDEX_FILE).write_text(json.dumps(index))
+        return np.lib.format.open_memmap(path / _VALUES_FILE, mode="w+", dtype=dtype, shape=shape)
+
+    def save(self, path):
+        """Write the panel to directory ``path`` (``values.npy`` + ``index.json``)."""
+        values = self._allocate(path, self.shape, self.values.dtype, self.dates, self.symbols, self.fields)
+        values[:] = self.values
+        values.flush()
+        return Path(path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved panel, memory-mapped read-only unless ``mmap=False``."""
+        path = Path(path)
+        index = json.loads((path / _INDEX_FILE).read_text())
+        values = np.load(path / _VALUES_FILE, mmap_mode="r" if mmap else None)
+        dates = pd.to_datetime(np.asarray(index["dates"], dtype="int64"), unit="ns")
+        return cls(values, dates, index["symbols"], index["fields"])
+
+    def share(self):
+        """
+        Copy the values into a new ``multiprocessing.shared_memory`` block.
+
+        Returns the block, which the caller must ``close()`` and ``unlink()``
+        when done, and a small picklable handle that :meth:`attach` turns back
+        into a panel over the same memory in another process.
+        """
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(create=True, size=max(self.values.nbytes, 1))
+        try:
+            np.ndarray(self.shape, dtype=self.values.dtype, buffer=block.buf)[...] = self.values
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+        handle = {
+            "name": block.name,
+            "shape": self.shape,
+            "dtype": self.values.dtype.str,
+            "dates": self.dates.as_unit("ns").asi8,
+            "symbols": list(self.symbols),
+            "fields": list(self.fields),
+        }
+        return block, handle
+
+    @classmethod
+    def attach(cls, handle):
+        """Read-only panel over the shared block described by `handle` (see :meth:`share`), without copying."""
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(name=handle["name"])
+        values = np.ndarray(handle["shape"], dtype=np.dtype(handle["dtype"]), buffer=block.buf)
+        values.flags.writeable = False
+        dates = pd.to_datetime(np.asarray(handle["dates"], dtype="int64"), unit="ns")
+        panel = cls(values, dates, handle["symbols"], handle["fields"])
+        panel._block = block  # keeps the mapping open for as long as the panel lives
+        return panel
+
+
+def _fill(values, forward=True):
+    """In-place forward (or backward) fill of NaNs along the date axis."""
+    n = values.shape[0]
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(n)[:, None, None], 0 if forward else n - 1)
+    if forward:
+        np.maximum.accumulate(idx, axis=0, out=idx)
+    else:
+        idx = np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+    filled = np.take_along_axis(values, idx, axis=0)
+    values[...] = filled
@@ -0,0 +1,272 @@
+"""Reproducible synthetic daily prices with the schema of the real datasets.
+
+:func:`generate` builds a ``pyarrow.Table`` laid out like a cached
+daily-price dataset (``symbol``, ``date``, ``open``, ``high``, ``low``,
+``close``, ``adj_close``, ``volume``; no ``adj_close`` for Bonds, Forex and
+Indices).  Every symbol gets its own random stream derived from the seed, the
+dataset and the symbol name, so a symbol's history does not depend on which
+other symbols are requested.
+
+The series follow one of three models:
+
+* ``"gbm"``: geometric Brownian motion;
+* ``"jump"``: GBM with Poisson jumps (Merton);
+* ``"regime"``: GBM whose drift and volatility switch between a calm and a
+  turbulent state (two-state Markov chain).
+
+Bond yields follow a mean-reverting process instead.  Stocks and ETFs have
+IPO dates after the start of the range, a few delistings, missing days and
+splits: raw open/high/low/close drop by the split ratio while ``adj_close``
+stays continuous, as in the real data.  Exchanges close on US federal
+holidays, Forex trades every weekday and crypto every day.
+
+``load_dataset``/``get_pricing`` use it with ``source="synthetic"`` or
+``PWB_DATA_SOURCE=synthetic``; the generator is configured with
+``PWB_SYNTHETIC_*`` environment variables (see :class:`SyntheticConfig`).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from functools import lru_cache
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+import pyarrow as pa
+
+
+MODELS = ("gbm", "jump", "regime")
+
+# Per asset class: annual drift, annual volatility range, starting level range,
+# log10 volume range (None: no volume), whether it has splits and IPOs.
+_PROFILES = {
+    "Stocks-Daily-Price": (0.07, (0.15, 0.60), (5.0, 300.0), (4.0, 7.5), True),
+    "ETFs-Daily-Price": (0.06, (0.10, 0.30), (20.0, 300.0), (4.0, 7.0), True),
+    "Indices-Daily-Price": (0.06, (0.10, 0.30), (500.0, 30000.0), None, False),
+    "Commodities-Daily-Price": (0.02, (0.20, 0.45), (2.0, 2000.0), (3.0, 5.5), False),
+    "Cryptocurrencies-Daily-Price": (0.30, (0.50, 1.20), (0.01, 50000.0), (5.0, 9.0), False),
+    "Forex-Daily-Price": (0.00, (0.05, 0.15), (0.5, 2.0), None, False),
+    "Bonds-Daily-Price": (0.00, (0.50, 1.50), (0.5, 6.0), None, False),
+}
+_NO_ADJ_CLOSE = {"Bonds-Daily-Price", "Forex-Daily-Price", "Indices-Daily-Price"}
+_SPLIT_RATIOS = np.array([2.0, 3.0, 1.5, 4.0, 0.1])
+_FX_LEVELS = {"JPY": 110.0, "KRW": 1200.0, "INR": 75.0, "HKD": 7.8, "CNY": 6.8, "BRL": 4.0, "MXN": 18.0}
+_FX_PAIRS = ["EURUSD", "GBPUSD", "AUDUSD", "USDJPY", "USDCHF", "USDCAD", "USDHKD", "USDCNY"]
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    """Generator settings, read from ``PWB_SYNTHETIC_<FIELD>`` by :meth:`from_env`."""
+
+    seed: int = 0
+    model: str = "gbm"
+    start: str = "2000-01-03"
+    end: str = "2024-12-31"
+    symbols: int = 500  # size of the default stock universe
+    ipo_fraction: float = 0.3  # stocks/ETFs listed after `start`
+    delist_fraction: float = 0.05
+    gap_probability: float = 0.002  # missing days
+    split_rate: float = 0.03  # splits per symbol and year
+    jump_rate: float = 3.0  # jumps per year ("jump" model)
+
+    def __post_init__(self):
+        if self.model not in MODELS:
+            raise ValueError(f"model must be one of {MODELS}, got {self.model!r}")
+
+    @classmethod
+    def from_env(cls) -> "SyntheticConfig":
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(f"PWB_SYNTHETIC_{f.name.upper()}")
+            if raw is not None:
+                values[f.name] = type(f.default)(raw)
+        return cls(**values)
+
+
+def default_universe(path: str, config: SyntheticConfig | None = None) -> list[str]:
+    """Symbols generated for `path` when no symbols are requested."""
+    config = config or SyntheticConfig.from_env()
+    if path == "Stocks-Daily-Price":
+        return [f"SYN{i:04d}" for i in range(config.symbols)]
+    if path == "Forex-Daily-Price":
+        return list(_FX_PAIRS)
+    if path == "Bonds-Daily-Price":
+        return ["US3M", "US1Y", "US2Y", "US5Y", "US10Y", "US30Y"]
+    if path == "Commodities-Daily-Price":
+        return ["GC1", "SI1", "CL1", "NG1", "HG1", "C1"]
+    if path == "Cryptocurrencies-Daily-Price":
+        return ["BTC", "ETH", "SOL", "XRP", "ADA"]
+    if path == "Indices-Daily-Price":
+        return ["SPX", "NDX", "DAX", "NKY", "UKX", "HSI"]
+    if path == "ETFs-Daily-Price":
+        return ["SPY", "QQQ", "IEF", "GLD", "EWJ", "XLK"]
+    return []
+
+
+def trading_days(path: str, start, end) -> pd.DatetimeIndex:
+    """Calendar of `path`: every day for crypto, weekdays for Forex, else weekdays minus holidays."""
+    if path == "Cryptocurrencies-Daily-Price":
+        return pd.date_range(start, end, freq="D")
+    days = pd.bdate_range(start, end)
+    if path == "Forex-Daily-Price":
+        return days
+    return days.difference(USFederalHolidayCalendar().holidays(start, end))
+
+
+def _forex_pair(symbol: str) -> str:
+    """The quote direction that exists: only one of ``USDJPY``/``JPYUSD`` is generated."""
+    if symbol in _FX_PAIRS or len(symbol) != 6 or "USD" not in (symbol[:3], symbol[3:]):
+        return symbol
+    if symbol[3:] + symbol[:3] in _FX_PAIRS:
+        return symbol[3:] + symbol[:3]
+    ccy = symbol[3:] if symbol.startswith("USD") else symbol[:3]
+    return f"USD{ccy}" if ccy in _FX_LEVELS else f"{ccy}USD"
+
+
+def _rng(config: SyntheticConfig, path: str, symbol: str) -> np.random.Generator:
+    digest = hashlib.sha256(f"{config.seed}/{config.model}/{path}/{symbol}".encode()).digest()
+    return np.random.default_rng(int.from_bytes(digest[:8], "little"))
+
+
+def _log_returns(rng, n, mu, sigma, periods, config):
+    dt = 1.0 / periods
+    if config.model == "regime":
+        # Alternating calm (~100 days) and turbulent (~20 days) spells
+        state = np.empty(n, dtype=np.int8)
+        i, current = 0, 0
+        while i < n:
+            length = rng.geometric(0.01 if current == 0 else 0.05)
+            state[i : i + length] = current
+            i, current = i + length, 1 - current
+        mu = np.where(state == 1, mu - 0.4, mu)
+        sigma = np.where(state == 1, sigma * 2.5, sigma)
+    returns = (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n)
+    if config.model == "jump":
+        jumps = rng.poisson(config.jump_rate * dt, n)
+        returns += jumps * rng.normal(-0.02, 0.06, n)
+    return returns
+
+
+def _symbol_frame(path, symbol, days, config):
+    """Arrays of one symbol (dates, open, high, low, close, adj_close, volume)."""
+    rng = _rng(config, path, symbol)
+    mu, (vol_lo, vol_hi), (level_lo, level_hi), volume_range, listed = _PROFILES.get(
+        path, _PROFILES["Stocks-Daily-Price"]
+    )
+    periods = 365 if path == "Cryptocurrencies-Daily-Price" else 252
+    n = len(days)
+    sigma = rng.uniform(vol_lo, vol_hi)
+
+    if path == "Bonds-Daily-Price":
+        # Yields in percent, mean-reverting around a symbol-specific level
+        level = rng.uniform(level_lo, level_hi)
+        noise = rng.standard_normal(n) * sigma * np.sqrt(1.0 / periods)
+        close = np.empty(n)
+        y = level
+        for i in range(n):
+            y = max(y + 0.5 / periods * (level - y) + noise[i], 0.01)
+            close[i] = y
+    else:
+        if path == "Forex-Daily-Price" and symbol.startswith("USD"):
+            start = _FX_LEVELS.get(symbol[3:], rng.uniform(level_lo, level_hi))
+        else:
+            start = np.exp(rng.uniform(np.log(level_lo), np.log(level_hi)))
+        close = start * np.exp(np.cumsum(_log_returns(rng, n, mu, sigma, periods, config)))
+
+    intraday = sigma * np.sqrt(1.0 / periods)
+    open_ = np.concatenate([[close[0]], close[:-1]]) * np.exp(rng.normal(0, intraday / 3, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, intraday / 2, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, intraday / 2, n)))
+    if volume_range is None:
+        volume = np.zeros(n)
+    else:
+        base = 10 ** rng.uniform(*volume_range)
+        volume = np.round(base * np.exp(rng.normal(0, 0.4, n) + 2 * np.abs(np.diff(np.log(close), prepend=np.log(close[0])))))
+
+    keep = np.ones(n, dtype=bool)
+    keep &= rng.random(n) >= config.gap_probability
+    adj_close = close.copy()
+    if listed:
+        if rng.random() < config.ipo_fraction:
+            keep[: rng.integers(1, n)] = False
+        if rng.random() < config.delist_fraction:
+            keep[rng.integers(n // 2, n):] = False
+        # Splits: raw prices are divided by the ratios of the splits still to
+        # come; adj_close is the continuous (latest-basis) series.
+        splits = rng.random(n) < config.split_rate / periods
+        ratios = np.where(splits, rng.choice(_SPLIT_RATIOS, n), 1.0)
+        later = np.cumprod(ratios[::-1])[::-1]
+        later = np.concatenate([later[1:], [1.0]])
+        open_, high, low, close = open_ * later, high * later, low * later, close * later
+        volume = np.round(volume / later)
+    if not keep.any():
+        keep[-1] = True
+    return days[keep], open_[keep], high[keep], low[keep], close[keep], adj_close[keep], volume[keep]
+
+
+@lru_cache(maxsize=8)
+def _generate(path, symbols, config):
+    days = trading_days(path, config.start, config.end)
+    names = ("open", "high", "low", "close", "adj_close", "volume")
+    symbols = sorted(set(symbols))
+    codes, dates, columns = [], [], {name: [] for name in names}
+    for code, symbol in enumerate(symbols):
+        symbol_dates, *values = _symbol_frame(path, symbol, days, config)
+        codes.append(np.full(len(symbol_dates), code, dtype=np.int32))
+        dates.append(symbol_dates.values.astype("datetime64[D]"))
+        for name, column in zip(names, values):
+            columns[name].append(column)
+    if path in _NO_ADJ_CLOSE:
+        del columns["adj_close"]
+
+    def concat(parts, dtype):
+        return np.concatenate(parts) if parts else np.array([], dtype=dtype)
+
+    symbol = pa.DictionaryArray.from_arrays(concat(codes, np.int32), pa.array(symbols, pa.string()))
+    return pa.table(
+        {
+            "symbol": symbol.cast(pa.string()),
+            "date": pa.array(concat(dates, "datetime64[D]"), pa.date32()),
+            **{name: pa.array(concat(parts, np.float64), pa.float64()) for name, parts in columns.items()},
+        }
+    )
+
+
+def generate(path, symbols=None, start_date=None, end_date=None, config=None) -> pa.Table:
+    """
+    Synthetic rows of dataset `path`, sorted by symbol and date.
+
+    Parameters
+    ----------
+    path : str
+        A daily-price dataset name, e.g. ``"Stocks-Daily-Price"``; it selects
+        the asset-class profile, calendar and schema.
+    symbols : list[str] | None
+        Any tickers (default :func:`default_universe`).  A currency pair is
+        generated in one quote direction only, like in the real dataset, so
+        ``"JPYUSD"`` returns the rows of ``"USDJPY"``.
+    start_date, end_date : str | None
+        Slice of the generated range (``config.start`` to ``config.end``);
+        slicing does not change the values.
+    config : SyntheticConfig | None
+        Default :meth:`SyntheticConfig.from_env`.
+    """
+    config = config or SyntheticConfig.from_env()
+    if symbols is None:
+        symbols = default_universe(path, config)
+    elif path == "Forex-Daily-Price":
+        symbols = [_forex_pair(symbol) for symbol in symbols]
+    symbols = tuple(sorted(set(symbols)))
+    table = _generate(path, symbols, config)
+    if start_date is not None or end_date is not None:
+        dates = table["date"].to_numpy(zero_copy_only=False).astype("datetime64[D]")
+        mask = np.ones(len(dates), dtype=bool)
+        if start_date is not None:
+            mask &= dates >= np.datetime64(pd.Timestamp(start_date).date())
+        if end_date is not None:
+            mask &= dates <= np.datetime64(pd.Timestamp(end_date).date())
+        table = table.filter(pa.array(mask))
+    return table
@@ -1,11 +1,37 @@
-from .broker_factory import create_connector
-from .ccxt_connector import CCXTConnector
-from .ib_connector import IBConnector
-from .live_utils import (
-    append_nav_history,
-    compute_orders,
-    execute_and_log_orders,
-    log_current_state,
-    run_strategies,
-    scale_positions,
-)
+"""Live execution: broker connectors and order helpers.
+
+Names are imported on first use (PEP 562), so a CCXT-only job never imports
+ib_insync (and vice versa).
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "create_connector": ".broker_factory",
+    "CCXTConnector": ".ccxt_connector",
+    "IBConnector": ".ib_connector",
+    "append_nav_history": ".live_utils",
+    "compute_orders": ".live_utils",
+    "execute_and_log_orders": ".live_utils",
+    "log_current_state": ".live_utils",
+    "run_strategies": ".live_utils",
+    "scale_positions": ".live_utils",
+}
+_SUBMODULES = {module[1:] for module in _EXPORTS.values()} | {"optimal_limit_order"}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
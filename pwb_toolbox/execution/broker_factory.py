@@ -31,12 +31,15 @@ Example
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 
-from .ib_connector import IBConnector
-from .ccxt_connector import CCXTConnector
+if TYPE_CHECKING:
+    from .ib_connector import IBConnector
+    from .ccxt_connector import CCXTConnector
 
-Connector = Union[IBConnector, CCXTConnector]
+# Connectors are imported by the branch that needs them, so ib_insync and
+# ccxt are never loaded together.
+Connector = Union["IBConnector", "CCXTConnector"]
 
 
 def create_connector(config: Optional[Dict[str, Any]] = None) -> Connector:
@@ -64,6 +67,8 @@ def create_connector(config: Optional[Dict[str, Any]] = None) -> Connector:
                 "market_data_type", os.getenv("PWB_IB_MARKET_DATA_TYPE", 4)
             )
         )
+        from .ib_connector import IBConnector
+
         return IBConnector(
             host=host,
             port=port,
@@ -78,6 +83,8 @@ def create_connector(config: Optional[Dict[str, Any]] = None) -> Connector:
         api_key = cfg.get("api_key", os.getenv("PWB_CCXT_API_KEY"))
         api_secret = cfg.get("api_secret", os.getenv("PWB_CCXT_API_SECRET"))
         params = cfg.get("params")
+        from .ccxt_connector import CCXTConnector
+
         return CCXTConnector(
             exchange,
             api_key=api_key,
@@ -1,8 +1,6 @@
 import math
 
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.integrate import odeint
 
 
 def optimal_limit_order_formula(q_max, t_max, mu, sigma, A, k, gamma, b, is_plot=False):
@@ -36,6 +34,8 @@ def optimal_limit_order_formula(q_max, t_max, mu, sigma, A, k, gamma, b, is_plot
     w_T = [w_T(q) for q in range(1, q_max + 1)]
     t = np.linspace(0, -t_max, 100)
 
+    from scipy.integrate import odeint
+
     w = odeint(linear_ode_system, w_T, t, args=())
 
     delta = {}
@@ -50,6 +50,8 @@ def optimal_limit_order_formula(q_max, t_max, mu, sigma, A, k, gamma, b, is_plot
             )
 
     if is_plot:
+        import matplotlib.pyplot as plt
+
         for q in range(1, q_max + 1):
             plt.plot(t, delta[q], "b", label=f"delta_{q}(t)")
         plt.legend(loc="best")
@@ -1,66 +1,69 @@
-from .metrics import (
-    total_return,
-    cagr,
-    returns_table,
-    rolling_cumulative_return,
-    annualized_volatility,
-    max_drawdown,
-    ulcer_index,
-    ulcer_performance_index,
-    parametric_var,
-    parametric_expected_shortfall,
-    tail_ratio,
-    sharpe_ratio,
-    sortino_ratio,
-    calmar_ratio,
-    omega_ratio,
-    information_ratio,
-    capm_alpha_beta,
-    skewness,
-    kurtosis,
-    variance_ratio,
-    acf,
-    pacf,
-    fama_french_3factor,
-    fama_french_5factor,
-    cumulative_excess_return,
-)
+"""Performance metrics, trade statistics, plots and reports.
 
-from .plots import (
-    plot_equity_curve,
-    plot_return_heatmap,
-    plot_underwater,
-    plot_rolling_volatility,
-    plot_rolling_var,
-    plot_rolling_sharpe,
-    plot_rolling_sortino,
-    plot_return_scatter,
-    plot_cumulative_excess_return,
-    plot_factor_exposures,
-    plot_trade_return_hist,
-    plot_return_by_holding_period,
-    plot_exposure_ts,
-    plot_cumulative_shortfall,
-    plot_alpha_vs_return,
-    plot_qq_returns,
-    plot_rolling_skewness,
-    plot_rolling_kurtosis,
-)
+Names are imported on first use (PEP 562): the metrics and trade statistics
+only need pandas, while the plots and reports load matplotlib when first
+accessed.
+"""
 
-from .reports import generate_monitoring_report
+from importlib import import_module
 
-from .trade_stats import (
-    hit_rate,
-    average_win_loss,
-    expectancy,
-    profit_factor,
-    trade_duration_distribution,
-    turnover,
-    trade_implementation_shortfall,
-    cumulative_implementation_shortfall,
-    slippage_stats,
-    latency_stats,
-)
+_EXPORTS = {
+    "total_return": ".metrics",
+    "cagr": ".metrics",
+    "returns_table": ".metrics",
+    "rolling_cumulative_return": ".metrics",
+    "annualized_volatility": ".metrics",
+    "max_drawdown": ".metrics",
+    "ulcer_index": ".metrics",
+    "ulcer_performance_index": ".metrics",
+    "parametric_var": ".metrics",
+    "parametric_expected_shortfall": ".metrics",
+    "tail_ratio": ".metrics",
+    "sharpe_ratio": ".metrics",
+    "sortino_ratio": ".metrics",
+    "calmar_ratio": ".metrics",
+    "omega_ratio": ".metrics",
+    "information_ratio": ".metrics",
+    "capm_alpha_beta": ".metrics",
+    "skewness": ".metrics",
+    "kurtosis": ".metrics",
+    "variance_ratio": ".metrics",
+    "acf": ".metrics",
+    "pacf": ".metrics",
+    "fama_french_3factor": ".metrics",
+    "fama_french_5factor": ".metrics",
+    "cumulative_excess_return": ".metrics",
+    "plot_equity_curve": ".plots",
+    "plot_return_heatmap": ".plots",
+    "plot_underwater": ".plots",
+    "plot_rolling_volatility": ".plots",
+    "plot_rolling_var": ".plots",
+    "plot_rolling_sharpe": ".plots",
+    "plot_rolling_sortino": ".plots",
+    "plot_return_scatter": ".plots",
+    "plot_cumulative_excess_return": ".plots",
+    "plot_factor_exposures": ".plots",
+    "plot_trade_return_hist": ".plots",
+    "plot_return_by_holding_period": ".plots",
+    "plot_exposure_ts": ".plots",
+    "plot_cumulative_shortfall": ".plots",
+    "plot_alpha_vs_return": ".plots",
+    "plot_qq_returns": ".plots",
+    "plot_rolling_skewness": ".plots",
+    "plot_rolling_kurtosis": ".plots",
+    "generate_monitoring_report": ".reports",
+    "hit_rate": ".trade_stats",
+    "average_win_loss": ".trade_stats",
+    "expectancy": ".trade_stats",
+    "profit_factor": ".trade_stats",
+    "trade_duration_distribution": ".trade_stats",
+    "turnover": ".trade_stats",
+    "trade_implementation_shortfall": ".trade_stats",
+    "cumulative_implementation_shortfall": ".trade_stats",
+    "slippage_stats": ".trade_stats",
+    "latency_stats": ".trade_stats",
+}
+_SUBMODULES = {module[1:] for module in _EXPORTS.values()} | {"nav_metrics"}
 
 __all__ = [
     "total_return",
@@ -117,3 +120,18 @@ __all__ = [
     "plot_rolling_skewness",
     "plot_rolling_kurtosis",
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
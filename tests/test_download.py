@@ -0,0 +1,154 @@
+"""``datasets.download.download_files`` against a local stand-in server.
+
+The server supports ``Range``/``If-Range`` and, when flaky, drops the first
+transfer of every file half-way, like ``benchmarks/bench_download.py``.
+"""
+
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pwb_toolbox.datasets import download
+from pwb_toolbox.datasets.download import DownloadError, download_files, file_name
+
+
+class StandIn:
+    """In-memory file store served over HTTP, with request accounting."""
+
+    def __init__(self):
+        self.files = {}
+        self.etags = {}
+        self.flaky = False
+        self.dropped = set()
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def put(self, name: str, data: bytes, etag: str | None = None) -> None:
+        self.files[name] = data
+        self.etags[name] = etag or '"%s"' % hashlib.md5(data).hexdigest()
+
+    def handler(self):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                name = self.path.split("?", 1)[0].lstrip("/")
+                with store.lock:
+                    store.requests.append((name, self.headers.get("Range")))
+                if name not in store.files:
+                    self.send_error(404)
+                    return
+                data, etag = store.files[name], store.etags[name]
+                start, status = 0, 200
+                byte_range = self.headers.get("Range")
+                if byte_range and self.headers.get("If-Range", etag) == etag:
+                    start, status = int(byte_range.split("=")[1].split("-")[0]), 206
+                body = data[start:]
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+                self.end_headers()
+                with store.lock:
+                    drop = store.flaky and name not in store.dropped
+                    store.dropped.add(name)
+                if drop:  # cut the connection half-way through
+                    self.wfile.write(body[: len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        return Handler
+
+    def tags(self, base: str) -> dict[str, str]:
+        return {f"{base}/{name}": etag for name, etag in self.etags.items()}
+
+
+def parquet_bytes(seed: int, rows: int = 50_000) -> bytes:
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    pd.DataFrame({"symbol": f"S{seed:03d}", "close": rng.random(rows)}).to_parquet(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(download, "BACKOFF", 0.0)
+    store = StandIn()
+    for i in range(4):
+        store.put(f"data/part-{i:03d}.parquet", parquet_bytes(i))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), store.handler())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_port}"
+    yield store, base, [f"{base}/{name}?sig=abc" for name in store.files]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_interrupted_files_resume(server, tmp_path):
+    store, base, urls = server
+    store.flaky = True
+    paths = download_files(urls, tmp_path, tags=store.tags(base), max_workers=4, progress=False)
+
+    for path, name in zip(paths, store.files):
+        assert path.name == file_name(f"{base}/{name}")
+        assert path.read_bytes() == store.files[name]
+    resumed = sorted(name for name, byte_range in store.requests if byte_range)
+    assert resumed == sorted(store.files)
+    assert not list(tmp_path.glob("*.part*"))
+
+
+def test_unchanged_files_are_skipped(server, tmp_path):
+    store, base, urls = server
+    paths = download_files(urls, tmp_path, tags=store.tags(base), progress=False)
+
+    store.requests.clear()
+    assert download_files(urls, tmp_path, tags=store.tags(base), progress=False) == paths
+    assert store.requests == []
+
+    # A changed file and a corrupted local copy are fetched again, alone
+    changed = next(iter(store.files))
+    store.put(changed, parquet_bytes(999))
+    paths[-1].write_bytes(b"garbage")
+    store.requests.clear()
+    paths = download_files(urls, tmp_path, tags=store.tags(base), progress=False)
+    assert sorted(name for name, _ in store.requests) == sorted([changed, list(store.files)[-1]])
+    assert paths[0].read_bytes() == store.files[changed]
+
+
+def test_files_without_tags_are_fetched_again(server, tmp_path):
+    store, base, urls = server
+    download_files(urls, tmp_path, progress=False)
+    store.requests.clear()
+    download_files(urls, tmp_path, progress=False)
+    assert len(store.requests) == len(urls)
+
+
+def test_checksum_mismatch_is_rejected(server, tmp_path):
+    store, base, urls = server
+    name = next(iter(store.files))
+    store.put(name, store.files[name], etag='"%s"' % hashlib.md5(b"other bytes").hexdigest())
+
+    with pytest.raises(DownloadError, match="MD5"):
+        download_files(urls[:1], tmp_path, retries=2, progress=False)
+    assert not (tmp_path / file_name(urls[0])).exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_truncated_parquet_is_rejected(server, tmp_path):
+    store, base, urls = server
+    name = next(iter(store.files))
+    store.put(name, store.files[name][:-10], etag='"not-an-md5"')
+
+    with pytest.raises(DownloadError, match="parquet"):
+        download_files(urls[:1], tmp_path, retries=1, progress=False)
@@ -0,0 +1,52 @@
+"""ETF extension with a date window that ends before the ETF's inception.
+
+The proxy history is scaled on the ETF's first date, so the window may only
+be applied once the ETFs are extended.  Synthetic SPY starts in 2002 with
+``PWB_SYNTHETIC_IPO_FRACTION=1.0``; the window below ends before that.
+"""
+
+import pandas as pd
+import pytest
+
+import pwb_toolbox.datasets as pwb_ds
+
+
+START, END = "2001-01-01", "2002-01-01"
+
+
+@pytest.fixture(autouse=True)
+def late_ipos(monkeypatch):
+    monkeypatch.setenv("PWB_SYNTHETIC_IPO_FRACTION", "1.0")
+
+
+def expected(symbols):
+    full = pwb_ds.load_dataset("ETFs-Daily-Price", symbols, extend=True, source="synthetic")
+    dates = pd.to_datetime(full["date"])
+    return full[(dates >= START) & (dates <= END)].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("backend", ["pandas", "arrow"])
+def test_load_dataset_extends_before_slicing(backend):
+    raw = pwb_ds.load_dataset("ETFs-Daily-Price", ["SPY"], source="synthetic")
+    assert pd.to_datetime(raw["date"]).min() > pd.Timestamp(END)
+
+    df = pwb_ds.load_dataset(
+        "ETFs-Daily-Price", ["SPY"], extend=True, start_date=START, end_date=END, source="synthetic", backend=backend
+    )
+    assert not df.empty
+    pd.testing.assert_frame_equal(df, expected(["SPY"]))
+
+
+def test_get_pricing_extends_before_slicing():
+    prices = pwb_ds.get_pricing(["SPY", "QQQ"], start_date=START, end_date=END, extend=True, source="synthetic")
+    assert list(prices.columns.get_level_values(0)) == ["QQQ", "SPY"]
+    assert prices.index.min() >= pd.Timestamp(START) and prices.index.max() <= pd.Timestamp(END)
+    assert prices.notna().all().all()
+
+
+def test_iter_dataset_extends_before_slicing():
+    chunks = pwb_ds.iter_dataset(
+        "ETFs-Daily-Price", ["SPY", "QQQ"], extend=True, start_date=START, end_date=END, source="synthetic"
+    )
+    df = pd.concat(list(chunks), ignore_index=True).sort_values(["symbol", "date"], ignore_index=True)
+    pd.testing.assert_frame_equal(df, expected(["SPY", "QQQ"]).sort_values(["symbol", "date"], ignore_index=True))
@@ -0,0 +1,49 @@
+"""Serving the dataset cache when the remote tags of some files are unknown."""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import pwb_toolbox.datasets as pwb_ds
+
+
+URL = "https://files.example/{}.parquet?signature=abc"
+
+
+@pytest.fixture
+def remote(monkeypatch, tmp_path):
+    """A PWB listing whose files never return a tag, and a download counter."""
+    monkeypatch.setenv("PWB_API_KEY", "key")
+    monkeypatch.setenv("PWB_CACHE_DIR", str(tmp_path))
+    state = {"names": ["a", "b"], "downloads": 0}
+
+    def listing(path, split, key):
+        return [URL.format(name) for name in state["names"]], {}
+
+    def load(path, split, pwb_api_key, files=None, tags=None):
+        state["downloads"] += 1
+        return pa.table({"symbol": state["names"], "date": ["2020-01-01"] * len(state["names"])})
+
+    monkeypatch.setattr(pwb_ds, "_pwb_listing", listing)
+    monkeypatch.setattr(pwb_ds, "_pwb_file_tags", lambda files, known: {pwb_ds._strip_query(url): None for url in files})
+    monkeypatch.setattr(pwb_ds, "_load_dataset_from_pwb", load)
+    return state
+
+
+def symbols(files):
+    return sorted(pa.concat_tables([pq.read_table(path) for path in files])["symbol"].to_pylist())
+
+
+def test_unknown_tags_serve_the_cache(remote):
+    pwb_ds._fetch_cached_files("Stocks-Daily-Price", "train")
+    pwb_ds._fetch_cached_files("Stocks-Daily-Price", "train")
+    assert remote["downloads"] == 1
+
+
+@pytest.mark.parametrize("names", [["a", "b", "c"], ["a"]])
+def test_added_or_removed_files_refresh_the_cache(remote, names):
+    pwb_ds._fetch_cached_files("Stocks-Daily-Price", "train")
+    remote["names"] = names
+    files = pwb_ds._fetch_cached_files("Stocks-Daily-Price", "train")
+    assert remote["downloads"] == 2
+    assert symbols(files) == names
@@ -0,0 +1,61 @@
+"""The vectorised Forex ``to_usd`` inversion matches the former row loop."""
+
+import numpy as np
+import pandas as pd
+
+import pwb_toolbox.datasets as pwb_ds
+
+
+def legacy_to_usd(df: pd.DataFrame) -> pd.DataFrame:
+    """The row-by-row implementation previously used by ``load_dataset``."""
+    for index, row in df.iterrows():
+        if row["symbol"].endswith("USD"):
+            continue
+        df.at[index, "open"] = 1 / row["open"]
+        df.at[index, "high"] = 1 / row["high"]
+        df.at[index, "low"] = 1 / row["low"]
+        df.at[index, "close"] = 1 / row["close"]
+        df.at[index, "symbol"] = row["symbol"][3:] + "USD"
+    return df
+
+
+def make_forex() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2020-01-01", periods=30).date
+    frames = []
+    # USD as quote, USD as base, and a cross without USD
+    for symbol in ["EURUSD", "USDJPY", "GBPUSD", "USDCHF", "EURGBP"]:
+        close = np.exp(np.cumsum(rng.normal(0, 0.005, len(dates))))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "date": dates,
+                    "open": close * 1.001,
+                    "high": close * 1.004,
+                    "low": close * 0.996,
+                    "close": close,
+                }
+            )
+        )
+    # Interleave the pairs so that inverted rows are not contiguous
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_convert_forex_to_usd_matches_legacy_loop():
+    df = make_forex()
+    expected = legacy_to_usd(df.copy())
+    result = pwb_ds.__convert_forex_to_usd(df.copy())
+    pd.testing.assert_frame_equal(result, expected)
+    assert set(result["symbol"]) == {"EURUSD", "JPYUSD", "GBPUSD", "CHFUSD"}
+
+
+def test_compact_to_usd_drops_unused_categories():
+    frames = {
+        backend: pwb_ds.load_dataset(
+            "Forex-Daily-Price", ["EURUSD", "USDJPY"], source="synthetic", compact=True, backend=backend
+        )
+        for backend in ["pandas", "arrow"]
+    }
+    assert list(frames["pandas"]["symbol"].cat.categories) == ["EURUSD", "JPYUSD"]
+    pd.testing.assert_frame_equal(frames["pandas"], frames["arrow"])
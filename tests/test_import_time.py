@@ -0,0 +1,37 @@
+"""Importing the ``pwb_toolbox`` entry points stays lazy.
+
+Each module is imported in a fresh interpreter; the heavy packages it must
+only load on demand may not end up in ``sys.modules``.  Wall-clock import
+times depend on the machine and its load, so their budgets are checked by
+``benchmarks/bench_import_time.py`` instead.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+
+# module -> packages that must not be imported
+FORBIDDEN = {
+    "pwb_toolbox": ["pandas", "numpy"],
+    "pwb_toolbox.backtesting": ["backtrader", "deap", "scipy", "matplotlib", "datasets"],
+    "pwb_toolbox.performance": ["pandas", "matplotlib", "scipy"],
+    "pwb_toolbox.performance.nav_metrics": ["matplotlib", "scipy", "datasets"],
+    "pwb_toolbox.execution": ["ib_insync", "ccxt", "matplotlib", "scipy"],
+    "pwb_toolbox.execution.ccxt_connector": ["ib_insync", "matplotlib", "scipy"],
+    "pwb_toolbox.datasets": ["datasets", "huggingface_hub", "matplotlib", "scipy"],
+}
+
+
+def loaded_packages(module: str) -> set[str]:
+    """Top-level packages in ``sys.modules`` after importing `module`."""
+    probe = f"import sys, {module}; print(' '.join(sorted({{m.partition('.')[0] for m in sys.modules}})))"
+    proc = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    return set(proc.stdout.split())
+
+
+@pytest.mark.parametrize("module", list(FORBIDDEN))
+def test_import_stays_lazy(module):
+    loaded = loaded_packages(module)
+    assert not loaded & set(FORBIDDEN[module]), f"{module} imports {sorted(loaded & set(FORBIDDEN[module]))}"
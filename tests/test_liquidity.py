@@ -0,0 +1,72 @@
+"""Incremental updates of the liquidity index match a full rebuild."""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from pwb_toolbox.datasets.liquidity import LiquidityIndex
+
+
+WINDOW = 5
+
+
+def prices(spans) -> pd.DataFrame:
+    """Symbol/date sorted daily bars, one (start, end) business-day span per symbol."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for symbol, (start, end) in sorted(spans.items()):
+        dates = pd.bdate_range(start, end)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "date": dates.date,
+                    "close": 10 + rng.random(len(dates)),
+                    "volume": rng.integers(1_000, 5_000, len(dates)).astype(float),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def write(df, path):
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+    return path
+
+
+def contents(index) -> pd.DataFrame:
+    frames = [pq.read_table(part).to_pandas() for part in index.parts()]
+    return pd.concat(frames).sort_values(["symbol", "date"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize(
+    "spans",
+    [
+        # A new symbol with a long history
+        {"AAA": ("2020-01-01", "2020-04-30"), "BBB": ("2020-01-01", "2020-04-30"), "CCC": ("2019-10-01", "2020-04-30")},
+        # A backfilled symbol
+        {"AAA": ("2019-10-01", "2020-04-30"), "BBB": ("2020-01-01", "2020-04-30")},
+        # A removed symbol
+        {"AAA": ("2020-01-01", "2020-04-30")},
+    ],
+)
+def test_update_matches_rebuild(tmp_path, spans):
+    before = prices({"AAA": ("2020-01-01", "2020-03-31"), "BBB": ("2020-01-01", "2020-03-31")})
+    after = prices(spans)
+    # Rows already indexed keep their values
+    after = pd.concat([before, after]).drop_duplicates(["symbol", "date"]).sort_values(["symbol", "date"])
+    after = after[after["symbol"].isin(list(spans))].reset_index(drop=True)
+
+    index = LiquidityIndex(tmp_path / "incremental", WINDOW)
+    index.update(write(before, tmp_path / "before.parquet"), "before")
+    index.update(write(after, tmp_path / "after.parquet"), "after")
+    full = LiquidityIndex(tmp_path / "full", WINDOW)
+    full.update(tmp_path / "after.parquet", "after")
+
+    pd.testing.assert_frame_equal(contents(index), contents(full))
+    assert index.dates == full.dates
+    assert index.top(3, as_of=date(2019, 12, 31)) == full.top(3, as_of=date(2019, 12, 31))